@@ -0,0 +1,156 @@
+"""
+Cache Store Module
+Embedded key-value store for the bot cache, backed by a single SQLite
+database in WAL mode. Values are pickled so any object the old per-key
+pickle files held can be stored unchanged.
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from logger import debug, error
+
+DB_FILENAME = "cache.db"
+MIGRATION_MARKER = "_pickle_migration_done"
+
+# SQLite limits the number of host parameters per statement
+_MAX_BATCH = 500
+
+
+class CacheStore:
+	"""Thread-safe key-value store with per-key TTL and batch reads"""
+
+	def __init__(self, directory):
+		"""
+		Initialize CacheStore
+
+		Args:
+			directory: Cache directory. The database is created inside it.
+		"""
+		self.directory = directory
+		self.path = os.path.join(directory, DB_FILENAME)
+		self._local = threading.local()
+		self._write_lock = threading.Lock()
+		conn = self._connection()
+		conn.execute("PRAGMA journal_mode=WAL")
+		conn.execute(
+			"CREATE TABLE IF NOT EXISTS cache ("
+			"key TEXT PRIMARY KEY, "
+			"value BLOB NOT NULL, "
+			"expires_at REAL)"
+		)
+		conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at) WHERE expires_at IS NOT NULL")
+		conn.commit()
+
+	def _connection(self):
+		"""One connection per thread; WAL lets readers run alongside the writer"""
+		conn = getattr(self._local, "conn", None)
+		if conn is None:
+			conn = sqlite3.connect(self.path, timeout=30)
+			conn.execute("PRAGMA synchronous=NORMAL")
+			self._local.conn = conn
+		return conn
+
+	def get(self, key):
+		"""Returns the value stored for key, or None if missing or expired"""
+		return self.get_many([key]).get(key)
+
+	def get_many(self, keys):
+		"""
+		Reads several keys at once.
+
+		Args:
+			keys: Iterable of keys
+
+		Returns:
+			dict {key: value} with only the keys that exist and have not expired
+		"""
+		keys = list(dict.fromkeys(keys))
+		result = {}
+		now = time.time()
+		conn = self._connection()
+		for i in range(0, len(keys), _MAX_BATCH):
+			batch = keys[i:i + _MAX_BATCH]
+			placeholders = ",".join("?" * len(batch))
+			rows = conn.execute(
+				f"SELECT key, value FROM cache WHERE key IN ({placeholders}) AND (expires_at IS NULL OR expires_at > ?)",
+				(*batch, now)
+			).fetchall()
+			for key, value in rows:
+				try:
+					result[key] = pickle.loads(value)
+				except Exception as e:
+					error(f"Error reading cache item: {key} - {e}")
+		return result
+
+	def set(self, key, value, ttl=None):
+		"""
+		Stores a value.
+
+		Args:
+			key: Cache key
+			value: Any picklable object
+			ttl: Optional time to live in seconds
+		"""
+		self.set_many({key: value}, ttl=ttl)
+
+	def set_many(self, items, ttl=None):
+		"""Stores several {key: value} pairs in one transaction"""
+		expires_at = time.time() + ttl if ttl else None
+		rows = [(key, pickle.dumps(value), expires_at) for key, value in items.items()]
+		with self._write_lock:
+			conn = self._connection()
+			with conn:
+				conn.executemany("INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)", rows)
+
+	def delete(self, key):
+		"""Removes a key (no error if it does not exist)"""
+		with self._write_lock:
+			conn = self._connection()
+			with conn:
+				conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+	def purge_expired(self):
+		"""Deletes expired entries. Returns the number of removed keys."""
+		with self._write_lock:
+			conn = self._connection()
+			with conn:
+				cursor = conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+		return cursor.rowcount
+
+	def migrate_pickle_files(self):
+		"""
+		One-time import of the legacy one-pickle-file-per-key cache.
+
+		Every file in the cache directory that unpickles is imported under
+		its file name and then removed. Files that are not pickles (the
+		schedule flow JSON state, the database itself...) are left alone.
+		"""
+		if self.get(MIGRATION_MARKER):
+			return 0
+		items = {}
+		migrated_paths = []
+		for name in os.listdir(self.directory):
+			path = os.path.join(self.directory, name)
+			if name.startswith(DB_FILENAME) or name.endswith(".json") or not os.path.isfile(path):
+				continue
+			try:
+				with open(path, "rb") as f:
+					items[name] = pickle.load(f)
+				migrated_paths.append(path)
+			except Exception:
+				debug(f"Skipping non-pickle cache file {name}")
+		if items:
+			self.set_many(items)
+		for path in migrated_paths:
+			try:
+				os.remove(path)
+			except Exception as e:
+				error(f"Could not remove migrated cache file {path}: {e}")
+		self.set(MIGRATION_MARKER, True)
+		if items:
+			debug(f"Migrated {len(items)} pickle cache files to {self.path}")
+		return len(items)
@@ -9,9 +9,20 @@ TELEGRAM_THREAD = os.environ.get("TELEGRAM_THREAD", "1")
 CHECK_UPDATES = bool(int(os.environ.get("CHECK_UPDATES", "1")))
 CHECK_UPDATE_EVERY_HOURS = float(os.environ.get("CHECK_UPDATE_EVERY_HOURS", "4"))
 CHECK_UPDATE_STOPPED_CONTAINERS = bool(int(os.environ.get("CHECK_UPDATE_STOPPED_CONTAINERS", "1")))
+CHECK_UPDATE_DIGEST_ONLY = bool(int(os.environ.get("CHECK_UPDATE_DIGEST_ONLY", "1")))
+CHECK_UPDATE_WORKERS = int(os.environ.get("CHECK_UPDATE_WORKERS", "8"))
+CHECK_UPDATE_REGISTRY_CONCURRENCY = int(os.environ.get("CHECK_UPDATE_REGISTRY_CONCURRENCY", "4"))
 CONTAINER_NAME = os.environ.get("CONTAINER_NAME")
 LANGUAGE = os.environ.get("LANGUAGE", "ES")
 EXTENDED_MESSAGES = bool(int(os.environ.get("EXTENDED_MESSAGES", "0")))
+NOTIFICATION_DIGEST_SECONDS = int(os.environ.get("NOTIFICATION_DIGEST_SECONDS", "5"))
+LOGFILE_MAX_SIZE_MB = int(os.environ.get("LOGFILE_MAX_SIZE_MB", "200"))
+STATS_SAMPLE_SECONDS = int(os.environ.get("STATS_SAMPLE_SECONDS", "15"))
+ALERT_CPU_PERCENT = float(os.environ.get("ALERT_CPU_PERCENT", "0"))
+ALERT_MEM_PERCENT = float(os.environ.get("ALERT_MEM_PERCENT", "0"))
+ALERT_SUSTAINED_SECONDS = int(os.environ.get("ALERT_SUSTAINED_SECONDS", "300"))
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "10"))
+HOST_PROC_PATH = os.environ.get("HOST_PROC_PATH", "/host/proc")
 BUTTON_COLUMNS = int(os.environ.get("BUTTON_COLUMNS", "2"))
 
 # CONSTANTS
@@ -27,10 +38,13 @@ FULL_MUTE_FILE_PATH = f'{SCHEDULE_PATH}/{MUTE_FILE}'
 DONORS_URL = "https://donate.dgongut.com/donors.json"
 ICON_CONTAINER_MARK_FOR_UPDATE = "➕"
 ICON_CONTAINER_MARKED_FOR_UPDATE = "✅"
+ALERT_HYSTERESIS_PERCENT = 10
 
 # LABELS
 LABEL_IGNORE_CHECK_UPDATES = "DCB-Ignore-Check-Updates"
 LABEL_AUTO_UPDATE = "DCB-Auto-Update"
+LABEL_ALERT_CPU = "DCB-Alert-CPU"
+LABEL_ALERT_MEM = "DCB-Alert-Mem"
 
 docker_architectures = {
     "x86_64": "amd64",
@@ -68,7 +82,11 @@ CALL_PATTERNS = {
     "generatePort": [],
     "info": ["containerId"],
     "logfile": ["containerId"],
+    "logfileRange": ["containerId", "logRange"],
     "logs": ["containerId"],
+    "logsFollow": ["containerId"],
+    "logsFollowStop": ["containerId"],
+    "top": ["metric"],
     "toggleUpdate": ["containerId"],
     "toggleUpdateAll": [],
     "prune": ["action"],
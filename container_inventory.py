@@ -0,0 +1,168 @@
+"""
+Container Inventory Module
+In-memory view of all containers, seeded once and kept current from the
+Docker event stream so commands don't have to list and inspect every
+container on each call.
+"""
+
+import threading
+
+import docker
+
+from logger import debug, error
+
+COMPOSE_PROJECT_LABEL = 'com.docker.compose.project'
+
+# Events after which the container is inspected again. "destroy" removes it.
+REFRESH_ACTIONS = (
+	"create", "start", "restart", "die", "stop", "kill", "pause", "unpause",
+	"rename", "update", "oom", "health_status",
+)
+
+
+class ContainerInventory:
+	"""Containers indexed by full id, short id, name and compose project"""
+
+	def __init__(self, client, short_id_length=12):
+		"""
+		Initialize ContainerInventory
+
+		Args:
+			client: Docker client
+			short_id_length: Length of the short ids used across the bot
+		"""
+		self.client = client
+		self.short_id_length = short_id_length
+		self._lock = threading.RLock()
+		self._live = False
+		self._by_id = {}
+		self._by_short_id = {}
+		self._by_name = {}
+		self._by_project = {}
+
+	@property
+	def live(self):
+		"""True while the inventory is being kept current by the event stream"""
+		return self._live
+
+	def _index(self, container):
+		project = (container.labels or {}).get(COMPOSE_PROJECT_LABEL)
+		self._by_id[container.id] = container
+		self._by_short_id[container.id[:self.short_id_length]] = container.id
+		self._by_name[container.name] = container.id
+		if project:
+			self._by_project.setdefault(project, set()).add(container.id)
+
+	def _unindex(self, container_id):
+		container = self._by_id.pop(container_id, None)
+		if container is None:
+			return
+		self._by_short_id.pop(container_id[:self.short_id_length], None)
+		if self._by_name.get(container.name) == container_id:
+			del self._by_name[container.name]
+		project = (container.labels or {}).get(COMPOSE_PROJECT_LABEL)
+		if project and project in self._by_project:
+			self._by_project[project].discard(container_id)
+			if not self._by_project[project]:
+				del self._by_project[project]
+
+	def _load(self):
+		containers = self.client.containers.list(all=True)
+		with self._lock:
+			self._by_id.clear()
+			self._by_short_id.clear()
+			self._by_name.clear()
+			self._by_project.clear()
+			for container in containers:
+				self._index(container)
+
+	def seed(self):
+		"""
+		Loads every container and marks the inventory as live.
+
+		Must be called once the event stream is subscribed, so no change
+		between the listing and the first event is lost.
+		"""
+		self._load()
+		self._live = True
+		debug(f"Container inventory seeded with {len(self._by_id)} containers")
+
+	def invalidate(self):
+		"""Stop trusting the inventory (event stream lost) until the next seed()"""
+		self._live = False
+
+	def _ensure_current(self):
+		# Without the event stream the indexes can't be trusted, reload them
+		if not self._live:
+			self._load()
+
+	def refresh(self, container_id):
+		"""Inspects a single container again and updates the indexes"""
+		try:
+			container = self.client.containers.get(container_id)
+		except docker.errors.NotFound:
+			self.remove(container_id)
+			return None
+		with self._lock:
+			self._unindex(container.id)
+			self._index(container)
+		return container
+
+	def remove(self, container_id):
+		"""Drops a container from the inventory"""
+		with self._lock:
+			full_id = self._resolve_id(container_id)
+			if full_id:
+				self._unindex(full_id)
+
+	def handle_event(self, event):
+		"""Applies a Docker container event to the inventory"""
+		if event.get('Type', '') != 'container':
+			return
+		action = event.get('Action', '') or event.get('status', '')
+		container_id = event.get('id') or event.get('Actor', {}).get('ID')
+		if not container_id:
+			return
+		try:
+			if action == "destroy":
+				self.remove(container_id)
+			elif action.startswith(REFRESH_ACTIONS):
+				self.refresh(container_id)
+		except Exception as e:
+			error(f"Container inventory: could not apply event {action} for {container_id[:self.short_id_length]}: [{e}]")
+
+	def _resolve_id(self, container_id):
+		if container_id in self._by_id:
+			return container_id
+		if len(container_id) == self.short_id_length:
+			return self._by_short_id.get(container_id)
+		for full_id in self._by_id:
+			if full_id.startswith(container_id):
+				return full_id
+		return None
+
+	def list(self):
+		"""Returns all containers"""
+		self._ensure_current()
+		with self._lock:
+			return list(self._by_id.values())
+
+	def get(self, container_id):
+		"""Returns a container by full or short id, or None"""
+		self._ensure_current()
+		with self._lock:
+			full_id = self._resolve_id(container_id)
+			return self._by_id.get(full_id) if full_id else None
+
+	def get_by_name(self, name):
+		"""Returns a container by name, or None"""
+		self._ensure_current()
+		with self._lock:
+			container_id = self._by_name.get(name)
+			return self._by_id.get(container_id) if container_id else None
+
+	def get_project(self, project_name):
+		"""Returns the containers of a compose project"""
+		self._ensure_current()
+		with self._lock:
+			return [self._by_id[container_id] for container_id in self._by_project.get(project_name, ())]
@@ -0,0 +1,92 @@
+"""
+Daemon Info Module
+Facts about the Docker host (architecture, OS, versions, CPUs, memory) read
+once from the daemon and kept for the life of the process, so lookups that
+need them don't hit the heavy /info endpoint every time.
+"""
+
+import threading
+
+from logger import debug, error
+
+
+class DaemonInfo:
+	"""Cached facts of the Docker daemon, refreshed on demand or after a reconnect"""
+
+	def __init__(self, client, architectures=None):
+		"""
+		Initialize DaemonInfo
+
+		Args:
+			client: Docker client
+			architectures: Optional {daemon architecture: image architecture}
+				mapping, e.g. {"x86_64": "amd64"}
+		"""
+		self.client = client
+		self.architectures = architectures or {}
+		self._facts = None
+		self._lock = threading.Lock()
+		self._refresh_lock = threading.Lock()
+
+	def refresh(self):
+		"""
+		Reads the facts from the daemon again.
+
+		Returns:
+			dict of facts, or None if the daemon could not be queried (the
+			next get() tries again)
+		"""
+		try:
+			info = self.client.info()
+			try:
+				api_version = self.client.version().get("ApiVersion")
+			except Exception as e:
+				debug(f"Could not get Docker API version: [{e}]")
+				api_version = None
+		except Exception as e:
+			error(f"Error getting Docker daemon info: [{e}]")
+			return None
+		architecture = info.get("Architecture")
+		facts = {
+			"architecture": self.architectures.get(architecture, architecture),
+			"os": info.get("OperatingSystem"),
+			"os_type": info.get("OSType"),
+			"kernel": info.get("KernelVersion"),
+			"server_version": info.get("ServerVersion"),
+			"api_version": api_version,
+			"storage_driver": info.get("Driver"),
+			"cpu_count": info.get("NCPU"),
+			"memory_total": info.get("MemTotal"),
+		}
+		with self._lock:
+			self._facts = facts
+		debug(f"Docker daemon: {facts['server_version']} (API {api_version}) on {facts['os']}, {architecture}, {facts['cpu_count']} CPUs")
+		return facts
+
+	def invalidate(self):
+		"""Forget the facts (daemon restarted or reconnected), they are read again on next use"""
+		with self._lock:
+			self._facts = None
+
+	def get(self, name=None, default=None):
+		"""
+		Returns one fact, or the whole dict when name is None.
+
+		Args:
+			name: Fact name ("architecture", "cpu_count", "memory_total"...)
+			default: Returned when the fact is unknown
+
+		Returns:
+			The fact value, the facts dict, or default
+		"""
+		facts = self._facts
+		if facts is None:
+			# Only one caller queries the daemon, the others wait for its answer
+			with self._refresh_lock:
+				facts = self._facts or self.refresh()
+			if facts is None:
+				return default
+		if name is None:
+			return dict(facts)
+		value = facts.get(name)
+		return default if value is None else value
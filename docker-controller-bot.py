@@ -1,12 +1,12 @@
 import docker
 import hashlib
+import heapq
 import html
 import io
 import json
+import math
 import os
-import pickle
 import re
-import requests
 import shlex
 import sys
 import telebot
@@ -14,6 +14,8 @@ import threading
 import time
 import uuid
 import yaml
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from config import *
 from croniter import croniter
 from datetime import datetime, timedelta
@@ -30,6 +32,14 @@ from schedule_flow import (
     init_add_schedule_state
 )
 from port_manager import PortManager
+from registry_manager import RegistryManager
+from http_client import HttpClient
+from tag_catalog import TagCatalog
+from cache_store import CacheStore
+from stats_sampler import StatsSampler
+from log_manager import LogManager, parse_log_time, LOG_FOLLOW_MAX_ACTIVE, LOG_FOLLOW_TIMEOUT
+from daemon_info import DaemonInfo
+from container_inventory import ContainerInventory, REFRESH_ACTIONS as INVENTORY_REFRESH_ACTIONS
 from logger import debug, error, warning
 from message_queue import MessageQueue
 
@@ -37,7 +47,6 @@ VERSION = "4.1.2"
 
 _unmute_timer = None
 _mute_lock = threading.Lock()  # Lock for thread-safe mute timer operations
-_cache_lock = threading.Lock()  # Lock for thread-safe cache operations
 
 def sizeof_fmt(num, suffix="B"):
 	for unit in ("", "Ki", "Mi", "Gi", "Ti", "Pi", "Ei", "Zi"):
@@ -115,6 +124,17 @@ for key in DIR:
 	except:
 		pass
 
+# Shared HTTP client (pooled keep-alive connections) for registries, Docker Hub and donors
+http_client = HttpClient(pool_size=HTTP_POOL_SIZE)
+
+# Instantiate the cache store (imports the legacy pickle files on first run)
+cache_store = CacheStore(DIR["cache"])
+try:
+	cache_store.migrate_pickle_files()
+	cache_store.purge_expired()
+except Exception as e:
+	error(f"Error preparing cache store: {e}")
+
 if not os.path.exists(SCHEDULE_PATH):
 	os.makedirs(SCHEDULE_PATH)
 
@@ -125,33 +145,64 @@ if not os.path.exists(FULL_MUTE_FILE_PATH):
 # Instantiate the bot
 bot = telebot.TeleBot(TELEGRAM_TOKEN)
 
+# Bot identity (bot.get_me() is an HTTP call, so it is fetched once and cached)
+_bot_identity = None
+_bot_identity_lock = threading.Lock()
+
+def get_bot_identity(refresh=False):
+	"""Returns the cached bot User, fetching it from Telegram the first time or when refresh=True"""
+	global _bot_identity
+	with _bot_identity_lock:
+		if _bot_identity is None or refresh:
+			_bot_identity = bot.get_me()
+		return _bot_identity
+
+def normalize_command(text):
+	"""
+	Returns the command of a message without the @botname suffix ('/logs@MyBot nginx' -> '/logs').
+	Returns None when the command is addressed to another bot.
+	"""
+	comando = text.split(' ', 1)[0]
+	if '@' not in comando:
+		return comando
+	comando, username = comando.split('@', 1)
+	if username.lower() == (get_bot_identity().username or '').lower():
+		return comando
+	# The bot may have been renamed since the identity was cached
+	if username.lower() == (get_bot_identity(refresh=True).username or '').lower():
+		return comando
+	return None
+
 # Instantiate the ScheduleManager
 schedule_manager = ScheduleManager(SCHEDULE_PATH, SCHEDULE_JSON_FILE)
 
 # Instantiate the global message queue
-message_queue = MessageQueue(delay_between_messages=0.1, max_retries=5)
+message_queue = MessageQueue(max_retries=5)
+
+# Characters of log shown by /logs (fits a Telegram message with the surrounding text)
+LOGS_MESSAGE_MAX_CHARS = 3500
 
 class DockerManager:
 	def __init__(self):
 		self.client = docker.from_env()
-		self.compose_manager = ComposeProjectManager(self.client)
+		# Kept current by DockerEventMonitor, avoids listing/inspecting every container per command
+		self.inventory = ContainerInventory(self.client, short_id_length=CONTAINER_ID_LENGTH)
+		self.compose_manager = ComposeProjectManager(self.client, inventory=self.inventory)
+		# Host facts (architecture, CPUs, memory...) read once instead of calling /info per lookup
+		self.daemon_info = DaemonInfo(self.client, docker_architectures)
 
 	def list_containers(self, comando=""):
 		comando = comando.split('@', 1)[0]
+		containers = self.inventory.list()
 		if comando == "/run":
 			status = ['paused', 'exited', 'created', 'dead']
-			filters = {'status': status}
-			containers = self.client.containers.list(filters=filters)
+			containers = [c for c in containers if c.status in status]
 		elif comando == "/stop" or comando == "/restart":
 			status = ['running', 'restarting']
-			filters = {'status': status}
-			containers = self.client.containers.list(filters=filters)
+			containers = [c for c in containers if c.status in status]
 		elif comando == "/exec":
 			status = ['running']
-			filters = {'status': status}
-			containers = self.client.containers.list(filters=filters)
-		else:
-			containers = self.client.containers.list(all=True)
+			containers = [c for c in containers if c.status in status]
 		status_order = {'running': 0, 'restarting': 1, 'paused': 2, 'exited': 3, 'created': 4, 'dead': 5}
 		sorted_containers = sorted(containers, key=lambda x: (0 if x.name == CONTAINER_NAME else 1, status_order.get(x.status, 6), x.name.lower()))
 		return sorted_containers
@@ -260,18 +311,39 @@ class DockerManager:
 	def show_logs(self, container_id, container_name):
 		try:
 			container = self.client.containers.get(container_id)
-			logs = container.logs().decode("utf-8")
-			return get_text("showing_logs", container_name, logs[-3500:])
+			logs = log_manager.read_tail(container, LOGS_MESSAGE_MAX_CHARS)
+			return get_text("showing_logs", container_name, logs)
 		except Exception as e:
 			error(f"The logs for container {container_name} could not be shown. Error: [{e}]")
 			return get_text("error_showing_logs_container", container_name)
 
-	def show_logs_raw(self, container_id, container_name):
+	def search_logs(self, container_id, container_name, regex, since=None):
 		try:
 			container = self.client.containers.get(container_id)
-			return container.logs().decode("utf-8")
+			started = time.monotonic()
+			blocks, bytes_read, budget_exceeded = log_manager.search(container, regex, since=since)
+			elapsed = time.monotonic() - started
+			if not blocks:
+				text = get_text("logsearch_no_matches", container_name, html.escape(regex.pattern))
+			else:
+				# Keep the newest blocks that fit in one message
+				formatted = []
+				length = 0
+				for block in reversed(blocks):
+					block_text = "\n".join(f'{">" if is_match else " "} {line}' for is_match, line in block)
+					if formatted and length + len(block_text) > LOGS_MESSAGE_MAX_CHARS:
+						break
+					formatted.insert(0, block_text[-LOGS_MESSAGE_MAX_CHARS:])
+					length += len(block_text) + 3
+				matches = sum(1 for block in blocks[len(blocks) - len(formatted):] for is_match, _ in block if is_match)
+				text = get_text("logsearch_results", container_name, html.escape(regex.pattern), matches, html.escape("\n--\n".join(formatted)))
+			if since:
+				text += "\n" + get_text("logsearch_since", since.strftime("%Y-%m-%d %H:%M"))
+			if budget_exceeded:
+				text += "\n" + get_text("logsearch_budget_exceeded", sizeof_fmt(bytes_read), f"{elapsed:.0f}")
+			return text
 		except Exception as e:
-			error(f"The logs for container {container_name} could not be shown. Error: [{e}]")
+			error(f"The logs for container {container_name} could not be searched. Error: [{e}]")
 			return get_text("error_showing_logs_container", container_name)
 
 	def get_docker_compose(self, container_id, container_name):
@@ -358,45 +430,51 @@ class DockerManager:
 			error(f"Could not display information for project {project_name}. Error: [{e}]")
 			return get_text("error_showing_info_project", project_name)
 
+	def get_stats_text(self, container):
+		"""CPU, RAM, network and block I/O lines of /info, from the stats sampler when it has a recent sample"""
+		max_age = STATS_SAMPLE_SECONDS * 3 if STATS_SAMPLE_SECONDS > 0 else 0
+		sample = stats_sampler.get(container.id, max_age=max_age)
+		if sample is None:
+			try:
+				# Blocks while the daemon takes two samples
+				stats_sampler.record(container.id, container.stats(stream=False))
+			except Exception as e:
+				error(f"Container {container.name} statistics not available. Error: [{e}]")
+				return ""
+			sample = stats_sampler.get(container.id)
+			if sample is None:
+				return ""
+		latest, summaries = sample
+
+		def format_range(summary, fmt):
+			if not summary or summary[0] == summary[2]:
+				return ""
+			return f"\n  {get_text('stats_last_hour', *[fmt(value) for value in summary])}"
+
+		text = ""
+		if not math.isnan(latest["cpu"]) and latest["cpu"] > 0:
+			cpu = f'{latest["cpu"]:.2f}%'
+			cpu_count = self.daemon_info.get("cpu_count")
+			if cpu_count and cpu_count > 1:
+				host_share = latest["cpu"] / cpu_count
+				cpu += f' ({get_text("stats_cpu_host", f"{host_share:.2f}", cpu_count)})'
+			text += f'- CPU: {cpu}{format_range(summaries["cpu"], lambda value: f"{value:.2f}%")}\n\n'
+		if latest["mem_used"] > 0:
+			ram = sizeof_fmt(latest["mem_used"])
+			if latest["mem_limit"] > 0:
+				ram += f' / {sizeof_fmt(latest["mem_limit"])} ({latest["mem_used"] / latest["mem_limit"] * 100:.2f}%)'
+			text += f'- RAM: {ram}{format_range(summaries["mem_used"], sizeof_fmt)}\n\n'
+		if latest["net_rx"] or latest["net_tx"]:
+			text += f'- {get_text("network")}: ↓ {sizeof_fmt(latest["net_rx"])} ↑ {sizeof_fmt(latest["net_tx"])}\n\n'
+		if latest["blk_read"] or latest["blk_write"]:
+			text += f'- {get_text("block_io")}: {sizeof_fmt(latest["blk_read"])} / {sizeof_fmt(latest["blk_write"])}\n\n'
+		return text
+
 	def get_info(self, container_id, container_name):
 		try:
 			container = self.client.containers.get(container_id)
 			if container.status == "running":
-				used_cpu = 0.0
-				ram = "N/A"
-				try:
-					stats = container.stats(stream=False)
-
-					if "cpu_stats" in stats and "precpu_stats" in stats:
-						cpu_delta = stats["cpu_stats"]["cpu_usage"].get("total_usage", 0) - stats["precpu_stats"]["cpu_usage"].get("total_usage", 0)
-						system_cpu_delta = stats["cpu_stats"]["system_cpu_usage"] - stats["precpu_stats"]["system_cpu_usage"]
-						online_cpus = stats["cpu_stats"]["online_cpus"]
-						if system_cpu_delta > 0 and cpu_delta > 0:
-							cpu_usage_percentage = (cpu_delta / system_cpu_delta) * online_cpus * 100
-							used_cpu = round(cpu_usage_percentage, 2)
-
-					if "memory_stats" in stats:
-						memory_stats = stats["memory_stats"]
-						stats = memory_stats.get("stats", {})
-						active_anon = stats.get("active_anon", 0)
-						active_file = stats.get("active_file", 0)
-						inactive_anon = stats.get("inactive_anon", 0)
-						inactive_file = stats.get("inactive_file", 0)
-						memory_used = active_anon + active_file + inactive_anon + inactive_file
-						used_ram_mb = memory_used / (1024 * 1024)
-						if "limit" in memory_stats and memory_stats["limit"] > 0:
-							limit_mb = memory_stats["limit"] / (1024 * 1024)
-							memory_usage_percentage = round((used_ram_mb / limit_mb) * 100, 2)
-							if used_ram_mb > 1024:
-								used_ram_gb = used_ram_mb / 1024
-								limit_mb_gb = limit_mb / 1024
-								ram = f"{used_ram_gb:.2f}/{limit_mb_gb:.2f} GB ({memory_usage_percentage}%)"
-							else:
-								ram = f"{used_ram_mb:.2f}/{limit_mb:.2f} MB ({memory_usage_percentage}%)"
-						else:
-							ram = f"{used_ram_mb:.2f} MB"
-				except Exception as e:
-					error(f"Container {container_name} statistics not available. Error: [{e}]")
+				stats_text = self.get_stats_text(container)
 
 			image_status = ""
 			possible_update = False
@@ -421,10 +499,7 @@ class DockerManager:
 				health_text = get_health_status_text(container)
 				if health_text:
 					text += f"- {get_text('health')}: {health_text}\n\n"
-				if 0.0 != used_cpu:
-					text += f"- CPU: {used_cpu}%\n\n"
-				if ("0.00 MB") not in ram:
-					text += f"- RAM: {ram}\n\n"
+				text += stats_text
 
 			# Port mappings
 			port_bindings = container.attrs.get('HostConfig', {}).get('PortBindings', {})
@@ -461,10 +536,13 @@ class DockerManager:
 			error(f"Could not display information for container {container_name}. Error: [{e}]")
 			return get_text("error_showing_info_container", container_name), False
 
-	def update(self, container_id, container_name, message, bot, tag=None):
+	def update(self, container_id, container_name, message, bot, tag=None, pre_pulled=False, config_overrides=None):
 		"""
 		Update a container with a new image while preserving all configuration.
 		Uses docker_update module for the actual update logic.
+
+		pre_pulled skips the pull when the image was already pulled, and
+		config_overrides is applied on top of the extracted configuration.
 		"""
 		try:
 			if CONTAINER_NAME == container_name:
@@ -490,6 +568,8 @@ class DockerManager:
 
 				# Extract all configuration from current container
 				config = extract_container_config(container, tag)
+				if config_overrides:
+					config.update(config_overrides)
 
 				# Perform the update using the extracted configuration
 				result = perform_update(
@@ -504,7 +584,8 @@ class DockerManager:
 					get_text_func=get_text,
 					save_status_func=save_container_update_status,
 					container_id_length=CONTAINER_ID_LENGTH,
-					telegram_group=TELEGRAM_GROUP
+					telegram_group=TELEGRAM_GROUP,
+					pre_pulled=pre_pulled
 				)
 				return result
 		except Exception as e:
@@ -726,68 +807,171 @@ class DockerManager:
 docker_manager = DockerManager()
 
 # Instantiate the PortManager
-port_manager = PortManager(docker_manager)
+port_manager = PortManager(docker_manager, host_proc=HOST_PROC_PATH)
+log_manager = LogManager()
+stats_sampler = StatsSampler(docker_manager.client, docker_manager.inventory, max(1, STATS_SAMPLE_SECONDS), daemon_info=docker_manager.daemon_info)
+tag_catalog = TagCatalog(http_client, cache_store, lambda: get_my_architecture())
+
+# Events streamed from the daemon: the ones notified plus the ones that change the inventory
+MONITORED_CONTAINER_EVENTS = sorted(set(INVENTORY_REFRESH_ACTIONS) | {"destroy"})
+EVENT_MONITOR_MIN_RETRY_DELAY = 1
+EVENT_MONITOR_MAX_RETRY_DELAY = 60
 
 class DockerEventMonitor:
 	def __init__(self):
 		self.client = docker.from_env()
+		# Digest of start/die/create events waiting to be notified: {container_name: [actions]}
+		self._pending_events = {}
+		self._pending_events_lock = threading.Lock()
+		self._digest_timer = None
+		# Resume point of the event stream (nanoseconds) and the events already seen at that instant
+		self._last_event_nano = time.time_ns()
+		self._last_event_keys = set()
+		self._retry_delay = EVENT_MONITOR_MIN_RETRY_DELAY
+
+	def _notify(self, message):
+		if is_muted():
+			debug(f"Message [{message}] omitted because muted")
+			return
+		try:
+			send_message_to_notification_channel(message=message)
+		except Exception as e:
+			error(f"Could not send notification [{message}]. Error: [{e}]")
+
+	def _queue_event_notification(self, container_name, action):
+		"""Collects an event for the digest, flushed NOTIFICATION_DIGEST_SECONDS after the first one"""
+		with self._pending_events_lock:
+			self._pending_events.setdefault(container_name, []).append(action)
+			if self._digest_timer is None:
+				self._digest_timer = threading.Timer(NOTIFICATION_DIGEST_SECONDS, self._flush_event_digest)
+				self._digest_timer.daemon = True
+				self._digest_timer.start()
+
+	@staticmethod
+	def _summarize_container_events(container_name, actions):
+		"""
+		Turns the actions of one container during a digest window into lines.
+		A die followed by a start is reported as a restart, and several dies
+		(crash loop) as a single line with the count.
+		"""
+		dies = actions.count("die")
+		if dies > 1:
+			lines = [get_text("created_container", container_name)] if "create" in actions else []
+			lines.append(get_text("crash_loop_container", container_name, dies))
+			return lines
+
+		collapsed = []
+		for action in actions:
+			if action == "start" and collapsed and collapsed[-1] == "die":
+				collapsed[-1] = "restart"
+			else:
+				collapsed.append(action)
+		texts = {
+			"create": "created_container",
+			"start": "started_container",
+			"die": "stopped_container",
+			"restart": "restarted_container",
+		}
+		return [get_text(texts[action], container_name) for action in collapsed]
+
+	def _flush_event_digest(self):
+		with self._pending_events_lock:
+			pending = self._pending_events
+			self._pending_events = {}
+			self._digest_timer = None
+
+		lines = []
+		for container_name, actions in pending.items():
+			lines.extend(self._summarize_container_events(container_name, actions))
+		if not lines:
+			return
+		if len(lines) == 1:
+			self._notify(lines[0])
+		else:
+			self._notify(get_text("event_digest", sum(len(actions) for actions in pending.values())) + "\n" + "\n".join(lines))
+
+	def _event_since(self):
+		"""Docker 'since' value (seconds with nanosecond fraction) to resume from"""
+		return f"{self._last_event_nano // 1_000_000_000}.{self._last_event_nano % 1_000_000_000:09d}"
+
+	def _is_new_event(self, event):
+		"""
+		Tracks the last processed event so a resumed stream (which starts at
+		the same instant) does not process an event twice.
+		"""
+		time_nano = event.get('timeNano') or int(event.get('time', 0)) * 1_000_000_000
+		event_key = (event.get('id') or event.get('Actor', {}).get('ID'), event.get('Action', '') or event.get('status', ''))
+		if time_nano < self._last_event_nano:
+			return False
+		if time_nano == self._last_event_nano:
+			if event_key in self._last_event_keys:
+				return False
+			self._last_event_keys.add(event_key)
+		else:
+			self._last_event_nano = time_nano
+			self._last_event_keys = {event_key}
+		return True
 
 	def detectar_eventos_contenedores(self):
-		for event in self.client.events(decode=True):
+		# Only container events the bot reacts to are streamed from the daemon
+		events = self.client.events(
+			decode=True,
+			since=self._event_since(),
+			filters={'type': 'container', 'event': MONITORED_CONTAINER_EVENTS}
+		)
+		# Seed once subscribed so no change between the listing and the first event is lost
+		docker_manager.inventory.seed()
+		self._retry_delay = EVENT_MONITOR_MIN_RETRY_DELAY
+		for event in events:
 			# Only process container events
 			event_type = event.get('Type', '')
 			if event_type != 'container':
 				continue
 
+			if not self._is_new_event(event):
+				continue
+
+			docker_manager.inventory.handle_event(event)
+
 			# Support both 'Action' (Docker Desktop/newer) and 'status' (Docker Engine/older) formats
 			action = event.get('Action', '') or event.get('status', '')
 			actor = event.get('Actor', {})
 			attributes = actor.get('Attributes', {})
 			container_name = attributes.get('name', '')
 
-			message = None
-			if action == "start":
-				message = get_text("started_container", container_name)
-			elif action == "die":
-				message = get_text("stopped_container", container_name)
-			elif action == "create" and EXTENDED_MESSAGES:
-				message = get_text("created_container", container_name)
-
-			if message:
-				try:
-					if is_muted():
-						debug(f"Message [{message}] omitted because muted")
-						continue
+			if action not in ("start", "die") and not (action == "create" and EXTENDED_MESSAGES):
+				continue
 
-					send_message_to_notification_channel(message=message)
-				except Exception as e:
-					error(f"Could not send notification [{message}]. Error: [{e}]")
-					time.sleep(20) # Possible Telegram saturation causing send_message to raise an exception
+			if NOTIFICATION_DIGEST_SECONDS > 0:
+				self._queue_event_notification(container_name, action)
+			else:
+				self._notify(self._summarize_container_events(container_name, [action])[0])
 
 	def _event_loop_with_retry(self):
-		"""Event loop wrapper with automatic retry on failure."""
-		max_retries = 5
-		retry_count = 0
-
-		while retry_count < max_retries:
+		"""
+		Event loop wrapper with automatic retry on failure.
+		Retries forever with capped exponential backoff, resuming the stream
+		from the last processed event so nothing that happened while
+		disconnected is lost.
+		"""
+		while True:
 			try:
-				debug("Event monitor: Starting event listener...")
+				debug(f"Event monitor: Starting event listener (since {self._event_since()})...")
 				self.detectar_eventos_contenedores()
 				# If we get here, the event stream ended normally (shouldn't happen)
 				debug("Event monitor: Event stream ended unexpectedly, restarting...")
-				retry_count += 1
 			except Exception as e:
-				retry_count += 1
-				if retry_count >= max_retries:
-					error(f"Event monitor failed {max_retries} times. Stopping. Last error: [{e}]")
-					return
-				error(f"Event monitor error (attempt {retry_count}/{max_retries}). Retrying in 5 seconds... Error: [{e}]")
-				time.sleep(5)
-				# Reconnect to Docker
-				try:
-					self.client = docker.from_env()
-				except Exception as reconnect_error:
-					error(f"Event monitor: Failed to reconnect to Docker: {reconnect_error}")
+				error(f"Event monitor error. Retrying in {self._retry_delay} seconds... Error: [{e}]")
+			docker_manager.inventory.invalidate()
+			time.sleep(self._retry_delay)
+			self._retry_delay = min(self._retry_delay * 2, EVENT_MONITOR_MAX_RETRY_DELAY)
+			# Reconnect to Docker
+			try:
+				self.client = docker.from_env()
+			except Exception as reconnect_error:
+				error(f"Event monitor: Failed to reconnect to Docker: {reconnect_error}")
+			# The daemon may have been restarted or upgraded meanwhile
+			docker_manager.daemon_info.invalidate()
 
 	def demonio_event(self):
 		"""Start event daemon in a background thread."""
@@ -796,34 +980,234 @@ class DockerEventMonitor:
 		debug("Event monitor daemon started")
 
 
+class DockerResourceAlertMonitor:
+	"""
+	Notifies when a container stays above its CPU or memory threshold.
+
+	Evaluated on every sample of the stats sampler. An alert fires once the
+	value has been at or above the threshold for ALERT_SUSTAINED_SECONDS and
+	is cleared once it has stayed ALERT_HYSTERESIS_PERCENT points below it
+	for the same time, so a value hovering around the threshold does not flap.
+	"""
+
+	# Seconds between purges of the state of removed containers
+	PURGE_INTERVAL = 600
+
+	def __init__(self):
+		self._states = {}  # (container id, metric) -> {"above_since", "below_since", "alerting"}
+		self._states_lock = threading.Lock()
+		self._last_purge = time.time()
+
+	def demonio_alert(self):
+		stats_sampler.add_listener(self._on_sample)
+		debug("Resource alerts enabled")
+
+	@staticmethod
+	def _threshold(container, label, default):
+		value = (container.labels or {}).get(label)
+		if value is None:
+			return default
+		try:
+			return float(value)
+		except ValueError:
+			warning(f"Invalid value [{value}] for label {label} in container {container.name}")
+			return default
+
+	def _on_sample(self, container, sample, timestamp):
+		metrics = {
+			"cpu": (sample["cpu"], self._threshold(container, LABEL_ALERT_CPU, ALERT_CPU_PERCENT)),
+			"mem": (
+				sample["mem_used"] / sample["mem_limit"] * 100 if sample["mem_limit"] > 0 else math.nan,
+				self._threshold(container, LABEL_ALERT_MEM, ALERT_MEM_PERCENT)
+			),
+		}
+		with self._states_lock:
+			messages = self._evaluate(container, metrics, timestamp)
+			if timestamp - self._last_purge >= self.PURGE_INTERVAL:
+				self._last_purge = timestamp
+				sampled_ids = stats_sampler.sampled_ids()
+				for key in [key for key in self._states if key[0] not in sampled_ids]:
+					del self._states[key]
+		for message in messages:
+			self._notify(message)
+
+	def _evaluate(self, container, metrics, timestamp):
+		"""Updates the alert states of a container. Returns the notifications to send."""
+		messages = []
+		for metric, (value, threshold) in metrics.items():
+			key = (container.id, metric)
+			if threshold <= 0 or math.isnan(value):
+				if threshold <= 0:
+					self._states.pop(key, None)
+				continue
+			state = self._states.setdefault(key, {"above_since": None, "below_since": None, "alerting": False})
+			if value >= threshold:
+				state["below_since"] = None
+				if state["above_since"] is None:
+					state["above_since"] = timestamp
+				if not state["alerting"] and timestamp - state["above_since"] >= ALERT_SUSTAINED_SECONDS:
+					state["alerting"] = True
+					messages.append(get_text(f"alert_{metric}_high", container.name, f"{value:.1f}", f"{threshold:g}", f"{ALERT_SUSTAINED_SECONDS / 60:g}"))
+			elif value < threshold - ALERT_HYSTERESIS_PERCENT:
+				state["above_since"] = None
+				if not state["alerting"]:
+					continue
+				if state["below_since"] is None:
+					state["below_since"] = timestamp
+				if timestamp - state["below_since"] >= ALERT_SUSTAINED_SECONDS:
+					state["alerting"] = False
+					state["below_since"] = None
+					messages.append(get_text(f"alert_{metric}_recovered", container.name, f"{value:.1f}"))
+			else:
+				# Inside the hysteresis band: neither sustained above nor recovered
+				state["above_since"] = None
+				state["below_since"] = None
+		return messages
+
+	def _notify(self, message):
+		if is_muted():
+			debug(f"Message [{message}] omitted because muted")
+			return
+		try:
+			send_message_to_notification_channel(message=message)
+		except Exception as e:
+			error(f"Could not send notification [{message}]. Error: [{e}]")
+
+
 class DockerUpdateMonitor:
 	def __init__(self):
 		self.client = docker.from_env()
+		self.registry_manager = RegistryManager(http=http_client)
+
+	def _check_image_update(self, image_with_tag, local_image):
+		"""
+		Checks whether an image reference has a newer version than local_image.
+
+		With CHECK_UPDATE_DIGEST_ONLY the registry is only asked for the
+		manifest digest, which is compared against the local RepoDigests.
+		The image is pulled only when that comparison is not possible
+		(locally built image, unsupported registry, network error...).
+
+		Returns:
+			tuple: (has_update, pulled_image_id). pulled_image_id is None
+			unless the image had to be pulled to compare.
+		"""
+		if CHECK_UPDATE_DIGEST_ONLY:
+			has_update, remote_digest = self.registry_manager.check_update(local_image, image_with_tag)
+			if has_update is not None:
+				debug(f"Checking update: {image_with_tag}: LOCAL IMAGE [{local_image.id.replace('sha256:', '')[:CONTAINER_ID_LENGTH]}] - REMOTE DIGEST [{remote_digest.replace('sha256:', '')[:CONTAINER_ID_LENGTH]}]")
+				return has_update, None
+			debug(f"Digest check not available for {image_with_tag}, pulling image to compare")
+
+		remote_image = self.client.images.pull(image_with_tag)
+		debug(f"Checking update: {image_with_tag}: LOCAL IMAGE [{local_image.id.replace('sha256:', '')[:CONTAINER_ID_LENGTH]}] - REMOTE IMAGE [{remote_image.id.replace('sha256:', '')[:CONTAINER_ID_LENGTH]}]")
+		return local_image.id != remote_image.id, remote_image.id
+
+	def _check_images(self, images):
+		"""
+		Checks a set of unique images concurrently.
+
+		At most CHECK_UPDATE_WORKERS checks run at once, and no more than
+		CHECK_UPDATE_REGISTRY_CONCURRENCY of them against the same registry,
+		so a slow or rate-limited registry does not hold the rest back. The
+		images wait in one queue per registry and are only handed to a
+		worker when their registry has a free slot, so no worker sits idle
+		waiting for a busy registry.
+
+		Args:
+			images: dict {(image_with_tag, local_image_id): local_image}
+
+		Returns:
+			dict {(image_with_tag, local_image_id): (has_update, pulled_image_id) or Exception}
+		"""
+		registry_queues = {}
+		for key in images:
+			try:
+				registry = RegistryManager.parse_image_reference(key[0])[0]
+			except Exception:
+				registry = key[0]
+			registry_queues.setdefault(registry, deque()).append(key)
+
+		def check(key):
+			try:
+				return self._check_image_update(key[0], images[key])
+			except Exception as e:
+				return e
+
+		max_workers = max(1, CHECK_UPDATE_WORKERS)
+		per_registry = max(1, CHECK_UPDATE_REGISTRY_CONCURRENCY)
+		running = {registry: 0 for registry in registry_queues}
+		futures = {}
+		results = {}
+		with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="update-check") as executor:
+			def submit_ready():
+				# Round-robin over the registries with a free slot while workers are free
+				submitted = True
+				while submitted and len(futures) < max_workers:
+					submitted = False
+					for registry, pending in registry_queues.items():
+						if pending and running[registry] < per_registry and len(futures) < max_workers:
+							key = pending.popleft()
+							futures[executor.submit(check, key)] = (key, registry)
+							running[registry] += 1
+							submitted = True
+
+			submit_ready()
+			while futures:
+				done, _ = wait(futures, return_when=FIRST_COMPLETED)
+				for future in done:
+					key, registry = futures.pop(future)
+					running[registry] -= 1
+					results[key] = future.result()
+				submit_ready()
+		return results
 
 	def detectar_actualizaciones(self):
 		while True:
-			containers = self.client.containers.list(all=True)
+			containers = docker_manager.inventory.list()
 			# Sort containers: bot first, then running, then stopped (all alphabetically)
 			sorted_containers = sort_containers_by_priority(containers)
 			grouped_updates_containers = []  # list of [id, name] pairs
 			should_notify = False
+
+			# Group containers by image so every unique image is checked only once
+			containers_to_check = []
+			images_to_check = {}
 			for container in sorted_containers:
 				if (container.status == "exited" or container.status == "dead") and not CHECK_UPDATE_STOPPED_CONTAINERS:
 					debug(f"Ignoring update check for container {container.name} (stopped)")
 					continue
 
-				labels = container.labels
-				if LABEL_IGNORE_CHECK_UPDATES in labels:
+				if LABEL_IGNORE_CHECK_UPDATES in container.labels:
 					debug(f"Ignoring update check for container {container.name} (label)")
 					continue
 
-				container_attrs = container.attrs['Config']
-				image_with_tag = container_attrs['Image']
+				image_with_tag = container.attrs['Config']['Image']
+				local_image_id = container.attrs['Image']
+				key = (image_with_tag, local_image_id)
+				if key not in images_to_check:
+					try:
+						images_to_check[key] = container.image
+					except Exception as e:
+						images_to_check[key] = None
+						error(f"Could not get image of {container.name}: [{e}]")
+				containers_to_check.append((container, key))
+
+			debug(f"Checking {len(images_to_check)} images for {len(containers_to_check)} containers")
+			results = self._check_images({key: image for key, image in images_to_check.items() if image is not None})
+			images_to_remove = {}  # pulled_image_id -> still removable
+
+			for container, key in containers_to_check:
+				labels = container.labels
+				image_with_tag = key[0]
 				try:
-					local_image = container.image.id
-					remote_image = self.client.images.pull(image_with_tag)
-					debug(f"Checking update: {container.name} ({image_with_tag}): LOCAL IMAGE [{local_image.replace('sha256:', '')[:CONTAINER_ID_LENGTH]}] - REMOTE IMAGE [{remote_image.id.replace('sha256:', '')[:CONTAINER_ID_LENGTH]}]")
-					if local_image != remote_image.id:
+					result = results.get(key)
+					if result is None:
+						raise Exception(f"image {image_with_tag} not available")
+					if isinstance(result, Exception):
+						raise result
+					has_update, pulled_image_id = result
+					if has_update:
 						if LABEL_AUTO_UPDATE in labels:
 							if EXTENDED_MESSAGES and not is_muted():
 								send_message_to_notification_channel(message=get_text("auto_update", container.name))
@@ -837,15 +1221,16 @@ class DockerUpdateMonitor:
 							else:
 								def _auto_update_send_fn(msg):
 									return send_message_to_notification_channel(message=msg)
+							if pulled_image_id:
+								# The auto-update uses the downloaded image, keep it
+								images_to_remove[pulled_image_id] = False
 							perform_container_update(container.id, container.name, send_fn=_auto_update_send_fn)
 							continue
 						old_image_status = read_container_update_status(image_with_tag, container.name)
 						image_status = get_text("NEED_UPDATE_CONTAINER_TEXT")
-						debug(f"{container.name} update detected! Deleting downloaded image [{remote_image.id.replace('sha256:', '')[:CONTAINER_ID_LENGTH]}]")
-						try:
-							self.client.images.remove(remote_image.id)
-						except:
-							pass # If it can't be removed it's because another container is using it
+						debug(f"{container.name} update detected!")
+						if pulled_image_id:
+							images_to_remove.setdefault(pulled_image_id, True)
 
 						if container.name != CONTAINER_NAME:
 							grouped_updates_containers.append([container.id[:CONTAINER_ID_LENGTH], container.name])
@@ -879,6 +1264,15 @@ class DockerUpdateMonitor:
 					image_status = ""
 				save_container_update_status(image_with_tag, container.name, image_status)
 
+			for pulled_image_id, removable in images_to_remove.items():
+				if not removable:
+					continue
+				debug(f"Deleting downloaded image [{pulled_image_id.replace('sha256:', '')[:CONTAINER_ID_LENGTH]}]")
+				try:
+					self.client.images.remove(pulled_image_id)
+				except:
+					pass # If it can't be removed it's because another container is using it
+
 			if grouped_updates_containers and should_notify:
 				markup = InlineKeyboardMarkup(row_width = BUTTON_COLUMNS)
 				markup.add(*[
@@ -929,11 +1323,20 @@ class DockerUpdateMonitor:
 				error(f"Update daemon error (attempt {retry_count}/{max_retries}). Retrying in 5 seconds... Error: [{e}]")
 				time.sleep(5)
 
+SCHEDULE_MAX_SLEEP_SECONDS = 60
+
 class DockerScheduleMonitor:
 	def __init__(self):
 		super().__init__()
 		self.schedule_manager = schedule_manager  # Use the global instance
-		self.last_run = {}  # Track last execution time for each schedule
+		# Next fire time of every enabled cron schedule: {name: (cron_expr, next_fire)}
+		self._next_fire = {}
+		# Min-heap of (next_fire_timestamp, name, cron_expr); entries that no longer
+		# match self._next_fire are stale and skipped
+		self._heap = []
+		self._schedules_changed = threading.Event()
+		self._schedules_changed.set()  # Build the heap on the first loop
+		self.schedule_manager.add_change_listener(self._schedules_changed.set)
 		self._reboot_tasks_executed = set()  # Track which @reboot tasks have been executed
 		self._execute_reboot_tasks()  # Execute @reboot tasks on startup
 
@@ -1061,67 +1464,92 @@ class DockerScheduleMonitor:
 			error(f"Error executing schedule action [{action}]: [{str(e)}]")
 			return False
 
+	def _compute_next_fire(self, cron_expr, base):
+		return croniter(cron_expr, base).get_next(datetime)
+
+	def _push(self, name, cron_expr, next_fire):
+		self._next_fire[name] = (cron_expr, next_fire)
+		heapq.heappush(self._heap, (next_fire.timestamp(), name, cron_expr))
+
+	def _sync_schedules(self, now):
+		"""
+		Reconciles the heap with the stored schedules. Schedules whose cron
+		expression did not change keep their pending fire time, new or edited
+		ones get a fresh one, and disabled or deleted ones are dropped.
+		"""
+		next_fire = {}
+		for schedule in self.schedule_manager.get_enabled_schedules():
+			name = schedule.get("name")
+			cron_expr = schedule.get("cron")
+			if not cron_expr or cron_expr == "@reboot":
+				continue
+			current = self._next_fire.get(name)
+			if current and current[0] == cron_expr:
+				next_fire[name] = current
+				continue
+			try:
+				# Starting one second before the current minute keeps a schedule due
+				# in the minute it is created (or the bot starts) as before
+				base = now.replace(second=0, microsecond=0) - timedelta(seconds=1)
+				next_fire[name] = (cron_expr, self._compute_next_fire(cron_expr, base))
+			except Exception as e:
+				debug(f"Error checking cron schedule '{name}' with expression '{cron_expr}': {e}")
+		self._next_fire = next_fire
+		# Rebuild instead of pushing so stale entries never accumulate
+		self._heap = [(fire.timestamp(), name, cron_expr) for name, (cron_expr, fire) in next_fire.items()]
+		heapq.heapify(self._heap)
+
+	def _run_due_schedules(self, now):
+		"""Executes every schedule whose fire time has passed and schedules its next fire"""
+		while self._heap and self._heap[0][0] <= now.timestamp():
+			fire_ts, name, cron_expr = heapq.heappop(self._heap)
+			current = self._next_fire.get(name)
+			if not current or current[0] != cron_expr or current[1].timestamp() != fire_ts:
+				continue  # Stale entry
+			fire_time = current[1]
+
+			# Count fires that were skipped (suspend, clock jump, long action...)
+			cron = croniter(cron_expr, fire_time)
+			missed = 0
+			following = cron.get_next(datetime)
+			while following <= now and missed < 1000:
+				missed += 1
+				following = cron.get_next(datetime)
+			if missed:
+				warning(f"Schedule '{name}' missed {missed} executions since {fire_time.strftime('%Y-%m-%d %H:%M')}, running it once")
+
+			schedule = self.schedule_manager.get_schedule(name)
+			if schedule and schedule.get("enabled", True):
+				self._execute_schedule_action(schedule)
+			self._push(name, cron_expr, following)
+
 	def run(self):
-		"""Main loop: check and execute scheduled tasks every minute"""
+		"""Main loop: sleeps until the earliest schedule is due and executes it"""
+		wall_offset = time.time() - time.monotonic()
 		while True:
 			try:
-				schedules = self.schedule_manager.get_all_schedules()
 				now = datetime.now()
-
-				for schedule in schedules:
-					# Skip disabled schedules
-					if not schedule.get("enabled", True):
-						continue
-
-					cron_expr = schedule.get("cron")
-					schedule_name = schedule.get("name")
-
-					# Skip @reboot tasks in the main loop (they're executed at startup)
-					if cron_expr == "@reboot":
-						continue
-
-					# Check if this task should run now
-					if self.should_run(schedule_name, cron_expr, now):
-						self._execute_schedule_action(schedule)
+				new_wall_offset = time.time() - time.monotonic()
+				if new_wall_offset < wall_offset - 60:
+					# Clock moved backwards: the pending fire times are too far ahead
+					debug("Schedule monitor: clock moved backwards, recomputing schedules")
+					self._next_fire = {}
+					self._schedules_changed.set()
+				wall_offset = new_wall_offset
+
+				if self._schedules_changed.is_set():
+					self._schedules_changed.clear()
+					self._sync_schedules(now)
+				self._run_due_schedules(now)
 			except Exception as e:
 				error(f"Error reading schedule file: [{e}]")
-			time.sleep(60)
-
-	def should_run(self, schedule_name, cron_expr, now):
-		"""
-		Check if a cron expression should run at the given time.
-		Uses a tracking system to ensure tasks only run once per scheduled time.
-
-		Note: @reboot tasks are handled separately in _execute_reboot_tasks()
-		and should not reach this method.
-		"""
-		try:
-			# Create a croniter object starting from one minute ago
-			# This helps us detect if we should run in the current minute
-			one_minute_ago = now - timedelta(minutes=1)
-			cron = croniter(cron_expr, one_minute_ago)
-
-			# Get the next execution time after one minute ago
-			next_execution = cron.get_next(datetime)
-
-			# Check if the next execution is within the current minute
-			# (i.e., it should run now)
-			should_run = (next_execution.year == now.year and
-						 next_execution.month == now.month and
-						 next_execution.day == now.day and
-						 next_execution.hour == now.hour and
-						 next_execution.minute == now.minute)
-
-			# Track execution to avoid running multiple times in the same minute
-			task_key = f"{schedule_name}_{now.strftime('%Y-%m-%d %H:%M')}"
-			if should_run and task_key not in self.last_run:
-				self.last_run[task_key] = True
-				return True
 
-			return False
-		except Exception as e:
-			debug(f"Error checking cron schedule '{schedule_name}' with expression '{cron_expr}': {e}")
-			return False
+			# Wake up at the next deadline, when schedules change, or at least every
+			# minute to notice clock jumps and suspends (monotonic waits don't see them)
+			timeout = SCHEDULE_MAX_SLEEP_SECONDS
+			if self._heap:
+				timeout = min(timeout, max(0, self._heap[0][0] - time.time()))
+			self._schedules_changed.wait(timeout)
 
 	def demonio_schedule(self):
 		"""Start schedule daemon with limited retries to prevent infinite restart loops."""
@@ -1760,345 +2188,453 @@ def handle_schedule_flow(user_id: int, user_input: str, state: dict, chat_id: in
 		# For exec action, go to confirmation
 		confirm_schedule_creation(user_id, state)
 
-@bot.message_handler(commands=["start", "list", "run", "stop", "restart", "delete", "exec", "checkupdate", "updateall", "changetag", "logs", "logfile", "compose", "mute", "schedule", "info", "version", "donate", "donors", "prune", "ports"])
-def command_controller(message):
-	userId = message.from_user.id
-	comando = message.text.split(' ', 1)[0]
-	messageId = message.id
-	container_id = None
-	if not comando in ('/mute', f'/mute@{bot.get_me().username}'
-					,'/schedule', f'/schedule@{bot.get_me().username}'):
-		container_name = " ".join(message.text.split()[1:])
-		if container_name:
-			container_id = get_container_id_by_name(container_name, debugging=True)
+def _command_start(message, container_id, container_name):
+	texto_inicial = get_text("menu")
+	send_message(message=texto_inicial)
 
-	message_thread_id = message.message_thread_id
-	if not message_thread_id:
-		message_thread_id = 1
-	debug(f"COMMAND: {comando} | USER: {userId} | CHAT: {message.chat.id} | THREAD: {message_thread_id}")
+def _command_list(message, container_id, container_name):
+	containers = docker_manager.list_containers()
+	send_message(message=display_containers(containers), reply_markup=create_simple_keyboard("button_close"))
 
-	if message_thread_id != TELEGRAM_THREAD and (not message.reply_to_message or message.reply_to_message.from_user.id != bot.get_me().id):
-		return
+def _command_run(message, container_id, container_name):
+	if container_id:
+		run(container_id, container_name)
+	else:
+		# Get ALL containers to show projects with all containers, but filter standalone to only stopped
+		containers = docker_manager.list_containers()
+		if not containers or all(c.name == CONTAINER_NAME for c in containers):
+			send_message(message=get_text("no_containers_to_start"))
+			return
 
-	if not is_admin(userId):
-		warning(f"User {userId} ({message.from_user.username}) tried to use admin command without permission")
-		send_message(chat_id=userId, message=get_text("user_not_admin"))
-		return
+		# Use hierarchical keyboard with filters:
+		# - Standalone: only stopped/paused/exited/created
+		# - Projects: hide if ALL containers are running/restarting
+		markup, standalone_containers = build_hierarchical_keyboard(
+			containers, "Run", CONTAINER_NAME,
+			filter_standalone_status=['exited', 'stopped', 'paused', 'created'],
+			filter_projects_with_all_status=['running', 'restarting']
+		)
+		sent_message = send_message(message=get_text("start_a_container"), reply_markup=markup)
+		# Save container cache for standalone containers
+		if sent_message and standalone_containers:
+			save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
 
-	if comando not in ('/start', f'/start@{bot.get_me().username}'):
-		delete_message(messageId)
+def _command_stop(message, container_id, container_name):
+	if container_id:
+		stop(container_id, container_name)
+	else:
+		# Get ALL containers to show projects with all containers, but filter standalone to only running
+		containers = docker_manager.list_containers()
+		if not containers or all(c.name == CONTAINER_NAME for c in containers):
+			send_message(message=get_text("no_containers_to_stop"))
+			return
 
-	# List containers
-	if comando in ('/start', f'/start@{bot.get_me().username}'):
-		texto_inicial = get_text("menu")
-		send_message(message=texto_inicial)
-	elif comando in ('/list', f'/list@{bot.get_me().username}'):
-		containers = docker_manager.list_containers(comando=comando)
-		send_message(message=display_containers(containers), reply_markup=create_simple_keyboard("button_close"))
-	elif comando in ('/run', f'/run@{bot.get_me().username}'):
-		if container_id:
-			run(container_id, container_name)
-		else:
-			# Get ALL containers to show projects with all containers, but filter standalone to only stopped
-			containers = docker_manager.list_containers()
-			if not containers or all(c.name == CONTAINER_NAME for c in containers):
-				send_message(message=get_text("no_containers_to_start"))
-				return
+		# Use hierarchical keyboard with filters:
+		# - Standalone: only running/restarting
+		# - Projects: hide if ALL containers are stopped/paused/exited/created
+		markup, standalone_containers = build_hierarchical_keyboard(
+			containers, "Stop", CONTAINER_NAME,
+			filter_standalone_status=['running', 'restarting'],
+			filter_projects_with_all_status=['exited', 'stopped', 'paused', 'created']
+		)
+		sent_message = send_message(message=get_text("stop_a_container"), reply_markup=markup)
+		# Save container cache for standalone containers
+		if sent_message and standalone_containers:
+			save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
 
-			# Use hierarchical keyboard with filters:
-			# - Standalone: only stopped/paused/exited/created
-			# - Projects: hide if ALL containers are running/restarting
-			markup, standalone_containers = build_hierarchical_keyboard(
-				containers, "Run", CONTAINER_NAME,
-				filter_standalone_status=['exited', 'stopped', 'paused', 'created'],
-				filter_projects_with_all_status=['running', 'restarting']
-			)
-			sent_message = send_message(message=get_text("start_a_container"), reply_markup=markup)
-			# Save container cache for standalone containers
-			if sent_message and standalone_containers:
-				save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
-	elif comando in ('/stop', f'/stop@{bot.get_me().username}'):
-		if container_id:
-			stop(container_id, container_name)
-		else:
-			# Get ALL containers to show projects with all containers, but filter standalone to only running
-			containers = docker_manager.list_containers()
-			if not containers or all(c.name == CONTAINER_NAME for c in containers):
-				send_message(message=get_text("no_containers_to_stop"))
-				return
+def _command_restart(message, container_id, container_name):
+	if container_id:
+		restart(container_id, container_name)
+	else:
+		# Get ALL containers (not just running) to show with status indicators
+		containers = docker_manager.list_containers()
+		if not containers or all(c.name == CONTAINER_NAME for c in containers):
+			send_message(message=get_text("no_containers_to_restart"))
+			return
 
-			# Use hierarchical keyboard with filters:
-			# - Standalone: only running/restarting
-			# - Projects: hide if ALL containers are stopped/paused/exited/created
-			markup, standalone_containers = build_hierarchical_keyboard(
-				containers, "Stop", CONTAINER_NAME,
-				filter_standalone_status=['running', 'restarting'],
-				filter_projects_with_all_status=['exited', 'stopped', 'paused', 'created']
-			)
-			sent_message = send_message(message=get_text("stop_a_container"), reply_markup=markup)
-			# Save container cache for standalone containers
-			if sent_message and standalone_containers:
-				save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
-	elif comando in ('/restart', f'/restart@{bot.get_me().username}'):
-		if container_id:
-			restart(container_id, container_name)
-		else:
-			# Get ALL containers (not just running) to show with status indicators
-			containers = docker_manager.list_containers()
-			if not containers or all(c.name == CONTAINER_NAME for c in containers):
-				send_message(message=get_text("no_containers_to_restart"))
-				return
+		# Use hierarchical keyboard (Level 1: projects + standalone containers)
+		markup, standalone_containers = build_hierarchical_keyboard(containers, "Restart", CONTAINER_NAME)
+		sent_message = send_message(message=get_text("restart_a_container"), reply_markup=markup)
+		# Save container cache for standalone containers
+		if sent_message and standalone_containers:
+			save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
 
-			# Use hierarchical keyboard (Level 1: projects + standalone containers)
-			markup, standalone_containers = build_hierarchical_keyboard(containers, "Restart", CONTAINER_NAME)
-			sent_message = send_message(message=get_text("restart_a_container"), reply_markup=markup)
-			# Save container cache for standalone containers
-			if sent_message and standalone_containers:
-				save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
-	elif comando in ('/logs', f'/logs@{bot.get_me().username}'):
-		if container_id:
-			logs(container_id, container_name)
-		else:
-			# Get ALL containers to show projects and standalone
-			containers = docker_manager.list_containers()
-			if not containers:
-				send_message(message=get_text("no_containers_for_logs"))
-				return
+def _command_logs(message, container_id, container_name):
+	if container_id:
+		logs(container_id, container_name)
+	else:
+		# Get ALL containers to show projects and standalone
+		containers = docker_manager.list_containers()
+		if not containers:
+			send_message(message=get_text("no_containers_for_logs"))
+			return
 
-			# Use hierarchical keyboard (Level 1: projects + standalone containers)
-			# No project-level action for logs (can't get logs from whole project)
-			# Filter: show all containers (you can see logs from any container)
-			# Don't exclude bot container for logs (we want to see bot logs too)
-			markup, standalone_containers = build_hierarchical_keyboard(
-				containers,
-				"Logs",
-				None  # Don't exclude any container
-			)
-			sent_message = send_message(message=get_text("logs_command_container"), reply_markup=markup)
-			# Save container cache for standalone containers
-			if sent_message and standalone_containers:
-				save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
-	elif comando in ('/logfile', f'/logfile@{bot.get_me().username}'):
+		# Use hierarchical keyboard (Level 1: projects + standalone containers)
+		# No project-level action for logs (can't get logs from whole project)
+		# Filter: show all containers (you can see logs from any container)
+		# Don't exclude bot container for logs (we want to see bot logs too)
+		markup, standalone_containers = build_hierarchical_keyboard(
+			containers,
+			"Logs",
+			None  # Don't exclude any container
+		)
+		sent_message = send_message(message=get_text("logs_command_container"), reply_markup=markup)
+		# Save container cache for standalone containers
+		if sent_message and standalone_containers:
+			save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
+
+def _command_logfile(message, container_id, container_name):
+	# /logfile <container> [since] [until]
+	args = container_name.split() if container_name else []
+	if not container_id and len(args) > 1:
+		container_name = args[0]
+		container_id = get_container_id_by_name(container_name, debugging=True)
 		if container_id:
-			log_file(container_id, container_name)
-		else:
-			# Get ALL containers to show projects and standalone
-			containers = docker_manager.list_containers()
-			if not containers:
-				send_message(message=get_text("no_containers_for_logs"))
+			if len(args) > 3:
+				send_message(message=get_text("error_logfile_range"))
 				return
-
-			# Use hierarchical keyboard (Level 1: projects + standalone containers)
-			# No project-level action for logfile (can't get logfile from whole project)
-			# Filter: show all containers (you can get logfile from any container)
-			# Don't exclude bot container for logfile (we want to see bot logfile too)
-			markup, standalone_containers = build_hierarchical_keyboard(
-				containers,
-				"Logfile",
-				None  # Don't exclude any container
-			)
-			sent_message = send_message(message=get_text("show_logsfile"), reply_markup=markup)
-			# Save container cache for standalone containers
-			if sent_message and standalone_containers:
-				save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
-	elif comando in ('/compose', f'/compose@{bot.get_me().username}'):
-		if container_id:
-			compose(container_id, container_name)
-		else:
-			# Get ALL containers to show projects and standalone
-			containers = docker_manager.list_containers()
-			if not containers:
-				send_message(message=get_text("error_no_containers_available"))
+			since = parse_log_time(args[1])
+			until = parse_log_time(args[2]) if len(args) > 2 else None
+			if not since or (len(args) > 2 and not until):
+				send_message(message=get_text("error_logfile_range"))
 				return
+			export_log_file(container_id, container_name, since=since, until=until)
+			return
 
-			# Use hierarchical keyboard (Level 1: projects + standalone containers)
-			# No project-level action for compose (can't get compose file from whole project)
-			# Filter: show all containers (you can get compose file from any container)
-			# Don't exclude bot container for compose (we want to see bot compose too)
-			markup, standalone_containers = build_hierarchical_keyboard(
-				containers,
-				"Compose",
-				None  # Don't exclude any container
-			)
-			sent_message = send_message(message=get_text("show_compose"), reply_markup=markup)
-			# Save container cache for standalone containers
-			if sent_message and standalone_containers:
-				save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
-	elif comando in ('/mute', f'/mute@{bot.get_me().username}'):
-		try:
-			minutes = int(message.text.split()[1])
-		except (IndexError, ValueError):
-			send_message(message=get_text("error_use_mute_command"))
+	if container_id:
+		log_file(container_id, container_name)
+	else:
+		# Get ALL containers to show projects and standalone
+		containers = docker_manager.list_containers()
+		if not containers:
+			send_message(message=get_text("no_containers_for_logs"))
 			return
-		mute(minutes)
-	elif comando in ('/schedule', f'/schedule@{bot.get_me().username}'):
-		show_schedule_menu(userId, message.chat.id)
-	elif comando in ('/info', f'/info@{bot.get_me().username}'):
-		if container_id:
-			info(container_id, container_name)
-		else:
-			# Get ALL containers to show projects and standalone
-			containers = docker_manager.list_containers()
-			if not containers:
-				send_message(message=get_text("no_containers_for_info"))
-				return
 
-			# Use hierarchical keyboard (Level 1: projects + standalone containers)
-			# No project-level action for info (can't get info from whole project)
-			# Filter: show all containers (you can see info from any container)
-			# Don't exclude bot container (we want to see bot info too)
-			markup, standalone_containers = build_hierarchical_keyboard(
-				containers,
-				"Info",
-				None  # Don't exclude any container
-			)
-			sent_message = send_message(message=get_text("info_command_container"), reply_markup=markup)
-			# Save container cache for standalone containers
-			if sent_message and standalone_containers:
-				save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
-	elif comando in ('/exec', f'/exec@{bot.get_me().username}'):
-		if container_id:
-			ask_command(userId, container_id, container_name)
-		else:
-			# Get ALL containers to show projects and standalone
-			containers = docker_manager.list_containers()
-			if not containers:
-				send_message(message=get_text("no_containers_for_exec"))
-				return
+		# Use hierarchical keyboard (Level 1: projects + standalone containers)
+		# No project-level action for logfile (can't get logfile from whole project)
+		# Filter: show all containers (you can get logfile from any container)
+		# Don't exclude bot container for logfile (we want to see bot logfile too)
+		markup, standalone_containers = build_hierarchical_keyboard(
+			containers,
+			"Logfile",
+			None  # Don't exclude any container
+		)
+		sent_message = send_message(message=get_text("show_logsfile"), reply_markup=markup)
+		# Save container cache for standalone containers
+		if sent_message and standalone_containers:
+			save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
+
+def _command_logsearch(message, container_id, container_name):
+	# /logsearch <container> <pattern> [since=<time>]
+	args = message.text.split(maxsplit=2)
+	if len(args) < 3:
+		send_message(message=get_text("error_use_logsearch_command"))
+		return
+	container_name, pattern = args[1], args[2]
+	since = None
+	# The pattern is kept as typed, only an explicit trailing since= is taken off it
+	words = pattern.rsplit(maxsplit=1)
+	if len(words) == 2 and words[1].lower().startswith("since="):
+		since = parse_log_time(words[1][len("since="):])
+		if since is None:
+			send_message(message=get_text("error_logsearch_since", html.escape(words[1])))
+			return
+		pattern = words[0]
+	container_id = get_container_id_by_name(container_name)
+	if not container_id:
+		send_message(message=get_text("container_does_not_exist", container_name))
+		return
+	try:
+		regex = re.compile(pattern)
+	except re.error as e:
+		send_message(message=get_text("error_logsearch_pattern", html.escape(pattern), html.escape(str(e))))
+		return
+	send_message(message=docker_manager.search_logs(container_id, container_name, regex, since=since))
 
-			# Use hierarchical keyboard (Level 1: projects + standalone containers)
-			# No project-level action for exec (can't exec on whole project)
-			# Filter: only show running/restarting containers and projects with at least one running container
-			# Don't exclude bot container (we want to exec into the bot too)
-			markup, standalone_containers = build_hierarchical_keyboard(
-				containers,
-				"Exec",
-				None,  # Don't exclude any container
-				filter_standalone_status=['running', 'restarting'],
-				filter_projects_with_all_status=['exited', 'paused', 'dead', 'created']
-			)
-			sent_message = send_message(message=get_text("exec_command_container"), reply_markup=markup)
-			# Save container cache for standalone containers
-			if sent_message and standalone_containers:
-				save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
-	elif comando in ('/delete', f'/delete@{bot.get_me().username}'):
-		if container_id:
-			confirm_delete(container_id, container_name)
-		else:
-			# Get ALL containers to show projects and standalone
-			containers = docker_manager.list_containers()
-			if not containers or all(c.name == CONTAINER_NAME for c in containers):
-				send_message(message=get_text("no_containers_to_delete"))
-				return
+def _command_compose(message, container_id, container_name):
+	if container_id:
+		compose(container_id, container_name)
+	else:
+		# Get ALL containers to show projects and standalone
+		containers = docker_manager.list_containers()
+		if not containers:
+			send_message(message=get_text("error_no_containers_available"))
+			return
 
-			# Use hierarchical keyboard (Level 1: projects + standalone containers)
-			markup, standalone_containers = build_hierarchical_keyboard(containers, "Delete", CONTAINER_NAME)
-			sent_message = send_message(message=get_text("delete_container"), reply_markup=markup)
-			# Save container cache for standalone containers
-			if sent_message and standalone_containers:
-				save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
-	elif comando in ('/checkupdate', f'/checkupdate@{bot.get_me().username}'):
-		if container_id:
-			docker_manager.force_check_update(container_id)
-		else:
-			# Get ALL containers to show projects and standalone
-			containers = docker_manager.list_containers()
-			if not containers:
-				send_message(message=get_text("no_containers_for_checkupdate"))
-				return
+		# Use hierarchical keyboard (Level 1: projects + standalone containers)
+		# No project-level action for compose (can't get compose file from whole project)
+		# Filter: show all containers (you can get compose file from any container)
+		# Don't exclude bot container for compose (we want to see bot compose too)
+		markup, standalone_containers = build_hierarchical_keyboard(
+			containers,
+			"Compose",
+			None  # Don't exclude any container
+		)
+		sent_message = send_message(message=get_text("show_compose"), reply_markup=markup)
+		# Save container cache for standalone containers
+		if sent_message and standalone_containers:
+			save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
 
-			# Use hierarchical keyboard (Level 1: projects + standalone containers)
-			# No project-level action for checkupdate (can't check updates on whole project)
-			# Filter: show all containers (you can check updates on any container)
-			# Don't exclude bot container (we want to check bot updates too)
-			markup, standalone_containers = build_hierarchical_keyboard(
-				containers,
-				"CheckUpdate",
-				None  # Don't exclude any container
-			)
-			sent_message = send_message(message=get_text("checkupdate_command_container"), reply_markup=markup)
-			# Save container cache for standalone containers
-			if sent_message and standalone_containers:
-				save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
-	elif comando in ('/updateall', f'/updateall@{bot.get_me().username}'):
+def _command_mute(message, container_id, container_name):
+	try:
+		minutes = int(message.text.split()[1])
+	except (IndexError, ValueError):
+		send_message(message=get_text("error_use_mute_command"))
+		return
+	mute(minutes)
+
+def _command_schedule(message, container_id, container_name):
+	show_schedule_menu(message.from_user.id, message.chat.id)
+
+def _command_info(message, container_id, container_name):
+	if container_id:
+		info(container_id, container_name)
+	else:
+		# Get ALL containers to show projects and standalone
 		containers = docker_manager.list_containers()
-		# Sort containers: bot first, then running, then stopped (all alphabetically)
-		sorted_containers = sort_containers_by_priority(containers)
-		containersToUpdate = []  # list of [id, name] pairs
-		containersToUpdateObjs = []
-		for container in sorted_containers:
-			if update_available(container):
-				containersToUpdate.append([container.id[:CONTAINER_ID_LENGTH], container.name])
-				containersToUpdateObjs.append(container)
-		if not containersToUpdate:
-			send_message(message=get_text("already_updated_all"))
+		if not containers:
+			send_message(message=get_text("no_containers_for_info"))
 			return
 
-		markup = InlineKeyboardMarkup(row_width = BUTTON_COLUMNS)
-		markup.add(*[
-			InlineKeyboardButton(f'{ICON_CONTAINER_MARK_FOR_UPDATE} {cname}', callback_data=f'toggleUpdate|{cid}')
-			for cid, cname in containersToUpdate
-		])
-		markup.add(
-			InlineKeyboardButton(get_text("button_update_all"), callback_data="toggleUpdateAll"),
-			InlineKeyboardButton(get_text("button_cancel"), callback_data="cerrar")
+		# Use hierarchical keyboard (Level 1: projects + standalone containers)
+		# No project-level action for info (can't get info from whole project)
+		# Filter: show all containers (you can see info from any container)
+		# Don't exclude bot container (we want to see bot info too)
+		markup, standalone_containers = build_hierarchical_keyboard(
+			containers,
+			"Info",
+			None  # Don't exclude any container
 		)
-		message = send_message(message=get_text("available_updates", len(containersToUpdate)), reply_markup=markup)
-		if message:
-			save_update_data(TELEGRAM_GROUP, message.message_id, containersToUpdate)
-			# Pre-populate name cache so callback parser can resolve names from IDs
-			save_container_cache(message.chat.id, message.message_id, containersToUpdateObjs)
+		sent_message = send_message(message=get_text("info_command_container"), reply_markup=markup)
+		# Save container cache for standalone containers
+		if sent_message and standalone_containers:
+			save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
 
-	elif comando in ('/changetag', f'/changetag@{bot.get_me().username}'):
-		if container_id:
-			change_tag_container(container_id, container_name)
+def _command_exec(message, container_id, container_name):
+	if container_id:
+		ask_command(message.from_user.id, container_id, container_name)
+	else:
+		# Get ALL containers to show projects and standalone
+		containers = docker_manager.list_containers()
+		if not containers:
+			send_message(message=get_text("no_containers_for_exec"))
+			return
+
+		# Use hierarchical keyboard (Level 1: projects + standalone containers)
+		# No project-level action for exec (can't exec on whole project)
+		# Filter: only show running/restarting containers and projects with at least one running container
+		# Don't exclude bot container (we want to exec into the bot too)
+		markup, standalone_containers = build_hierarchical_keyboard(
+			containers,
+			"Exec",
+			None,  # Don't exclude any container
+			filter_standalone_status=['running', 'restarting'],
+			filter_projects_with_all_status=['exited', 'paused', 'dead', 'created']
+		)
+		sent_message = send_message(message=get_text("exec_command_container"), reply_markup=markup)
+		# Save container cache for standalone containers
+		if sent_message and standalone_containers:
+			save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
+
+def _command_delete(message, container_id, container_name):
+	if container_id:
+		confirm_delete(container_id, container_name)
+	else:
+		# Get ALL containers to show projects and standalone
+		containers = docker_manager.list_containers()
+		if not containers or all(c.name == CONTAINER_NAME for c in containers):
+			send_message(message=get_text("no_containers_to_delete"))
+			return
+
+		# Use hierarchical keyboard (Level 1: projects + standalone containers)
+		markup, standalone_containers = build_hierarchical_keyboard(containers, "Delete", CONTAINER_NAME)
+		sent_message = send_message(message=get_text("delete_container"), reply_markup=markup)
+		# Save container cache for standalone containers
+		if sent_message and standalone_containers:
+			save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
+
+def _command_checkupdate(message, container_id, container_name):
+	if container_id:
+		docker_manager.force_check_update(container_id)
+	else:
+		# Get ALL containers to show projects and standalone
+		containers = docker_manager.list_containers()
+		if not containers:
+			send_message(message=get_text("no_containers_for_checkupdate"))
+			return
+
+		# Use hierarchical keyboard (Level 1: projects + standalone containers)
+		# No project-level action for checkupdate (can't check updates on whole project)
+		# Filter: show all containers (you can check updates on any container)
+		# Don't exclude bot container (we want to check bot updates too)
+		markup, standalone_containers = build_hierarchical_keyboard(
+			containers,
+			"CheckUpdate",
+			None  # Don't exclude any container
+		)
+		sent_message = send_message(message=get_text("checkupdate_command_container"), reply_markup=markup)
+		# Save container cache for standalone containers
+		if sent_message and standalone_containers:
+			save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
+
+def _command_updateall(message, container_id, container_name):
+	containers = docker_manager.list_containers()
+	# Sort containers: bot first, then running, then stopped (all alphabetically)
+	sorted_containers = sort_containers_by_priority(containers)
+	containersToUpdate = []  # list of [id, name] pairs
+	containersToUpdateObjs = []
+	available_updates = updates_available(sorted_containers)
+	for container in sorted_containers:
+		if available_updates.get(container.id):
+			containersToUpdate.append([container.id[:CONTAINER_ID_LENGTH], container.name])
+			containersToUpdateObjs.append(container)
+	if not containersToUpdate:
+		send_message(message=get_text("already_updated_all"))
+		return
+
+	markup = InlineKeyboardMarkup(row_width = BUTTON_COLUMNS)
+	markup.add(*[
+		InlineKeyboardButton(f'{ICON_CONTAINER_MARK_FOR_UPDATE} {cname}', callback_data=f'toggleUpdate|{cid}')
+		for cid, cname in containersToUpdate
+	])
+	markup.add(
+		InlineKeyboardButton(get_text("button_update_all"), callback_data="toggleUpdateAll"),
+		InlineKeyboardButton(get_text("button_cancel"), callback_data="cerrar")
+	)
+	sent_message = send_message(message=get_text("available_updates", len(containersToUpdate)), reply_markup=markup)
+	if sent_message:
+		save_update_data(TELEGRAM_GROUP, sent_message.message_id, containersToUpdate)
+		# Pre-populate name cache so callback parser can resolve names from IDs
+		save_container_cache(sent_message.chat.id, sent_message.message_id, containersToUpdateObjs)
+
+def _command_changetag(message, container_id, container_name):
+	if container_id:
+		change_tag_container(container_id, container_name)
+	else:
+		# Get ALL containers to show projects and standalone
+		containers = docker_manager.list_containers()
+		if not containers:
+			send_message(message=get_text("error_no_containers_available"))
+			return
+
+		# Use hierarchical keyboard (Level 1: projects + standalone containers)
+		# No project-level action for changetag (can't change tag for whole project)
+		# Filter: show all containers (you can change tag on any container)
+		# Don't exclude bot container (we want to change bot tag too)
+		markup, standalone_containers = build_hierarchical_keyboard(
+			containers,
+			"ChangeTag",
+			None  # Don't exclude any container
+		)
+		sent_message = send_message(message=get_text("change_tag_container"), reply_markup=markup)
+		# Save container cache for standalone containers
+		if sent_message and standalone_containers:
+			save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
+
+def _command_prune(message, container_id, container_name):
+	markup = InlineKeyboardMarkup(row_width = BUTTON_COLUMNS)
+	botones = []
+	botones.append(InlineKeyboardButton(get_text("button_containers"), callback_data=f'prune|confirmPruneContainers'))
+	botones.append(InlineKeyboardButton(get_text("button_images"), callback_data=f'prune|confirmPruneImages'))
+	botones.append(InlineKeyboardButton(get_text("button_networks"), callback_data=f'prune|confirmPruneNetworks'))
+	botones.append(InlineKeyboardButton(get_text("button_volumes"), callback_data=f'prune|confirmPruneVolumes'))
+	markup.add(*botones)
+	markup.add(InlineKeyboardButton(get_text("button_close"), callback_data="cerrar"))
+	send_message(message=get_text("prune_system"), reply_markup=markup)
+
+def _command_version(message, container_id, container_name):
+	x = send_message(message=get_text("version", VERSION))
+	if x:
+		time.sleep(15)
+		delete_message(x.message_id)
+
+def _command_donate(message, container_id, container_name):
+	x = send_message(message=get_text("donate"))
+	if x:
+		time.sleep(45)
+		delete_message(x.message_id)
+
+def _command_donors(message, container_id, container_name):
+	print_donors()
+
+def _command_ports(message, container_id, container_name):
+	show_container_ports()
+
+def _command_top(message, container_id, container_name):
+	# /top [cpu|mem|net|io] [N]
+	metric = "cpu"
+	limit = TOP_DEFAULT_LIMIT
+	for arg in message.text.split()[1:]:
+		if arg.lower() in TOP_METRICS:
+			metric = arg.lower()
+		elif arg.isdigit() and int(arg) > 0:
+			limit = int(arg)
 		else:
-			# Get ALL containers to show projects and standalone
-			containers = docker_manager.list_containers()
-			if not containers:
-				send_message(message=get_text("error_no_containers_available"))
-				return
+			send_message(message=get_text("error_use_top_command"))
+			return
+	show_top(metric, limit)
+
+# Command -> handler(message, container_id, container_name)
+COMMAND_HANDLERS = {
+	'/start': _command_start,
+	'/list': _command_list,
+	'/run': _command_run,
+	'/stop': _command_stop,
+	'/restart': _command_restart,
+	'/logs': _command_logs,
+	'/logfile': _command_logfile,
+	'/logsearch': _command_logsearch,
+	'/compose': _command_compose,
+	'/mute': _command_mute,
+	'/schedule': _command_schedule,
+	'/info': _command_info,
+	'/exec': _command_exec,
+	'/delete': _command_delete,
+	'/checkupdate': _command_checkupdate,
+	'/updateall': _command_updateall,
+	'/changetag': _command_changetag,
+	'/prune': _command_prune,
+	'/version': _command_version,
+	'/donate': _command_donate,
+	'/donors': _command_donors,
+	'/ports': _command_ports,
+	'/top': _command_top,
+}
+
+@bot.message_handler(commands=["start", "list", "run", "stop", "restart", "delete", "exec", "checkupdate", "updateall", "changetag", "logs", "logfile", "logsearch", "compose", "mute", "schedule", "info", "version", "donate", "donors", "prune", "ports", "top"])
+def command_controller(message):
+	userId = message.from_user.id
+	comando = normalize_command(message.text)
+	if comando is None:
+		# Command addressed to another bot in the group
+		return
+	messageId = message.id
+	container_id = None
+	container_name = None
+	if comando not in ('/mute', '/schedule', '/logsearch', '/top'):
+		container_name = " ".join(message.text.split()[1:])
+		if container_name:
+			container_id = get_container_id_by_name(container_name, debugging=True)
 
-			# Use hierarchical keyboard (Level 1: projects + standalone containers)
-			# No project-level action for changetag (can't change tag for whole project)
-			# Filter: show all containers (you can change tag on any container)
-			# Don't exclude bot container (we want to change bot tag too)
-			markup, standalone_containers = build_hierarchical_keyboard(
-				containers,
-				"ChangeTag",
-				None  # Don't exclude any container
-			)
-			sent_message = send_message(message=get_text("change_tag_container"), reply_markup=markup)
-			# Save container cache for standalone containers
-			if sent_message and standalone_containers:
-				save_container_cache(sent_message.chat.id, sent_message.message_id, standalone_containers)
-	elif comando in ('/prune', f'/prune@{bot.get_me().username}'):
-			markup = InlineKeyboardMarkup(row_width = BUTTON_COLUMNS)
-			botones = []
-			botones.append(InlineKeyboardButton(get_text("button_containers"), callback_data=f'prune|confirmPruneContainers'))
-			botones.append(InlineKeyboardButton(get_text("button_images"), callback_data=f'prune|confirmPruneImages'))
-			botones.append(InlineKeyboardButton(get_text("button_networks"), callback_data=f'prune|confirmPruneNetworks'))
-			botones.append(InlineKeyboardButton(get_text("button_volumes"), callback_data=f'prune|confirmPruneVolumes'))
-			markup.add(*botones)
-			markup.add(InlineKeyboardButton(get_text("button_close"), callback_data="cerrar"))
-			send_message(message=get_text("prune_system"), reply_markup=markup)
-	elif comando in ('/version', f'/version@{bot.get_me().username}'):
-		x = send_message(message=get_text("version", VERSION))
-		if x:
-			time.sleep(15)
-			delete_message(x.message_id)
+	message_thread_id = message.message_thread_id
+	if not message_thread_id:
+		message_thread_id = 1
+	debug(f"COMMAND: {comando} | USER: {userId} | CHAT: {message.chat.id} | THREAD: {message_thread_id}")
 
-	elif comando in ('/donate', f'/donate@{bot.get_me().username}'):
-		x = send_message(message=get_text("donate"))
-		if x:
-			time.sleep(45)
-			delete_message(x.message_id)
+	if message_thread_id != TELEGRAM_THREAD and (not message.reply_to_message or message.reply_to_message.from_user.id != get_bot_identity().id):
+		return
+
+	if not is_admin(userId):
+		warning(f"User {userId} ({message.from_user.username}) tried to use admin command without permission")
+		send_message(chat_id=userId, message=get_text("user_not_admin"))
+		return
 
-	elif comando in ('/donors', f'/donors@{bot.get_me().username}'):
-		print_donors()
+	if comando != '/start':
+		delete_message(messageId)
 
-	elif comando in ('/ports', f'/ports@{bot.get_me().username}'):
-		show_container_ports()
+	handler = COMMAND_HANDLERS.get(comando)
+	if handler:
+		handler(message, container_id, container_name)
 
 def parse_call_data(call_data):
 	parts = call_data.split("|")
@@ -2144,6 +2680,8 @@ def button_controller(call):
 		scheduleId = data.get("scheduleId")
 		value = data.get("value")
 		pruneType = data.get("pruneType")
+		logRange = data.get("logRange")
+		metric = data.get("metric")
 
 		# For toggle commands, don't answer immediately - let the handler do it with feedback
 		# For other commands, answer immediately to prevent timeout
@@ -2197,10 +2735,12 @@ def button_controller(call):
 
 	try:
 		# Don't delete message for toggle actions and hierarchical navigation
-		if comando not in ["toggleUpdate", "toggleUpdateAll", "enterRestartProject", "backToRestartLevel1", "enterRunProject", "backToRunLevel1", "enterStopProject", "backToStopLevel1", "enterDeleteProject", "backToDeleteLevel1", "confirmDeleteWholeProject", "enterExecProject", "backToExecLevel1", "enterLogsProject", "backToLogsLevel1", "enterCheckUpdateProject", "backToCheckUpdateLevel1", "enterInfoProject", "showProjectInfo", "backToInfoLevel1", "enterChangeTagProject", "backToChangeTagLevel1", "enterLogfileProject", "backToLogfileLevel1", "enterComposeProject", "backToComposeLevel1"]:
+		if comando not in ["toggleUpdate", "toggleUpdateAll", "logsFollow", "logsFollowStop", "enterRestartProject", "backToRestartLevel1", "enterRunProject", "backToRunLevel1", "enterStopProject", "backToStopLevel1", "enterDeleteProject", "backToDeleteLevel1", "confirmDeleteWholeProject", "enterExecProject", "backToExecLevel1", "enterLogsProject", "backToLogsLevel1", "enterCheckUpdateProject", "backToCheckUpdateLevel1", "enterInfoProject", "showProjectInfo", "backToInfoLevel1", "enterChangeTagProject", "backToChangeTagLevel1", "enterLogfileProject", "backToLogfileLevel1", "enterComposeProject", "backToComposeLevel1"]:
 			delete_message(messageId)
 
 		if call.data == "cerrar":
+			# Stop following the logs shown in this message, if any
+			log_manager.stop_follow((chatId, messageId), finish=False)
 			# Clean up any cached data for this message
 			update_data = read_cache_item(f"update_data_{chatId}_{messageId}")
 			if update_data is not None:
@@ -2225,10 +2765,24 @@ def button_controller(call):
 		elif comando == "logs":
 			logs(containerId, containerName)
 
+		elif comando == "logsFollow":
+			follow_logs(chatId, messageId, containerId, containerName)
+
+		elif comando == "logsFollowStop":
+			log_manager.stop_follow((chatId, messageId))
+
+		# TOP
+		elif comando == "top":
+			show_top(metric)
+
 		# LOGS EN FICHERO
 		elif comando == "logfile":
 			log_file(containerId, containerName)
 
+		elif comando == "logfileRange":
+			since = None if logRange == "all" else parse_log_time(logRange)
+			export_log_file(containerId, containerName, since=since)
+
 		# COMPOSE
 		elif comando == "compose":
 			compose(containerId, containerName)
@@ -2254,9 +2808,8 @@ def button_controller(call):
 			containers = docker_manager.list_containers()
 			# Sort containers: bot first, then running, then stopped (all alphabetically)
 			sorted_containers = sort_containers_by_priority(containers)
-			for container in sorted_containers:
-				if update_available(container):
-					perform_container_update(container.id, container.name)
+			available_updates = updates_available(sorted_containers)
+			perform_bulk_update([container for container in sorted_containers if available_updates.get(container.id)])
 
 		# CONFIRM DELETE
 		elif comando == "confirmDelete":
@@ -2376,6 +2929,7 @@ def button_controller(call):
 		# UPDATE SELECTED
 		elif comando == "updateSelected":
 			containers, selected = load_update_data(chatId, originalMessageId)
+			to_update = []
 			for cid in selected:
 				try:
 					container = docker_manager.client.containers.get(cid)
@@ -2384,7 +2938,8 @@ def button_controller(call):
 					debug(f"Container {cid} not found")
 					continue
 				if update_available(container):
-					perform_container_update(container.id, container.name)
+					to_update.append(container)
+			perform_bulk_update(to_update)
 			clear_update_data(chatId, originalMessageId)
 
 
@@ -3117,7 +3672,7 @@ def handle_text(message):
 	if not message_thread_id:
 		message_thread_id = 1
 
-	if message_thread_id != TELEGRAM_THREAD and (not message.reply_to_message or message.reply_to_message.from_user.id != bot.get_me().id):
+	if message_thread_id != TELEGRAM_THREAD and (not message.reply_to_message or message.reply_to_message.from_user.id != get_bot_identity().id):
 		return
 
 	if not is_admin(userId):
@@ -3208,10 +3763,116 @@ def stop(containerId, containerName, from_schedule=False):
 def restart(containerId, containerName, from_schedule=False):
 	_execute_container_action('restart', containerId, containerName, from_schedule)
 
+# Containers of the same dependency level started/stopped at once
+COMPOSE_ACTION_WORKERS = 4
+
+def _compose_level_action(level, action, show_extended):
+	"""
+	Starts or stops all the containers of a dependency level concurrently.
+
+	Args:
+		level: Containers of one dependency level
+		action: 'start' or 'stop'
+		show_extended: Whether to show extended messages
+	"""
+	def apply(container):
+		service_name = container.labels.get('com.docker.compose.service', container.name)
+		if action == 'stop':
+			if EXTENDED_MESSAGES and show_extended:
+				send_message(message=get_text("stopping_service", service_name))
+			try:
+				container.stop(timeout=10)
+			except Exception as e:
+				debug(f"Error stopping {service_name}: {e}")
+				if show_extended:
+					send_message(message=get_text("error_stopping_service", service_name))
+		else:
+			if EXTENDED_MESSAGES and show_extended:
+				send_message(message=get_text("starting_service", service_name))
+			try:
+				container.start()
+			except Exception as e:
+				debug(f"Error starting {service_name}: {e}")
+				if show_extended:
+					send_message(message=get_text("error_starting_service", service_name))
+
+	if len(level) == 1:
+		apply(level[0])
+		return
+	with ThreadPoolExecutor(max_workers=min(COMPOSE_ACTION_WORKERS, len(level)), thread_name_prefix="compose-action") as executor:
+		list(executor.map(apply, level))
+
+def _wait_for_level_conditions(level, started, graph, show_extended):
+	"""
+	Waits for the depends_on conditions (service_healthy /
+	service_completed_successfully) that the containers of `level` declared
+	on services that were already started. Waits run concurrently.
+
+	Args:
+		level: Containers about to be started
+		started: dict {service name: container} of the services already started
+		graph: DependencyGraph of the project
+		show_extended: Whether to show extended messages
+	"""
+	waits = {}
+	for container in level:
+		service_name = container.labels.get('com.docker.compose.service')
+		for parent_service in graph.dependencies.get(service_name, ()):
+			parent = started.get(parent_service)
+			if parent is None:
+				continue
+			condition = graph.condition(service_name, parent_service)
+			if condition in ('service_healthy', 'service_completed_successfully'):
+				waits[(parent_service, condition)] = parent
+	if not waits:
+		return
+
+	def wait(item):
+		(parent_service, condition), parent = item
+		if condition == 'service_completed_successfully':
+			debug(f"Waiting for {parent_service} to exit successfully before starting its dependents")
+			_wait_for_container_exit_success(parent, timeout_seconds=180)
+			return
+		if not _container_has_healthcheck(parent):
+			debug(f"{parent_service} declared as service_healthy dependency but has no healthcheck; not waiting")
+			return
+		debug(f"Waiting for {parent_service} to become healthy before starting its dependents")
+		if EXTENDED_MESSAGES and show_extended:
+			send_message(message=get_text("waiting_for_healthy", parent.name))
+		t0 = time.time()
+		if _wait_for_container_healthy(parent, timeout_seconds=180):
+			debug(f"{parent_service} became healthy after {time.time()-t0:.1f}s")
+			if EXTENDED_MESSAGES and show_extended:
+				send_message(message=get_text("healthy_ready", parent.name))
+		else:
+			debug(f"Timed out waiting for {parent_service} to be healthy; starting dependents anyway")
+
+	with ThreadPoolExecutor(max_workers=min(COMPOSE_ACTION_WORKERS, len(waits)), thread_name_prefix="compose-wait") as executor:
+		list(executor.map(wait, waits.items()))
+
+def _start_compose_levels(levels, graph, show_extended):
+	"""Starts dependency levels in order, honouring the depends_on conditions between them"""
+	started = {}
+	for level in levels:
+		_wait_for_level_conditions(level, started, graph, show_extended)
+		_compose_level_action(level, 'start', show_extended)
+		for container in level:
+			service_name = container.labels.get('com.docker.compose.service')
+			if service_name:
+				started[service_name] = container
+
+def _stop_compose_levels(levels, show_extended):
+	"""Stops dependency levels in reverse order (dependents first)"""
+	for level in reversed(levels):
+		_compose_level_action(level, 'stop', show_extended)
+
 def _execute_compose_project_action(action, project_name, show_extended=True):
 	"""
 	Generic function to execute compose project actions (run, stop, restart).
 
+	Containers are grouped into dependency levels; the containers of a
+	level have no dependencies between them and are handled concurrently.
+
 	Args:
 		action: Action name ('run', 'stop', 'restart')
 		project_name: Project name
@@ -3225,65 +3886,28 @@ def _execute_compose_project_action(action, project_name, show_extended=True):
 		send_message(message=get_text("error_project_not_found", project_name))
 		return
 
-	# Get containers sorted by dependencies
+	# Get containers grouped by dependency level
 	containers = project_info.containers
-	sorted_containers = docker_manager.compose_manager.sort_containers_by_dependencies(containers)
+	graph = docker_manager.compose_manager.get_dependency_graph(containers)
+	for cycle in graph.cycles:
+		warning(f"Dependency cycle in project {project_name}: {' -> '.join(cycle)}")
+	levels = docker_manager.compose_manager.get_dependency_levels(containers)
 
 	# Per-action configuration
 	if action == 'restart':
 		send_message(message=get_text("restarting_project", project_name))
-		# Stop containers in reverse order
-		for container in reversed(sorted_containers):
-			service_name = container.labels.get('com.docker.compose.service', container.name)
-			if EXTENDED_MESSAGES and show_extended:
-				send_message(message=get_text("stopping_service", service_name))
-			try:
-				container.stop(timeout=10)
-			except Exception as e:
-				debug(f"Error stopping {service_name}: {e}")
-				if show_extended:
-					send_message(message=get_text("error_stopping_service", service_name))
-		# Start containers in the correct order
-		for container in sorted_containers:
-			service_name = container.labels.get('com.docker.compose.service', container.name)
-			if EXTENDED_MESSAGES and show_extended:
-				send_message(message=get_text("starting_service", service_name))
-			try:
-				container.start()
-			except Exception as e:
-				debug(f"Error starting {service_name}: {e}")
-				if show_extended:
-					send_message(message=get_text("error_starting_service", service_name))
+		_stop_compose_levels(levels, show_extended)
+		_start_compose_levels(levels, graph, show_extended)
 		send_message(message=get_text("project_restarted_success", project_name))
 
 	elif action == 'run':
 		send_message(message=get_text("starting_project", project_name))
-		# Start containers in the correct order
-		for container in sorted_containers:
-			service_name = container.labels.get('com.docker.compose.service', container.name)
-			if EXTENDED_MESSAGES and show_extended:
-				send_message(message=get_text("starting_service", service_name))
-			try:
-				container.start()
-			except Exception as e:
-				debug(f"Error starting {service_name}: {e}")
-				if show_extended:
-					send_message(message=get_text("error_starting_service", service_name))
+		_start_compose_levels(levels, graph, show_extended)
 		send_message(message=get_text("project_started_success", project_name))
 
 	elif action == 'stop':
 		send_message(message=get_text("stopping_project", project_name))
-		# Stop containers in reverse order
-		for container in reversed(sorted_containers):
-			service_name = container.labels.get('com.docker.compose.service', container.name)
-			if EXTENDED_MESSAGES and show_extended:
-				send_message(message=get_text("stopping_service", service_name))
-			try:
-				container.stop(timeout=10)
-			except Exception as e:
-				debug(f"Error stopping {service_name}: {e}")
-				if show_extended:
-					send_message(message=get_text("error_stopping_service", service_name))
+		_stop_compose_levels(levels, show_extended)
 		send_message(message=get_text("project_stopped_success", project_name))
 
 def restart_compose_project(project_name):
@@ -3411,10 +4035,26 @@ def restart_dependents_after_update(project_name, updated_service_name, new_pare
 		send_fn: Function used to send user-facing messages. Receives the message
 			text as its only argument. If None, defaults to send_message (admin chat).
 	"""
+	restart_dependents_after_updates(project_name, {updated_service_name: (new_parent_container, old_parent_id)}, send_fn=send_fn)
+
+
+def restart_dependents_after_updates(project_name, updated_services, send_fn=None):
+	"""
+	Same as restart_dependents_after_update for several services of a project
+	updated together: every dependent is stopped and started once, no matter
+	how many of the services it depends on were updated. Updated services
+	are never restarted, even when they depend on each other.
+
+	Args:
+		project_name: Compose project name
+		updated_services: dict {service name: (new_parent_container, old_parent_id)}
+		send_fn: Function used to send user-facing messages. If None, defaults
+			to send_message (admin chat).
+	"""
 	if send_fn is None:
 		send_fn = lambda msg: send_message(message=msg)
 
-	debug(f"Restarting dependents of service {updated_service_name} in project {project_name}")
+	debug(f"Restarting dependents of services {', '.join(updated_services)} in project {project_name}")
 
 	# Get project information
 	project_info = docker_manager.get_project_info(project_name)
@@ -3422,13 +4062,19 @@ def restart_dependents_after_update(project_name, updated_service_name, new_pare
 		send_fn(get_text("error_project_not_found", project_name))
 		return
 
-	# Get only the transitive dependents of the updated service
-	dependents = docker_manager.compose_manager.get_transitive_dependents(
-		project_info.containers, updated_service_name
-	)
+	# Get only the transitive dependents of the updated services
+	graph = docker_manager.compose_manager.get_dependency_graph(project_info.containers)
+	dependent_services = set()
+	for updated_service_name in updated_services:
+		dependent_services.update(graph.transitive_dependents(updated_service_name))
+	dependent_services.difference_update(updated_services)
+	dependents = [
+		container for container in docker_manager.compose_manager.sort_containers_by_dependencies(project_info.containers)
+		if container.labels.get('com.docker.compose.service') in dependent_services
+	]
 
 	if not dependents:
-		debug(f"No dependents found for service {updated_service_name}, nothing to restart")
+		debug(f"No dependents found for services {', '.join(updated_services)}, nothing to restart")
 		return
 
 	dependent_count = len(dependents)
@@ -3436,21 +4082,25 @@ def restart_dependents_after_update(project_name, updated_service_name, new_pare
 	# Prefer the parent's container name (what shows up in `docker ps`) over
 	# the compose service name when addressing the user; keep the service
 	# name in debug logs for compose-level traceability.
-	parent_display_name = new_parent_container.name if new_parent_container is not None else updated_service_name
+	parent_display_names = {
+		service_name: new_parent_container.name if new_parent_container is not None else service_name
+		for service_name, (new_parent_container, _) in updated_services.items()
+	}
 
 	# Initial message
-	send_fn(get_text("restarting_dependent_services", parent_display_name, dependent_count))
+	send_fn(get_text("restarting_dependent_services", ", ".join(parent_display_names.values()), dependent_count))
 
 	# Pre-compute which dependents need full recreation because they share a
-	# namespace with the (now-replaced) parent container id. Those are NOT
+	# namespace with a (now-replaced) parent container id. Those are NOT
 	# stopped here; recreate_with_overrides will handle their lifecycle so
 	# the extracted config keeps is_running=True for them.
-	new_parent_id = new_parent_container.id if new_parent_container is not None else None
 	namespace_overrides = {}
 	for container in dependents:
-		overrides = _compute_namespace_overrides(container, old_parent_id, new_parent_id)
-		if overrides:
-			namespace_overrides[container.id] = overrides
+		for new_parent_container, old_parent_id in updated_services.values():
+			new_parent_id = new_parent_container.id if new_parent_container is not None else None
+			overrides = _compute_namespace_overrides(container, old_parent_id, new_parent_id)
+			if overrides:
+				namespace_overrides.setdefault(container.id, {}).update(overrides)
 
 	# Stop dependents in reverse order (deepest dependents first), skipping
 	# those that will be fully recreated. Per-service stop progress is logged
@@ -3468,18 +4118,21 @@ def restart_dependents_after_update(project_name, updated_service_name, new_pare
 				send_fn(get_text("error_stopping_service", container.name))
 
 	# Honor depends_on conditions before restarting: if any dependent declared
-	# `service_healthy` / `service_completed_successfully` on the updated
+	# `service_healthy` / `service_completed_successfully` on an updated
 	# service, wait for the new parent to satisfy it.
-	needs_healthy = False
-	needs_completed = False
-	for container in dependents:
-		cond = docker_manager.compose_manager.get_dependency_condition(container, updated_service_name)
-		if cond == 'service_healthy':
-			needs_healthy = True
-		elif cond == 'service_completed_successfully':
-			needs_completed = True
+	for updated_service_name, (new_parent_container, _) in updated_services.items():
+		if new_parent_container is None:
+			continue
+		parent_display_name = parent_display_names[updated_service_name]
+		needs_healthy = False
+		needs_completed = False
+		for container in dependents:
+			cond = graph.condition(container.labels.get('com.docker.compose.service'), updated_service_name)
+			if cond == 'service_healthy':
+				needs_healthy = True
+			elif cond == 'service_completed_successfully':
+				needs_completed = True
 
-	if new_parent_container is not None and (needs_healthy or needs_completed):
 		if needs_healthy:
 			if _container_has_healthcheck(new_parent_container):
 				debug(f"Waiting for {updated_service_name} to become healthy before starting dependents")
@@ -3500,7 +4153,7 @@ def restart_dependents_after_update(project_name, updated_service_name, new_pare
 			_wait_for_container_exit_success(new_parent_container, timeout_seconds=180)
 
 	# Start dependents in dependency order. Dependents whose namespace
-	# references the old parent id are recreated in-place (rewriting the
+	# references an old parent id are recreated in-place (rewriting the
 	# reference) instead of merely started, since starting a container with
 	# a stale `container:<id>` namespace fails. Per-service start progress is
 	# logged only in debug; recreation IS announced (it's an unusual event)
@@ -3509,7 +4162,7 @@ def restart_dependents_after_update(project_name, updated_service_name, new_pare
 		service_name = container.labels.get('com.docker.compose.service', container.name)
 		overrides = namespace_overrides.get(container.id)
 		if overrides:
-			debug(f"Recreating {service_name} to rewrite namespace -> new parent {updated_service_name} (id={new_parent_id[:12]}); overrides={list(overrides.keys())}")
+			debug(f"Recreating {service_name} to rewrite namespace -> new parent; overrides={list(overrides.keys())}")
 			if EXTENDED_MESSAGES:
 				send_fn(get_text("recreating_namespace_dependent", container.name))
 			try:
@@ -3527,10 +4180,10 @@ def restart_dependents_after_update(project_name, updated_service_name, new_pare
 				send_fn(get_text("error_starting_service", container.name))
 
 	# Final message
-	send_fn(get_text("dependent_services_restarted_success", parent_display_name, dependent_count))
+	send_fn(get_text("dependent_services_restarted_success", ", ".join(parent_display_names.values()), dependent_count))
 
 
-def perform_container_update(container_id, container_name, tag=None, send_fn=None):
+def perform_container_update(container_id, container_name, tag=None, send_fn=None, pre_pulled=False, config_overrides=None, restart_dependents=True):
 	"""
 	Single entry point for container updates. Wraps the full flow:
 	  1. Capture Compose project/service info BEFORE the update (container is recreated).
@@ -3550,6 +4203,13 @@ def perform_container_update(container_id, container_name, tag=None, send_fn=Non
 		send_fn: Function used to send user-facing messages. Receives the message
 			text and returns the sent telegram Message (or None to suppress).
 			If None, defaults to send_message (admin chat).
+		pre_pulled: The image was already pulled (bulk updates), skip the pull.
+		config_overrides: Optional overrides for the extracted configuration.
+		restart_dependents: False when the caller restarts the dependents itself
+			(bulk updates restart them once per project).
+
+	Returns:
+		The new container, or None if it could not be updated.
 	"""
 	if send_fn is None:
 		send_fn = lambda msg: send_message(message=msg)
@@ -3570,23 +4230,25 @@ def perform_container_update(container_id, container_name, tag=None, send_fn=Non
 	x = send_fn(get_text("updating", container_name))
 
 	# Perform the actual update
-	result = docker_manager.update(container_id=container_id, container_name=container_name, message=x, bot=bot, tag=tag)
+	result = docker_manager.update(container_id=container_id, container_name=container_name, message=x, bot=bot, tag=tag, pre_pulled=pre_pulled, config_overrides=config_overrides)
 
 	# Remove the progress message and send the final result
 	if x is not None:
 		delete_message(x.message_id)
 	send_fn(result)
 
-	# Restart dependents if applicable. Resolve the freshly recreated container
-	# by name (Docker enforces unique container names, and perform_update keeps
-	# the original name) so dependents can wait on its healthcheck when their
-	# compose `depends_on` declared `condition: service_healthy`.
-	if project_name and updated_service_name:
-		new_parent_container = None
-		try:
-			new_parent_container = docker_manager.client.containers.get(container_name)
-		except Exception as e:
-			debug(f"Could not fetch new container after update for {container_name}: {e}")
+	# Resolve the freshly recreated container by name (Docker enforces unique
+	# container names, and perform_update keeps the original name) so
+	# dependents can wait on its healthcheck when their compose `depends_on`
+	# declared `condition: service_healthy`.
+	new_parent_container = None
+	try:
+		new_parent_container = docker_manager.client.containers.get(container_name)
+	except Exception as e:
+		debug(f"Could not fetch new container after update for {container_name}: {e}")
+
+	# Restart dependents if applicable
+	if restart_dependents and project_name and updated_service_name:
 		restart_dependents_after_update(
 			project_name,
 			updated_service_name,
@@ -3594,6 +4256,110 @@ def perform_container_update(container_id, container_name, tag=None, send_fn=Non
 			old_parent_id=old_parent_id,
 			send_fn=send_fn,
 		)
+	if new_parent_container is not None and new_parent_container.id == old_parent_id:
+		# Same container: the update failed and was rolled back
+		return None
+	return new_parent_container
+
+# Parallelism of bulk updates ("update all" / "update selected"): images
+# pulled at once, and projects or standalone containers recreated at once
+BULK_UPDATE_PULL_WORKERS = 4
+BULK_UPDATE_WORKERS = 3
+
+
+def perform_bulk_update(containers):
+	"""
+	Updates several containers at once.
+
+	First every needed image is pulled concurrently while the containers keep
+	running. Then the containers are recreated from the pulled images with
+	bounded parallelism: each compose project is a single unit whose
+	containers are updated one after another in dependency order, and its
+	dependents are restarted once at the end instead of once per updated
+	service. The bot itself is updated last, as the updater replaces it.
+
+	Args:
+		containers: Containers with an update available
+	"""
+	started = time.time()
+	self_container = None
+	by_image = {}
+	for container in containers:
+		if container.name == CONTAINER_NAME:
+			# The updater container pulls the bot image itself
+			self_container = container
+			continue
+		image = container.attrs.get('Config', {}).get('Image')
+		by_image.setdefault(image, []).append(container)
+
+	to_update = []
+	if by_image:
+		send_message(message=get_text("bulk_update_pulling", len(by_image), sum(len(group) for group in by_image.values())))
+
+		def pull(image):
+			docker_manager.client.images.pull(image)
+
+		with ThreadPoolExecutor(max_workers=min(BULK_UPDATE_PULL_WORKERS, len(by_image)), thread_name_prefix="bulk-pull") as executor:
+			futures = {executor.submit(pull, image): image for image in by_image}
+			for future in as_completed(futures):
+				image = futures[future]
+				try:
+					future.result()
+					to_update.extend(by_image[image])
+				except Exception as e:
+					error(f"Error pulling image {image} for bulk update: [{e}]")
+					send_message(message=get_text("error_pulling_image", image))
+		debug(f"Bulk update: images pulled in {time.time() - started:.1f}s")
+
+	# One unit per compose project, one per standalone container
+	units = {}
+	for container in to_update:
+		project_name = ComposeDetector.get_project_name(container)
+		key = ("project", project_name) if project_name else ("container", container.id)
+		units.setdefault(key, []).append(container)
+
+	def update_unit(unit_containers):
+		project_name = ComposeDetector.get_project_name(unit_containers[0])
+		if not project_name:
+			container = unit_containers[0]
+			return 1 if perform_container_update(container.id, container.name, pre_pulled=True) is not None else 0
+		# Order by the graph of the whole project, so services that are not
+		# being updated still count when they sit between two updated ones
+		project_info = docker_manager.get_project_info(project_name)
+		graph = docker_manager.compose_manager.get_dependency_graph(project_info.containers if project_info else unit_containers)
+		position = {service: index for index, service in enumerate(graph.order)}
+		unit_containers = sorted(unit_containers, key=lambda c: (position.get(ComposeDetector.get_service_name(c), len(position)), c.name))
+		updated = {}  # service name -> (new container, old container id)
+		for container in unit_containers:
+			# A service sharing the namespace of one updated before it must
+			# point at the new parent container
+			overrides = {}
+			for new_parent_container, old_parent_id in updated.values():
+				overrides.update(_compute_namespace_overrides(container, old_parent_id, new_parent_container.id))
+			old_id = container.id
+			new_container = perform_container_update(container.id, container.name, pre_pulled=True, config_overrides=overrides or None, restart_dependents=False)
+			service_name = ComposeDetector.get_service_name(container)
+			if new_container is not None and service_name:
+				updated[service_name] = (new_container, old_id)
+		if updated:
+			restart_dependents_after_updates(project_name, updated)
+		return len(updated)
+
+	updated_count = 0
+	if units:
+		with ThreadPoolExecutor(max_workers=min(BULK_UPDATE_WORKERS, len(units)), thread_name_prefix="bulk-update") as executor:
+			for future in as_completed([executor.submit(update_unit, unit) for unit in units.values()]):
+				try:
+					updated_count += future.result()
+				except Exception as e:
+					error(f"Error in bulk update: [{e}]")
+
+	total = len(containers) - (1 if self_container is not None else 0)
+	if total:
+		send_message(message=get_text("bulk_update_finished", updated_count, total, f"{time.time() - started:.0f}"))
+
+	if self_container is not None:
+		perform_container_update(self_container.id, self_container.name)
 
 def run_compose_project(project_name):
 	"""Starts a complete Docker Compose project respecting dependency order."""
@@ -3642,20 +4408,86 @@ def delete_compose_project(project_name):
 def logs(containerId, containerName):
 	debug(f"Running command: logs for container {containerName}")
 	result = docker_manager.show_logs(container_id=containerId, container_name=containerName)
-	send_message(message=result, reply_markup=create_simple_keyboard("button_close"))
+	send_message(message=result, reply_markup=create_logs_keyboard(containerId))
+
+def create_logs_keyboard(containerId):
+	markup = InlineKeyboardMarkup(row_width = BUTTON_COLUMNS)
+	markup.add(
+		InlineKeyboardButton(get_text("button_logs_follow"), callback_data=f"logsFollow|{containerId}"),
+		InlineKeyboardButton(get_text("button_close"), callback_data="cerrar")
+	)
+	return markup
+
+def follow_logs(chatId, messageId, containerId, containerName):
+	"""Refreshes a /logs message in place with the newest lines until stopped or timed out"""
+	debug(f"Running command: follow_logs for container {containerName}")
+	try:
+		container = docker_manager.client.containers.get(containerId)
+	except Exception as e:
+		error(f"The logs for container {containerName} could not be followed. Error: [{e}]")
+		send_message(message=get_text("error_showing_logs_container", containerName))
+		return
+
+	until = (datetime.now() + timedelta(seconds=LOG_FOLLOW_TIMEOUT)).strftime("%H:%M")
+	stop_markup = create_simple_keyboard("button_logs_follow_stop", callback_data=f"logsFollowStop|{containerId}")
+
+	def on_update(text):
+		edit_message_text(get_text("logs_following", containerName, until, html.escape(text)), chatId, messageId, reply_markup=stop_markup)
+
+	def on_finish(text):
+		edit_message_text(get_text("showing_logs", containerName, html.escape(text)), chatId, messageId, reply_markup=create_logs_keyboard(containerId))
+
+	if log_manager.follow((chatId, messageId), container, on_update, on_finish, LOGS_MESSAGE_MAX_CHARS):
+		edit_message_reply_markup(chatId, messageId, stop_markup)
+	else:
+		send_message(message=get_text("logs_follow_busy", LOG_FOLLOW_MAX_ACTIVE))
+
+# Time ranges offered by /logfile (value understood by parse_log_time, "all" for everything)
+LOGFILE_RANGES = ["1h", "6h", "24h", "7d"]
 
 def log_file(containerId, containerName):
+	"""Asks which time range of the logs to export"""
 	debug(f"Running command: log_file for container {containerName}")
+	markup = InlineKeyboardMarkup(row_width = BUTTON_COLUMNS)
+	markup.add(*[
+		InlineKeyboardButton(get_text("button_logfile_last", log_range), callback_data=f"logfileRange|{containerId}|{log_range}")
+		for log_range in LOGFILE_RANGES
+	])
+	markup.add(InlineKeyboardButton(get_text("button_logfile_all"), callback_data=f"logfileRange|{containerId}|all"))
+	markup.add(InlineKeyboardButton(get_text("button_cancel"), callback_data="cerrar"))
+	send_message(message=get_text("logfile_choose_range", containerName), reply_markup=markup)
+
+def export_log_file(containerId, containerName, since=None, until=None):
+	"""Streams the logs of a container into gzip files and uploads them (split in parts if needed)"""
+	debug(f"Running command: export_log_file for container {containerName} (since {since}, until {until})")
 	markup = create_simple_keyboard("button_delete")
-	result = docker_manager.show_logs_raw(container_id=containerId, container_name=containerName)
-	if isinstance(result, str):
-		fichero_temporal = get_temporal_file(result, f'logs_{containerName}')
-		x = send_message(message=get_text("loading_file"))
-		send_document(document=fichero_temporal, reply_markup=markup, caption=get_text("logs", containerName))
+	x = send_message(message=get_text("loading_file"))
+	parts = []
+	try:
+		container = docker_manager.client.containers.get(containerId)
+		parts, truncated = log_manager.export(container, since=since, until=until, max_bytes=LOGFILE_MAX_SIZE_MB * 1024 * 1024)
+		if not parts:
+			send_message(message=get_text("logfile_empty", containerName), reply_markup=markup)
+			return
+		if truncated:
+			send_message(message=get_text("logfile_truncated", containerName, LOGFILE_MAX_SIZE_MB))
+		fecha_hora_formateada = datetime.now().strftime("%Y.%m.%d_%H.%M.%S")
+		for index, part in enumerate(parts, start=1):
+			if len(parts) == 1:
+				file_name = f"logs_{containerName}_{fecha_hora_formateada}.txt.gz"
+				caption = get_text("logs", containerName)
+			else:
+				file_name = f"logs_{containerName}_{fecha_hora_formateada}.part{index}.txt.gz"
+				caption = get_text("logs_part", containerName, index, len(parts))
+			send_document(document=part, reply_markup=markup, caption=caption, visible_file_name=file_name)
+	except Exception as e:
+		error(f"The logs for container {containerName} could not be exported. Error: [{e}]")
+		send_message(message=get_text("error_showing_logs_container", containerName), reply_markup=markup)
+	finally:
+		for part in parts:
+			part.close()
 		if x:
 			delete_message(x.message_id)
-	else:
-		send_message(message=result, reply_markup=markup)
 
 def get_temporal_file(data, fileName):
 	fichero_temporal = io.BytesIO(data.encode('utf-8'))
@@ -4072,8 +4904,6 @@ def get_dockerhub_description(image_tag):
 	Returns truncated description or None if not available.
 	"""
 	try:
-		import requests
-
 		# Parse image name
 		# Format: [registry/]repository[:tag]
 		# Examples: nginx:latest, library/nginx:latest, ghcr.io/user/image:tag
@@ -4097,7 +4927,7 @@ def get_dockerhub_description(image_tag):
 
 			# Call Docker Hub API
 			url = f"https://hub.docker.com/v2/repositories/{namespace}/{repo}/"
-			response = requests.get(url, timeout=5)
+			response = http_client.get(url, timeout=5)
 
 			if response.status_code == 200:
 				data = response.json()
@@ -4723,6 +5553,16 @@ def update_available(container):
 			pass
 	return update
 
+def updates_available(containers):
+	"""Batch version of update_available: {container.id: bool} with a single cache query"""
+	if not CHECK_UPDATES:
+		return {container.id: False for container in containers}
+	try:
+		statuses = read_container_update_statuses(containers)
+	except:
+		statuses = {}
+	return {container.id: bool(statuses.get(container.id) and "⬆️" in statuses.get(container.id)) for container in containers}
+
 def display_containers(containers):
 	# Calculate statistics
 	total_containers = len(containers)
@@ -4737,6 +5577,7 @@ def display_containers(containers):
 	project_containers = {}  # {project_name: [containers]}
 	standalone_containers = []
 	pending_updates = 0
+	available_updates = updates_available(containers)
 
 	for container in containers:
 		# Read labels directly for better performance
@@ -4748,7 +5589,7 @@ def display_containers(containers):
 		container_info_cache[container.id] = (project_name, service_name)
 
 		# Cache update status
-		has_update = update_available(container)
+		has_update = available_updates.get(container.id, False)
 		update_cache[container.id] = has_update
 		if has_update:
 			pending_updates += 1
@@ -4933,12 +5774,11 @@ def get_status_emoji(statusStr, containerName, container=None):
 def get_update_emoji(containerName):
 	status = "✅"
 
-	container_id = get_container_id_by_name(container_name=containerName)
-	if not container_id:
+	container = docker_manager.inventory.get_by_name(containerName)
+	if not container:
 		return status
 
 	try:
-		container = docker_manager.client.containers.get(container_id)
 		image_with_tag = container.attrs['Config']['Image']
 		image_status = read_container_update_status(image_with_tag, container.name)
 		if image_status and get_text("NEED_UPDATE_CONTAINER_TEXT") in image_status:
@@ -4956,6 +5796,54 @@ def get_random_available_port():
 	"""
 	return port_manager.get_random_available_port()
 
+# /top metrics: name -> function giving the ranked value of a sample
+TOP_METRICS = {
+	"cpu": lambda sample: sample["cpu"],
+	"mem": lambda sample: sample["mem_used"],
+	"net": lambda sample: sample["net_rx"] + sample["net_tx"],
+	"io": lambda sample: sample["blk_read"] + sample["blk_write"],
+}
+TOP_DEFAULT_LIMIT = 10
+
+def show_top(metric="cpu", limit=TOP_DEFAULT_LIMIT):
+	"""Ranks the running containers by a resource using the stats sampler, collecting missing samples in parallel"""
+	debug(f"Running command: top {metric} {limit}")
+	running = [container for container in docker_manager.list_containers() if container.status == "running"]
+	if not running:
+		send_message(message=get_text("top_no_containers"))
+		return
+	max_age = STATS_SAMPLE_SECONDS * 3 if STATS_SAMPLE_SECONDS > 0 else 0
+	samples = stats_sampler.collect(running, max_age=max_age)
+	value_of = TOP_METRICS[metric]
+	ranking = []
+	for container in running:
+		sample = samples.get(container.id)
+		if sample is None:
+			continue
+		value = value_of(sample[0])
+		if not math.isnan(value):
+			ranking.append((value, container.name))
+	ranking.sort(reverse=True)
+	ranking = ranking[:limit]
+
+	lines = []
+	width = max((len(name) for _, name in ranking), default=0)
+	for position, (value, name) in enumerate(ranking, start=1):
+		formatted = f"{value:.2f}%" if metric == "cpu" else sizeof_fmt(value)
+		lines.append(f"{position:>2}. {html.escape(name.ljust(width))}  {formatted}")
+	text = get_text("top_title", len(ranking), get_text(f"top_metric_{metric}"))
+	text += "\n<pre><code>" + "\n".join(lines) + "</code></pre>"
+	if len(samples) < len(running):
+		text += "\n" + get_text("top_timed_out", len(running) - len(samples))
+
+	markup = InlineKeyboardMarkup(row_width=len(TOP_METRICS))
+	markup.add(*[
+		InlineKeyboardButton(get_text(f"top_metric_{name}"), callback_data=f"top|{name}")
+		for name in TOP_METRICS if name != metric
+	])
+	markup.add(InlineKeyboardButton(get_text("button_close"), callback_data="cerrar"))
+	send_message(message=text, reply_markup=markup)
+
 def show_container_ports():
 	"""
 	Show all ports used by containers
@@ -5093,7 +5981,7 @@ def get_array_donors_online():
 		'Pragma': 'no-cache'
 	}
 
-	response = requests.get(DONORS_URL, headers=headers)
+	response = http_client.get(DONORS_URL, headers=headers)
 	if response.status_code == 200:
 		try:
 			data = response.json()
@@ -5113,12 +6001,11 @@ def get_array_donors_online():
 def get_container_id_by_name(container_name, debugging=False):
 	if debugging:
 		debug(f"Finding container {container_name}")
-	containers = docker_manager.list_containers()
-	for container in containers:
-		if container.name == container_name:
-			if debugging:
-				debug(f"Container {container_name} found")
-			return container.id[:CONTAINER_ID_LENGTH]
+	container = docker_manager.inventory.get_by_name(container_name)
+	if container:
+		if debugging:
+			debug(f"Container {container_name} found")
+		return container.id[:CONTAINER_ID_LENGTH]
 	if debugging:
 		debug(f"Container {container_name} not found")
 	return None
@@ -5128,39 +6015,49 @@ def sanitize_text_for_filename(text):
 	sanitized = re.sub(r'_+', '_', sanitized)
 	return sanitized
 
-def write_cache_item(key, value):
-	"""Write cache item with thread-safe lock to prevent corruption."""
-	with _cache_lock:
-		try:
-			pickle.dump(value, open(f'{DIR["cache"]}{key}', 'wb'))
-		except Exception as e:
-			error(f"Error writing cache item: {key} - {e}")
+def write_cache_item(key, value, ttl=None):
+	"""Write cache item, optionally expiring after ttl seconds."""
+	try:
+		cache_store.set(key, value, ttl=ttl)
+	except Exception as e:
+		error(f"Error writing cache item: {key} - {e}")
 
 def read_cache_item(key):
-	"""Read cache item with thread-safe lock to prevent corruption."""
-	with _cache_lock:
-		try:
-			return pickle.load(open(f'{DIR["cache"]}{key}', 'rb'))
-		except:
-			return None
+	"""Read cache item, None if missing or expired."""
+	try:
+		return cache_store.get(key)
+	except:
+		return None
+
+def read_cache_items(keys):
+	"""Read several cache items in one query. Returns {key: value} for the keys found."""
+	try:
+		return cache_store.get_many(keys)
+	except Exception as e:
+		error(f"Error reading cache items: {e}")
+		return {}
 
 def delete_cache_item(key):
-	"""Delete cache item with thread-safe lock to prevent corruption."""
-	path = f'{DIR["cache"]}{key}'
-	with _cache_lock:
-		try:
-			if os.path.exists(path):
-				os.remove(path)
-		except Exception as e:
-			pass
+	"""Delete cache item."""
+	try:
+		cache_store.delete(key)
+	except Exception as e:
+		pass
+
+def _container_update_status_key(image_with_tag, container_name):
+	return f'{sanitize_text_for_filename(image_with_tag)}_{sanitize_text_for_filename(container_name)}'
 
 def save_container_update_status(image_with_tag, container_name, value):
-	key = f'{sanitize_text_for_filename(image_with_tag)}_{sanitize_text_for_filename(container_name)}'
-	write_cache_item(key, value)
+	write_cache_item(_container_update_status_key(image_with_tag, container_name), value)
 
 def read_container_update_status(image_with_tag, container_name):
-	key = f'{sanitize_text_for_filename(image_with_tag)}_{sanitize_text_for_filename(container_name)}'
-	return read_cache_item(key)
+	return read_cache_item(_container_update_status_key(image_with_tag, container_name))
+
+def read_container_update_statuses(containers):
+	"""Returns {container.id: update status} for all containers in a single cache query"""
+	keys = {container.id: _container_update_status_key(container.attrs['Config']['Image'], container.name) for container in containers}
+	statuses = read_cache_items(keys.values())
+	return {container_id: statuses.get(key) for container_id, key in keys.items()}
 
 def save_update_data(chat_id, message_id, containers, selected=None):
 	if selected is None:
@@ -5188,10 +6085,10 @@ def clear_update_data(chat_id, message_id):
 	delete_cache_item(f"update_data_{chat_id}_{message_id}")
 
 # Generic cache helpers
-def _save_cache(prefix, identifier, value):
+def _save_cache(prefix, identifier, value, ttl=None):
 	"""Generic save to cache with prefix and identifier"""
 	key = f"{prefix}_{identifier}"
-	write_cache_item(key, value)
+	write_cache_item(key, value, ttl=ttl)
 
 def _load_cache(prefix, identifier):
 	"""Generic load from cache with prefix and identifier"""
@@ -5251,6 +6148,8 @@ def load_port_check_request_state(user_id):
 def clear_port_check_request_state(user_id):
 	_clear_cache("pending_port_check", user_id)
 
+CONTAINER_CACHE_TTL = 7 * 24 * 3600
+
 def save_container_cache(chat_id, message_id, containers):
 	"""
 	Guarda mapeo de container_id -> container_name para un mensaje con TTL de 7 días
@@ -5268,7 +6167,7 @@ def save_container_cache(chat_id, message_id, containers):
 	for container in containers:
 		cache_data["containers"][container.id[:CONTAINER_ID_LENGTH]] = container.name
 
-	write_cache_item(f"containers_{chat_id}_{message_id}", cache_data)
+	write_cache_item(f"containers_{chat_id}_{message_id}", cache_data, ttl=CONTAINER_CACHE_TTL)
 
 def load_container_name(chat_id, message_id, container_id):
 	"""
@@ -5430,13 +6329,15 @@ def _send_message_direct(chat_id, message, reply_markup, parse_mode, disable_web
 		error(f"Error sending message to chat {chat_id}. Message: [{str(message)}]. Error: [{str(e)}]")
 		raise
 
-def _send_document_direct(chat_id, document, reply_markup, caption, parse_mode):
+def _send_document_direct(chat_id, document, reply_markup, caption, parse_mode, visible_file_name=None):
 	"""Sends a document directly without using the queue"""
 	try:
+		if hasattr(document, "seek"):
+			document.seek(0)  # A retry must upload the file from the start again
 		if TELEGRAM_THREAD == 1:
-			return bot.send_document(chat_id, document=document, reply_markup=reply_markup, caption=caption, parse_mode=parse_mode)
+			return bot.send_document(chat_id, document=document, reply_markup=reply_markup, caption=caption, parse_mode=parse_mode, visible_file_name=visible_file_name)
 		else:
-			return bot.send_document(chat_id, document=document, reply_markup=reply_markup, caption=caption, message_thread_id=TELEGRAM_THREAD, parse_mode=parse_mode)
+			return bot.send_document(chat_id, document=document, reply_markup=reply_markup, caption=caption, message_thread_id=TELEGRAM_THREAD, parse_mode=parse_mode, visible_file_name=visible_file_name)
 	except Exception as e:
 		error(f"Error sending document to chat {chat_id}. Error: [{e}]")
 		raise
@@ -5473,11 +6374,11 @@ def delete_message(message_id, chat_id=None):
 	"""Deletes a message using the queue (async)"""
 	if chat_id is None:
 		chat_id = TELEGRAM_GROUP
-	message_queue.add_message(_delete_message_direct, chat_id, message_id, wait_for_result=False)
+	message_queue.add_message(_delete_message_direct, chat_id, message_id, wait_for_result=False, chat_key=chat_id, rate_limited=False, target_message=message_id, operation="delete")
 
 def send_message(chat_id=TELEGRAM_GROUP, message=None, reply_markup=None, parse_mode="html", disable_web_page_preview=True):
 	"""Sends a message using the queue (waits for result to get the message_id)"""
-	return message_queue.add_message(_send_message_direct, chat_id, message, reply_markup, parse_mode, disable_web_page_preview, wait_for_result=True)
+	return message_queue.add_message(_send_message_direct, chat_id, message, reply_markup, parse_mode, disable_web_page_preview, wait_for_result=True, chat_key=chat_id)
 
 def send_message_to_notification_channel(chat_id=TELEGRAM_NOTIFICATION_CHANNEL, message=None, reply_markup=None, parse_mode="html", disable_web_page_preview=True):
 	"""Sends a message to the notification channel using the queue"""
@@ -5485,21 +6386,24 @@ def send_message_to_notification_channel(chat_id=TELEGRAM_NOTIFICATION_CHANNEL,
 		return send_message(chat_id=TELEGRAM_GROUP, message=message, reply_markup=reply_markup, parse_mode=parse_mode, disable_web_page_preview=disable_web_page_preview)
 	return send_message(chat_id=chat_id, message=message, reply_markup=reply_markup, parse_mode=parse_mode, disable_web_page_preview=disable_web_page_preview)
 
-def send_document(chat_id=TELEGRAM_GROUP, document=None, reply_markup=None, caption=None, parse_mode="html"):
+# Large log exports can take a while to upload
+DOCUMENT_UPLOAD_TIMEOUT = 600
+
+def send_document(chat_id=TELEGRAM_GROUP, document=None, reply_markup=None, caption=None, parse_mode="html", visible_file_name=None):
 	"""Sends a document using the queue (waits for result to get the message_id)"""
-	return message_queue.add_message(_send_document_direct, chat_id, document, reply_markup, caption, parse_mode, wait_for_result=True)
+	return message_queue.add_message(_send_document_direct, chat_id, document, reply_markup, caption, parse_mode, visible_file_name, wait_for_result=True, chat_key=chat_id, result_timeout=DOCUMENT_UPLOAD_TIMEOUT)
 
 def edit_message_text(text, chat_id, message_id, parse_mode="html", reply_markup=None):
 	"""Edits the text of a message using the queue (async, does not block on failure)"""
-	message_queue.add_message(_edit_message_text_direct, chat_id, message_id, text, parse_mode, reply_markup, wait_for_result=False)
+	message_queue.add_message(_edit_message_text_direct, chat_id, message_id, text, parse_mode, reply_markup, wait_for_result=False, chat_key=chat_id, target_message=message_id, operation="edit_text")
 
 def edit_message_reply_markup(chat_id, message_id, reply_markup):
 	"""Edits the markup of a message using the queue (async)"""
-	message_queue.add_message(_edit_message_reply_markup_direct, chat_id, message_id, reply_markup, wait_for_result=False)
+	message_queue.add_message(_edit_message_reply_markup_direct, chat_id, message_id, reply_markup, wait_for_result=False, chat_key=chat_id, target_message=message_id, operation="edit_markup")
 
 def edit_message_reply_markup_sync(chat_id, message_id, reply_markup):
 	"""Edits the markup of a message using the queue (sync, waits for confirmation)"""
-	return message_queue.add_message(_edit_message_reply_markup_direct, chat_id, message_id, reply_markup, wait_for_result=True)
+	return message_queue.add_message(_edit_message_reply_markup_direct, chat_id, message_id, reply_markup, wait_for_result=True, chat_key=chat_id, target_message=message_id, operation="edit_markup")
 
 def delete_updater():
 	container_id = get_container_id_by_name(UPDATER_CONTAINER_NAME)
@@ -5657,124 +6561,25 @@ def is_valid_cron(cron_expression):
 		return False
 
 def get_my_architecture():
-	try:
-		info = docker_manager.client.info()
-		architecture_docker = info['Architecture']
-		return docker_architectures.get(architecture_docker, architecture_docker)
-	except Exception as e:
-		error(f"Error getting Docker architecture: [{e}]")
-		return None
+	"""Host architecture as image registries name it (cached daemon info), or None"""
+	return docker_manager.daemon_info.get("architecture")
 
 def get_docker_tags(repo_name):
-	"""Get available tags for a Docker image"""
-	try:
-		if repo_name.startswith("ghcr.io/"):
-			debug(f"Getting tags from ghcr.io registry for {repo_name}")
-			try:
-				tags = get_docker_tags_from_ghcr(repo_name.replace("ghcr.io/", ""))
-				return tags if tags else []
-			except Exception as e:
-				error(f"Failed to get tags from ghcr.io for {repo_name}: {str(e)}")
-				return []
-		elif repo_name.startswith("lscr.io/"):
-			debug(f"Getting tags from DockerHub for {repo_name}")
-			try:
-				architecture = get_my_architecture()
-				if architecture is None:
-					error(f"Could not determine system architecture for {repo_name}")
-					return []
-				return get_docker_tags_from_DockerHub(repo_name.replace("lscr.io/", ""))
-			except Exception as e:
-				error(f"Failed to get tags from DockerHub for {repo_name}: {str(e)}")
-				return []
-		else:
-			debug(f"Getting tags from DockerHub for {repo_name}")
-			try:
-				architecture = get_my_architecture()
-				if architecture is None:
-					error(f"Could not determine system architecture for {repo_name}")
-					return []
-				return get_docker_tags_from_DockerHub(repo_name)
-			except Exception as e:
-				error(f"Failed to get tags from DockerHub for {repo_name}: {str(e)}")
-				return []
-	except Exception as e:
-		error(f"Failed to get tags for {repo_name}: {str(e)}")
-		return []
-
-def get_docker_tags_from_DockerHub(repo_name):
-	architecture = get_my_architecture()
-	if architecture is None:
-		return []
-
-	# Handle official Docker Hub images (e.g., redis, nginx, postgres)
-	# Official images need 'library/' prefix in the API URL
-	if '/' not in repo_name:
-		# Official image - add library/ prefix
-		full_repo_name = f"library/{repo_name}"
-	else:
-		# User image - use as-is
-		full_repo_name = repo_name
-
-	url = f"https://hub.docker.com/v2/repositories/{full_repo_name}/tags?page_size=99"
-	try:
-		response = requests.get(url, timeout=10)
-		if response.status_code == 404:
-			raise Exception(f'Repository not found: {repo_name}')
-		elif response.status_code != 200:
-			raise Exception(f'Error calling to {url}: {response.status_code}')
-
-		data = response.json()
-		tags = data.get('results', [])
-		filtered_tags = []
-		for tag in tags:
-			images = tag.get('images', [])
-			for image in images:
-				if image['architecture'] == architecture:
-					filtered_tags.append(tag['name'])
-					break
-
-		# If no tags found for this architecture, return all tags
-		if not filtered_tags and tags:
-			debug(f"No tags found for architecture {architecture} in {repo_name}, returning all tags")
-			filtered_tags = [tag['name'] for tag in tags]
-
-		return filtered_tags
-	except Exception as e:
-		error(f"Error getting tags from DockerHub for {repo_name}: {e}")
-		raise
-
-def get_docker_tags_from_ghcr(repo_name):
-	"""Get tags from ghcr.io using Docker Registry V2 API"""
-	try:
-		# Get auth token
-		token_url = f'https://ghcr.io/token?service=ghcr.io&scope=repository:{repo_name}:pull'
-		token = requests.get(token_url, timeout=10).json().get('token')
-		if not token:
-			return ['latest']
-
-		# Get tags
-		tags_url = f'https://ghcr.io/v2/{repo_name}/tags/list'
-		tags = requests.get(tags_url, headers={'Authorization': f'Bearer {token}'}, timeout=10).json().get('tags', [])
-
-		if not tags:
-			return ['latest']
-
-		# Sort: version tags first (newest), then others
-		version_tags = sorted([t for t in tags if t and t[0] == 'v' and any(c.isdigit() for c in t)], reverse=True)
-		other_tags = sorted([t for t in tags if t not in version_tags])
-
-		return (version_tags + other_tags)[:20]  # Limit to 20
-
-	except Exception as e:
-		error(f"Error getting tags from ghcr.io/{repo_name}: {e}")
-		return ['latest']
+	"""Get available tags for a Docker image (newest version first, cached)"""
+	debug(f"Getting tags for {repo_name}")
+	return tag_catalog.get_tags(repo_name)
 
 # Global schedule monitor instance (used by /schedule command)
 schedule_monitor = None
 
 if __name__ == '__main__':
 	debug(f"Starting bot version {VERSION}")
+	try:
+		debug(f"Running as @{get_bot_identity().username}")
+	except Exception as e:
+		error(f"Could not get bot identity, it will be retried on demand: [{e}]")
+
+	docker_manager.daemon_info.refresh()
 
 	eventMonitor = DockerEventMonitor()
 	eventMonitor.demonio_event()
@@ -5790,6 +6595,13 @@ if __name__ == '__main__':
 	schedule_monitor.demonio_schedule()
 	debug("Schedule daemon started")
 
+	if STATS_SAMPLE_SECONDS > 0:
+		alert_monitor = DockerResourceAlertMonitor()
+		alert_monitor.demonio_alert()
+		stats_sampler.start()
+	else:
+		debug("Stats sampler disabled, resource alerts are not available")
+
 	bot.set_my_commands([
 		telebot.types.BotCommand("/start", get_text("menu_start")),
 		telebot.types.BotCommand("/list", get_text("menu_list")),
@@ -5803,12 +6615,14 @@ if __name__ == '__main__':
 		telebot.types.BotCommand("/changetag", get_text("menu_change_tag")),
 		telebot.types.BotCommand("/logs", get_text("menu_logs")),
 		telebot.types.BotCommand("/logfile", get_text("menu_logfile")),
+		telebot.types.BotCommand("/logsearch", get_text("menu_logsearch")),
 		telebot.types.BotCommand("/schedule", get_text("menu_schedule")),
 		telebot.types.BotCommand("/compose", get_text("menu_compose")),
 		telebot.types.BotCommand("/prune", get_text("menu_prune")),
 		telebot.types.BotCommand("/mute", get_text("menu_mute")),
 		telebot.types.BotCommand("/info", get_text("menu_info")),
 		telebot.types.BotCommand("/ports", get_text("menu_ports")),
+		telebot.types.BotCommand("/top", get_text("menu_top")),
 		telebot.types.BotCommand("/version", get_text("menu_version")),
 		telebot.types.BotCommand("/donate", get_text("menu_donate")),
 		telebot.types.BotCommand("/donors", get_text("menu_donors"))
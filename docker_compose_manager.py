@@ -2,8 +2,12 @@
 Docker Compose Manager
 Manages containers that are part of Docker Compose projects
 """
+import heapq
+import threading
+from collections import deque
+
 import docker
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 
 # Standard Docker Compose labels
 COMPOSE_PROJECT_LABEL = 'com.docker.compose.project'
@@ -13,6 +17,136 @@ COMPOSE_CONFIG_FILES_LABEL = 'com.docker.compose.project.config_files'
 COMPOSE_DEPENDS_ON_LABEL = 'com.docker.compose.depends_on'
 
 
+def parse_depends_on(depends_on: str) -> Dict[str, str]:
+    """
+    Parses the `com.docker.compose.depends_on` label.
+
+    The format can be:
+    - "service1,service2"
+    - "service1:service_started:false,service2:service_healthy:false"
+
+    Returns:
+        dict: {service name: condition}, in label order. The short form has
+        no explicit condition and is equivalent to 'service_started'.
+    """
+    dependencies = {}
+    for dep in (depends_on or '').split(','):
+        parts = dep.strip().split(':')
+        service_name = parts[0].strip()
+        if not service_name or service_name in dependencies:
+            continue
+        # Long form: "service:condition[:restart]"
+        condition = parts[1].strip() if len(parts) >= 2 else ''
+        dependencies[service_name] = condition or 'service_started'
+    return dependencies
+
+
+class DependencyGraph:
+    """
+    Dependency graph of the services of a Compose project, parsed once from
+    the depends_on labels. Works with service names only, so it can be
+    cached while the container objects it was built from get refreshed.
+    """
+
+    def __init__(self, depends_on_labels: Dict[str, str]):
+        """
+        Args:
+            depends_on_labels: {service name: depends_on label value}
+        """
+        self.services = sorted(depends_on_labels)
+        # conditions[service][dependency] = condition, only for services of this project
+        self.conditions = {}
+        # dependencies[service] = services it depends on; dependents = reverse adjacency
+        self.dependencies = {}
+        self.dependents = {service: [] for service in self.services}
+        for service in self.services:
+            parsed = parse_depends_on(depends_on_labels[service])
+            conditions = {dep: condition for dep, condition in parsed.items() if dep in self.dependents and dep != service}
+            self.conditions[service] = conditions
+            self.dependencies[service] = list(conditions)
+            for dep in conditions:
+                self.dependents[dep].append(service)
+
+        self.order, self.levels, self.cycles = self._sort()
+        self._position = {service: index for index, service in enumerate(self.order)}
+
+    def _sort(self) -> Tuple[List[str], List[List[str]], List[List[str]]]:
+        """
+        Kahn's algorithm with a heap, so the order is deterministic (the
+        alphabetically smallest ready service goes first). Each service's
+        level is one more than the deepest level it depends on.
+
+        Returns:
+            tuple: (order, levels, cycles). Services in or behind a cycle are
+            appended at the end of the order, one level each.
+        """
+        in_degree = {service: len(deps) for service, deps in self.dependencies.items()}
+        level_of = {}
+        ready = [service for service, degree in in_degree.items() if degree == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            service = heapq.heappop(ready)
+            order.append(service)
+            level_of[service] = 1 + max((level_of[dep] for dep in self.dependencies[service]), default=-1)
+            for dependent in self.dependents[service]:
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    heapq.heappush(ready, dependent)
+
+        levels = [[] for _ in range(1 + max(level_of.values(), default=-1))]
+        for service in order:
+            levels[level_of[service]].append(service)
+
+        cycles = []
+        remaining = [service for service in self.services if service not in level_of]
+        if remaining:
+            cycles = self._find_cycles(set(remaining))
+            order.extend(remaining)
+            levels.extend([service] for service in remaining)
+        return order, levels, cycles
+
+    def _find_cycles(self, remaining: Set[str]) -> List[List[str]]:
+        """Returns the dependency cycles among the services the sort could not place"""
+        cycles = []
+        visited = set()
+        for start in sorted(remaining):
+            if start in visited:
+                continue
+            # Follow dependencies until a service repeats: every unplaced
+            # service depends on at least one other unplaced service
+            path = []
+            on_path = {}
+            service = start
+            while service not in on_path and service not in visited:
+                on_path[service] = len(path)
+                path.append(service)
+                service = min(dep for dep in self.dependencies[service] if dep in remaining)
+            if service in on_path:
+                cycles.append(path[on_path[service]:] + [service])
+            visited.update(path)
+        return cycles
+
+    def transitive_dependents(self, service: str) -> List[str]:
+        """
+        Returns every service that depends (directly or transitively) on
+        `service`, in dependency order. The service itself is not included.
+        """
+        found = set()
+        queue = deque(self.dependents.get(service, ()))
+        while queue:
+            dependent = queue.popleft()
+            if dependent in found or dependent == service:
+                continue
+            found.add(dependent)
+            queue.extend(self.dependents[dependent])
+        return sorted(found, key=self._position.__getitem__)
+
+    def condition(self, service: str, dependency: str) -> Optional[str]:
+        """Returns the depends_on condition `service` declared on `dependency`, or None"""
+        return self.conditions.get(service, {}).get(dependency)
+
+
 class ComposeProjectInfo:
     """Information about a Docker Compose project"""
 
@@ -128,8 +262,14 @@ class ComposeDetector:
 class ComposeProjectManager:
     """Manages operations on entire Docker Compose projects"""
 
-    def __init__(self, client=None):
+    def __init__(self, client=None, inventory=None):
         self.client = client or docker.from_env()
+        # Optional ContainerInventory; when given, containers are read from it
+        # instead of listing (and inspecting) them through the API every time
+        self.inventory = inventory
+        # Parsed dependency graphs, keyed by the depends_on labels they were built from
+        self._graphs = {}
+        self._graphs_lock = threading.Lock()
 
     def get_all_projects(self) -> Dict[str, ComposeProjectInfo]:
         """
@@ -138,7 +278,10 @@ class ComposeProjectManager:
         Returns:
             dict: Dictionary {project_name: ComposeProjectInfo}
         """
-        all_containers = self.client.containers.list(all=True)
+        if self.inventory is not None:
+            all_containers = self.inventory.list()
+        else:
+            all_containers = self.client.containers.list(all=True)
         projects = {}
 
         for container in all_containers:
@@ -165,6 +308,8 @@ class ComposeProjectManager:
         Returns:
             list: List of containers in the project
         """
+        if self.inventory is not None:
+            return self.inventory.get_project(project_name)
         filters = {
             'label': f'{COMPOSE_PROJECT_LABEL}={project_name}'
         }
@@ -195,24 +340,7 @@ class ComposeProjectManager:
         Returns:
             list: List of service names this service depends on
         """
-        depends_on = container.labels.get(COMPOSE_DEPENDS_ON_LABEL, '')
-        if not depends_on:
-            return []
-
-        # The format can be:
-        # - "service1,service2"
-        # - "service1:service_started:false,service2:service_started:false"
-        # We need to extract only the service name
-        dependencies = []
-        for dep in depends_on.split(','):
-            dep = dep.strip()
-            if dep:
-                # Extract only the service name (before the first ':')
-                service_name = dep.split(':')[0].strip()
-                if service_name:
-                    dependencies.append(service_name)
-
-        return dependencies
+        return list(parse_depends_on(container.labels.get(COMPOSE_DEPENDS_ON_LABEL, '')))
 
     def get_dependency_condition(self, container, parent_service_name: str) -> Optional[str]:
         """
@@ -225,92 +353,87 @@ class ComposeProjectManager:
         entry for that parent (or uses the short list form, which has no
         explicit condition and is equivalent to 'service_started').
         """
-        depends_on = container.labels.get(COMPOSE_DEPENDS_ON_LABEL, '')
-        if not depends_on:
-            return None
+        return parse_depends_on(container.labels.get(COMPOSE_DEPENDS_ON_LABEL, '')).get(parent_service_name)
 
-        for dep in depends_on.split(','):
-            dep = dep.strip()
-            if not dep:
-                continue
-            parts = dep.split(':')
-            if parts[0].strip() != parent_service_name:
-                continue
-            # Long form: "service:condition[:restart]"
-            if len(parts) >= 2 and parts[1].strip():
-                return parts[1].strip()
-            # Short form: bare service name, no explicit condition
-            return 'service_started'
-
-        return None
-
-    def sort_containers_by_dependencies(self, containers: List) -> List:
+    def get_dependency_graph(self, containers: List) -> DependencyGraph:
         """
-        Sorts containers by their dependencies (topological sort).
-        Containers without dependencies come first.
+        Returns the dependency graph of a project's containers.
+
+        Graphs are cached by their depends_on labels, so they are only
+        parsed and sorted again when a service is added, removed or its
+        dependencies change.
 
         Args:
-            containers: List of containers to sort
+            containers: Containers of the Compose project
 
         Returns:
-            list: Containers sorted according to dependencies
+            DependencyGraph
         """
-        # Build service -> container map
-        service_to_container = {}
+        depends_on_labels = {}
         for container in containers:
             service_name = ComposeDetector.get_service_name(container)
             if service_name:
-                service_to_container[service_name] = container
+                depends_on_labels[service_name] = container.labels.get(COMPOSE_DEPENDS_ON_LABEL, '')
+        key = tuple(sorted(depends_on_labels.items()))
+        with self._graphs_lock:
+            graph = self._graphs.get(key)
+        if graph is None:
+            graph = DependencyGraph(depends_on_labels)
+            with self._graphs_lock:
+                # Projects come and go; a small bound is enough for the ones in use
+                if len(self._graphs) >= 64:
+                    self._graphs.clear()
+                self._graphs[key] = graph
+        return graph
 
-        # Build dependency graph
-        # dependencies[service] = [list of services it depends on]
-        dependencies = {}
+    @staticmethod
+    def _services_to_containers(containers: List, services: List[str]) -> List:
+        service_to_container = {}
         for container in containers:
             service_name = ComposeDetector.get_service_name(container)
             if service_name:
-                deps = self.get_service_dependencies(container)
-                # Keep only dependencies that exist in this project
-                deps = [d for d in deps if d in service_to_container]
-                dependencies[service_name] = deps
+                service_to_container[service_name] = container
+        return [service_to_container[service] for service in services if service in service_to_container]
 
-        # Topological sort (Kahn's algorithm)
-        # Compute in-degree (number of services each one depends on)
-        in_degree = {service: len(deps) for service, deps in dependencies.items()}
+    def get_dependency_levels(self, containers: List) -> List[List]:
+        """
+        Groups containers into dependency levels (topological sort by levels).
+        The first level holds the services without dependencies, and each
+        following level only depends on services of earlier levels, so all
+        the containers of a level can be started (or stopped) at the same time.
 
-        # Queue with services without dependencies (in-degree = 0)
-        queue = [service for service, degree in in_degree.items() if degree == 0]
-        sorted_services = []
+        Args:
+            containers: List of containers to group
 
-        while queue:
-            # Sort alphabetically for consistency
-            queue.sort()
-            service = queue.pop(0)
-            sorted_services.append(service)
-
-            # For each service depending on the current one, reduce its in-degree
-            for other_service, deps in dependencies.items():
-                if service in deps and other_service not in sorted_services:
-                    in_degree[other_service] -= 1
-                    if in_degree[other_service] == 0:
-                        queue.append(other_service)
-
-        # If there are cycles, append remaining services at the end
-        remaining = [s for s in service_to_container.keys() if s not in sorted_services]
-        sorted_services.extend(sorted(remaining))
-
-        # Convert sorted services back to containers
-        sorted_containers = []
-        for service in sorted_services:
-            if service in service_to_container:
-                sorted_containers.append(service_to_container[service])
+        Returns:
+            list: List of levels, each one a list of containers
+        """
+        graph = self.get_dependency_graph(containers)
+        container_levels = [self._services_to_containers(containers, level) for level in graph.levels]
 
         # Append orphan containers (project label set but no service label):
         # they don't participate in the dependency graph but should still be
         # acted upon by project-wide operations (run/stop/restart/delete).
-        for container in containers:
-            if not ComposeDetector.get_service_name(container):
-                sorted_containers.append(container)
+        orphans = [container for container in containers if not ComposeDetector.get_service_name(container)]
+        if orphans:
+            container_levels.append(orphans)
+
+        return container_levels
 
+    def sort_containers_by_dependencies(self, containers: List) -> List:
+        """
+        Sorts containers by their dependencies (topological sort).
+        Containers without dependencies come first.
+
+        Args:
+            containers: List of containers to sort
+
+        Returns:
+            list: Containers sorted according to dependencies
+        """
+        graph = self.get_dependency_graph(containers)
+        sorted_containers = self._services_to_containers(containers, graph.order)
+        sorted_containers.extend(container for container in containers if not ComposeDetector.get_service_name(container))
         return sorted_containers
 
     def get_transitive_dependents(self, containers: List, target_service_name: str) -> List:
@@ -327,37 +450,5 @@ class ComposeProjectManager:
         Returns:
             list: Containers that depend on target_service_name, sorted by dependency order
         """
-        # Build service -> container map and reverse-dependency graph (who depends on whom)
-        service_to_container = {}
-        for container in containers:
-            service_name = ComposeDetector.get_service_name(container)
-            if service_name:
-                service_to_container[service_name] = container
-
-        # reverse_deps[service] = [services that depend on it]
-        reverse_deps = {service: [] for service in service_to_container.keys()}
-        for container in containers:
-            service_name = ComposeDetector.get_service_name(container)
-            if not service_name:
-                continue
-            for dep in self.get_service_dependencies(container):
-                if dep in reverse_deps:
-                    reverse_deps[dep].append(service_name)
-
-        # BFS from target to collect all transitive dependents
-        dependents = set()
-        queue = list(reverse_deps.get(target_service_name, []))
-        while queue:
-            service = queue.pop(0)
-            if service in dependents or service == target_service_name:
-                continue
-            dependents.add(service)
-            queue.extend(reverse_deps.get(service, []))
-
-        if not dependents:
-            return []
-
-        # Sort dependents using the existing topological sort, then filter
-        dependent_containers = [service_to_container[s] for s in dependents if s in service_to_container]
-        return self.sort_containers_by_dependencies(dependent_containers)
-
+        graph = self.get_dependency_graph(containers)
+        return self._services_to_containers(containers, graph.transitive_dependents(target_service_name))
@@ -333,7 +333,7 @@ def extract_container_config(container, tag=None):
 
 def perform_update(client, container, config, container_name, message, edit_message_func,
 				   debug_func, error_func, get_text_func, save_status_func,
-				   container_id_length, telegram_group, skip_pull=False):
+				   container_id_length, telegram_group, skip_pull=False, pre_pulled=False):
 	"""
 	Perform the actual container update with the extracted configuration.
 	Uses a lock to prevent concurrent updates of the same container.
@@ -354,6 +354,9 @@ def perform_update(client, container, config, container_name, message, edit_mess
 		skip_pull: When True, skip the image pull step. Used for in-place
 			recreation with the same image (e.g. when a dependent must be
 			recreated to point at a new parent container id).
+		pre_pulled: When True, the new image was already pulled by the caller
+			(bulk updates pull every image first). The pull step is skipped
+			but, unlike skip_pull, the old image is still removed.
 
 	Returns:
 		str: Success or error message
@@ -370,14 +373,14 @@ def perform_update(client, container, config, container_name, message, edit_mess
 	try:
 		return _perform_update_locked(client, container, config, container_name, message, edit_message_func,
 									   debug_func, error_func, get_text_func, save_status_func,
-									   container_id_length, telegram_group, skip_pull=skip_pull)
+									   container_id_length, telegram_group, skip_pull=skip_pull, pre_pulled=pre_pulled)
 	finally:
 		container_lock.release()
 
 
 def _perform_update_locked(client, container, config, container_name, message, edit_message_func,
 						   debug_func, error_func, get_text_func, save_status_func,
-						   container_id_length, telegram_group, skip_pull=False):
+						   container_id_length, telegram_group, skip_pull=False, pre_pulled=False):
 	"""
 	Internal function that performs the actual update (called with lock held).
 	"""
@@ -392,6 +395,8 @@ def _perform_update_locked(client, container, config, container_name, message, e
 		# Pull new image with timeout validation
 		if skip_pull:
 			debug_func(f"[PULL_IMAGE] Skipping pull for {container_name} (in-place recreation)")
+		elif pre_pulled:
+			debug_func(f"[PULL_IMAGE] Skipping pull for {container_name} (image {config['image']} already pulled)")
 		else:
 			if message:
 				edit_message_func(get_text_func("updating_pulling_image", container_name), telegram_group, message.message_id)
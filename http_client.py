@@ -0,0 +1,135 @@
+"""
+HTTP Client Module
+Shared HTTP client for the registry, Docker Hub and donors calls. Connections
+are pooled and kept alive, failed requests are retried with backoff honouring
+Retry-After, and registry bearer tokens are reused until they expire.
+"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+
+from logger import debug
+
+HTTP_POOL_SIZE = 10
+HTTP_CONNECT_TIMEOUT = 5
+HTTP_READ_TIMEOUT = 10
+HTTP_RETRIES = 3
+HTTP_BACKOFF_FACTOR = 0.5
+# Longest Retry-After honoured; a registry asking for more gets its response returned instead of retried
+HTTP_RETRY_AFTER_MAX = 30
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Lifetime assumed when the token server omits expires_in (Docker token spec default)
+TOKEN_DEFAULT_EXPIRES = 60
+# Tokens are dropped this many seconds before they really expire
+TOKEN_EXPIRY_MARGIN = 10
+
+
+class _CappedRetry(Retry):
+	"""Retry that gives up instead of waiting longer than HTTP_RETRY_AFTER_MAX for a Retry-After"""
+
+	def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+		if response is not None and self.respect_retry_after_header:
+			retry_after = self.get_retry_after(response)
+			if retry_after is not None and retry_after > HTTP_RETRY_AFTER_MAX:
+				# With raise_on_status=False the caller gets the 429/503 response itself
+				raise MaxRetryError(_pool, url, ResponseError(f"Retry-After of {retry_after:.0f}s is over {HTTP_RETRY_AFTER_MAX}s"))
+		return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+class HttpClient:
+	"""Pooled requests.Session plus a cache of registry bearer tokens"""
+
+	def __init__(self, pool_size=HTTP_POOL_SIZE, connect_timeout=HTTP_CONNECT_TIMEOUT, read_timeout=HTTP_READ_TIMEOUT,
+			retries=HTTP_RETRIES, backoff_factor=HTTP_BACKOFF_FACTOR):
+		"""
+		Initialize HttpClient
+
+		Args:
+			pool_size: Connections kept alive per host
+			connect_timeout: Seconds to establish a connection
+			read_timeout: Seconds to wait for the response
+			retries: Retries of idempotent requests on connection errors and 429/5xx
+			backoff_factor: Base of the exponential backoff between retries
+		"""
+		self.timeout = (connect_timeout, read_timeout)
+		retry = _CappedRetry(
+			total=retries,
+			backoff_factor=backoff_factor,
+			status_forcelist=HTTP_RETRY_STATUSES,
+			allowed_methods=frozenset({"GET", "HEAD"}),
+			respect_retry_after_header=True,
+			raise_on_status=False,
+		)
+		adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+		self.session = requests.Session()
+		self.session.mount("https://", adapter)
+		self.session.mount("http://", adapter)
+		self._tokens = {}  # (realm, service, scope, user) -> (token, expires at)
+		self._tokens_lock = threading.Lock()
+
+	def request(self, method, url, **kwargs):
+		"""Same as requests.request, over the pooled session and with the default timeouts"""
+		kwargs.setdefault("timeout", self.timeout)
+		return self.session.request(method, url, **kwargs)
+
+	def get(self, url, **kwargs):
+		return self.request("GET", url, **kwargs)
+
+	def head(self, url, **kwargs):
+		return self.request("HEAD", url, **kwargs)
+
+	@staticmethod
+	def _token_key(realm, service, scope, auth):
+		return (realm, service, scope, auth[0] if auth else None)
+
+	def get_token(self, realm, service=None, scope=None, auth=None):
+		"""
+		Returns a bearer token from a registry token server, reusing a cached
+		one for the same realm, service and scope until it expires.
+
+		Args:
+			realm: Token server URL (from the WWW-Authenticate challenge)
+			service: Optional service parameter
+			scope: Optional scope, e.g. "repository:owner/repo:pull"
+			auth: Optional (username, password)
+
+		Returns:
+			The token, or None if the server did not return one
+		"""
+		key = self._token_key(realm, service, scope, auth)
+		now = time.monotonic()
+		with self._tokens_lock:
+			cached = self._tokens.get(key)
+			if cached and cached[1] > now:
+				return cached[0]
+
+		params = {}
+		if service:
+			params["service"] = service
+		if scope:
+			params["scope"] = scope
+		response = self.get(realm, params=params, auth=auth)
+		response.raise_for_status()
+		data = response.json()
+		token = data.get("token") or data.get("access_token")
+		if not token:
+			return None
+
+		expires_in = data.get("expires_in") or TOKEN_DEFAULT_EXPIRES
+		with self._tokens_lock:
+			for cached_key in [cached_key for cached_key, (_, expires_at) in self._tokens.items() if expires_at <= now]:
+				del self._tokens[cached_key]
+			self._tokens[key] = (token, now + max(0, expires_in - TOKEN_EXPIRY_MARGIN))
+		debug(f"Got registry token for {scope or realm}, valid for {expires_in}s")
+		return token
+
+	def invalidate_token(self, realm, service=None, scope=None, auth=None):
+		"""Forgets a cached token the registry rejected"""
+		with self._tokens_lock:
+			self._tokens.pop(self._token_key(realm, service, scope, auth), None)
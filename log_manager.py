@@ -0,0 +1,527 @@
+"""
+Log Manager Module
+Reads container logs without loading the whole history into memory
+"""
+
+import gzip
+import json
+import os
+import re
+import select
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from logger import debug, error
+
+# /logs starts with this many lines and multiplies them until the message is full
+LOG_TAIL_INITIAL_LINES = 100
+LOG_TAIL_GROWTH = 4
+LOG_TAIL_MAX_LINES = 100000
+
+# A UTF-8 character is at most 4 bytes
+UTF8_MAX_CHAR_BYTES = 4
+
+# Telegram bots can upload documents up to 50 MB; keep a margin for the gzip trailer
+LOG_EXPORT_PART_SIZE = 45 * 1024 * 1024
+# Parts are kept in memory up to this size, then spill to a temporary file
+LOG_EXPORT_SPOOL_SIZE = 1024 * 1024
+
+# /logsearch scans a tail of this many lines and multiplies it until enough
+# matches are found or the whole log has been searched
+LOG_SEARCH_INITIAL_LINES = 1000
+LOG_SEARCH_GROWTH = 10
+LOG_SEARCH_MAX_MATCHES = 20
+LOG_SEARCH_CONTEXT_LINES = 2
+# Budgets so a slow pattern on a huge log can't hold a bot worker for long
+LOG_SEARCH_TIMEOUT = 15
+LOG_SEARCH_MAX_BYTES = 256 * 1024 * 1024
+# Longer lines are cut before matching, it also bounds the regex work per line
+LOG_SEARCH_MAX_LINE_CHARS = 1000
+# Lines sent at once to the process that runs the regex
+LOG_SEARCH_BATCH_LINES = 500
+
+# The regex runs in a child process: re holds the GIL for a whole match, so
+# a catastrophic pattern matched in-process would freeze every thread of the
+# bot and could not be interrupted. The child is killed when the budget ends.
+_REGEX_WORKER_CODE = '''
+import json, re, sys
+header = json.loads(sys.stdin.readline())
+regex = re.compile(header["pattern"], header["flags"])
+for batch in sys.stdin:
+    matched = [index for index, line in enumerate(json.loads(batch)) if regex.search(line)]
+    sys.stdout.write(json.dumps(matched) + "\\n")
+    sys.stdout.flush()
+'''
+
+
+class RegexWorker:
+	"""Matches batches of lines against a regex in a child process that can be killed"""
+
+	def __init__(self, regex):
+		"""
+		Args:
+			regex: Compiled regular expression (its pattern and flags are sent to the child)
+		"""
+		self.process = subprocess.Popen(
+			[sys.executable, "-c", _REGEX_WORKER_CODE],
+			stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+		)
+		self._buffer = b""
+		self._send({"pattern": regex.pattern, "flags": regex.flags})
+
+	def _send(self, data):
+		self.process.stdin.write((json.dumps(data) + "\n").encode())
+		self.process.stdin.flush()
+
+	def match(self, lines, deadline):
+		"""
+		Returns the set of indexes of the lines that match.
+
+		Raises:
+			TimeoutError: deadline (time.monotonic()) passed before the child answered
+		"""
+		self._send(lines)
+		fd = self.process.stdout.fileno()
+		while b"\n" not in self._buffer:
+			remaining = deadline - time.monotonic()
+			if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+				raise TimeoutError("regex search time budget exceeded")
+			chunk = os.read(fd, 65536)
+			if not chunk:
+				raise RuntimeError("regex worker exited unexpectedly")
+			self._buffer += chunk
+		answer, self._buffer = self._buffer.split(b"\n", 1)
+		return set(json.loads(answer))
+
+	def close(self):
+		self.process.kill()
+		self.process.wait()
+		self.process.stdin.close()
+		self.process.stdout.close()
+
+# Live follow of /logs: lines kept in the window, seconds between message
+# edits, how long a follow lasts and how many can run at once
+LOG_FOLLOW_TAIL_LINES = 50
+LOG_FOLLOW_INTERVAL = 4
+LOG_FOLLOW_TIMEOUT = 300
+LOG_FOLLOW_MAX_ACTIVE = 3
+
+_RELATIVE_TIME_RE = re.compile(r"^(\d+)([smhdw])$")
+_RELATIVE_TIME_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+def parse_log_time(value, now=None):
+	"""
+	Parse a log time boundary.
+
+	Args:
+		value: Relative duration ("30m", "2h", "7d", "1w") meaning that long
+			ago, or an ISO date/datetime ("2024-05-01", "2024-05-01T10:00")
+		now: Reference time for relative values (defaults to now)
+
+	Returns:
+		datetime, or None if the value is not valid
+	"""
+	value = (value or "").strip().lower()
+	match = _RELATIVE_TIME_RE.match(value)
+	if match:
+		amount, unit = match.groups()
+		return (now or datetime.now()) - timedelta(**{_RELATIVE_TIME_UNITS[unit]: int(amount)})
+	try:
+		return datetime.fromisoformat(value)
+	except ValueError:
+		return None
+
+
+def decode_utf8_tail(data, max_chars):
+	"""
+	Decode the last max_chars characters of a UTF-8 byte string.
+
+	Only the last max_chars * 4 bytes are decoded. When that cut lands in
+	the middle of a multi-byte character, its continuation bytes are
+	skipped instead of producing replacement characters.
+
+	Args:
+		data: Raw bytes
+		max_chars: Maximum number of characters to return
+
+	Returns:
+		str with at most max_chars characters
+	"""
+	cut = data[-max_chars * UTF8_MAX_CHAR_BYTES:]
+	start = 0
+	if len(cut) < len(data):
+		while start < len(cut) and start < UTF8_MAX_CHAR_BYTES and (cut[start] & 0xC0) == 0x80:
+			start += 1
+	return cut[start:].decode("utf-8", errors="replace")[-max_chars:]
+
+
+class LogManager:
+	"""Bounded and streaming access to container logs"""
+
+	def __init__(self, max_follows=LOG_FOLLOW_MAX_ACTIVE):
+		"""
+		Initialize LogManager
+
+		Args:
+			max_follows: Maximum number of live follows running at once
+		"""
+		self.max_follows = max_follows
+		self._follows = {}  # key -> {"stop": Event, "streams": [...], "finish": bool}
+		self._follows_lock = threading.Lock()
+
+	def read_tail(self, container, max_chars):
+		"""
+		Returns the last max_chars characters of a container's logs.
+
+		Asks Docker for a bounded tail and keeps stepping backwards
+		(LOG_TAIL_GROWTH times more lines each time) until the text is long
+		enough, the whole log has been read or LOG_TAIL_MAX_LINES is reached.
+
+		Args:
+			container: Docker SDK container object
+			max_chars: Number of characters wanted
+
+		Returns:
+			str
+		"""
+		lines = LOG_TAIL_INITIAL_LINES
+		while True:
+			data = container.logs(tail=lines)
+			text = decode_utf8_tail(data, max_chars)
+			# Fewer lines than requested means the whole log was returned
+			returned_lines = data.count(b"\n") + (1 if data and not data.endswith(b"\n") else 0)
+			if len(text) >= max_chars or returned_lines < lines or lines >= LOG_TAIL_MAX_LINES:
+				debug(f"Read {len(data)} bytes ({lines} lines) of logs from {container.name}")
+				return text
+			lines = min(lines * LOG_TAIL_GROWTH, LOG_TAIL_MAX_LINES)
+
+	def export(self, container, since=None, until=None, max_bytes=None, part_size=LOG_EXPORT_PART_SIZE):
+		"""
+		Streams a container's logs into gzip compressed parts.
+
+		Chunks go straight from the Docker stream into the compressor and a
+		spooled temporary file, so memory use does not depend on the log
+		size. A new part is started when the current one reaches part_size.
+		When the compressed total exceeds max_bytes the oldest parts are
+		dropped, keeping the most recent logs.
+
+		Args:
+			container: Docker SDK container object
+			since: Optional datetime, only logs after it
+			until: Optional datetime, only logs before it
+			max_bytes: Optional limit for the compressed size of all parts
+			part_size: Maximum compressed size of each part
+
+		Returns:
+			tuple (parts, truncated): list of file objects positioned at the
+			start (the caller closes them) and whether old parts were dropped
+		"""
+		if max_bytes:
+			part_size = min(part_size, max_bytes)
+		parts = deque()
+		sizes = deque()
+		truncated = False
+		current = None
+		compressor = None
+		total_in = 0
+
+		def close_part():
+			compressor.close()
+			sizes.append(current.tell())
+			parts.append(current)
+
+		logs_kwargs = {"stream": True, "follow": False}
+		if since:
+			logs_kwargs["since"] = since
+		if until:
+			logs_kwargs["until"] = until
+
+		for chunk in container.logs(**logs_kwargs):
+			if current is None:
+				current = tempfile.SpooledTemporaryFile(max_size=LOG_EXPORT_SPOOL_SIZE)
+				compressor = gzip.GzipFile(fileobj=current, mode="wb")
+			compressor.write(chunk)
+			total_in += len(chunk)
+			if current.tell() >= part_size:
+				close_part()
+				current = None
+				while max_bytes and len(parts) > 1 and sum(sizes) > max_bytes:
+					parts.popleft().close()
+					sizes.popleft()
+					truncated = True
+
+		if current is not None:
+			close_part()
+		while max_bytes and len(parts) > 1 and sum(sizes) > max_bytes:
+			parts.popleft().close()
+			sizes.popleft()
+			truncated = True
+
+		for part in parts:
+			part.seek(0)
+		debug(f"Exported {total_in} bytes of logs from {container.name} into {len(parts)} parts ({sum(sizes)} bytes compressed)")
+		return list(parts), truncated
+
+	def _iter_lines(self, chunks):
+		"""Splits a stream of byte chunks into lines (without the newline)"""
+		pending = b""
+		for chunk in chunks:
+			pending += chunk
+			lines = pending.split(b"\n")
+			pending = lines.pop()
+			yield from lines
+		if pending:
+			yield pending
+
+	@staticmethod
+	def _drop_oldest_match(blocks, context):
+		"""Removes the oldest match and the context lines that only belonged to it"""
+		block = blocks[0]
+		while block and not block[0][0]:
+			block.pop(0)
+		if block:
+			block.pop(0)
+		leading = 0
+		while leading < len(block) and not block[leading][0]:
+			leading += 1
+		if leading == len(block):
+			blocks.popleft()
+		elif leading > context:
+			del block[:leading - context]
+		return 1
+
+	def search(self, container, regex, since=None, max_matches=LOG_SEARCH_MAX_MATCHES,
+			context=LOG_SEARCH_CONTEXT_LINES, timeout=LOG_SEARCH_TIMEOUT, max_bytes=LOG_SEARCH_MAX_BYTES):
+		"""
+		Finds the last lines of a container's logs matching a regex.
+
+		The logs are streamed line by line, only the context window and the
+		blocks found so far are kept in memory. The search starts with a
+		tail of LOG_SEARCH_INITIAL_LINES and grows it LOG_SEARCH_GROWTH
+		times until max_matches are found or the whole log was searched,
+		so a frequent pattern only reads the end of the log. It gives up
+		when timeout seconds or max_bytes read are exceeded. The regex runs
+		in a RegexWorker process, so the timeout also bounds a pattern with
+		catastrophic backtracking.
+
+		Args:
+			container: Docker SDK container object
+			regex: Compiled regular expression
+			since: Optional datetime, only logs after it
+			max_matches: Number of matching lines wanted
+			context: Lines of context shown before and after each match
+			timeout: Time budget in seconds
+			max_bytes: Budget of bytes read from Docker
+
+		Returns:
+			tuple (blocks, bytes_read, budget_exceeded): blocks is a list of
+			the most recent groups of consecutive lines, oldest first, each a
+			list of (is_match, line) tuples
+		"""
+		deadline = time.monotonic() + timeout
+		worker = RegexWorker(regex)
+		try:
+			return self._search(container, worker, since, max_matches, context, deadline, max_bytes)
+		finally:
+			worker.close()
+
+	def _matched_lines(self, stream, worker, deadline, budget):
+		"""
+		Yields (line, is_match) for the lines of a log stream, matched in
+		batches by the worker. Stops and sets budget["exceeded"] when
+		budget["bytes_left"] or the deadline run out.
+		"""
+		batch = []
+		for raw_line in self._iter_lines(stream):
+			budget["bytes_left"] -= len(raw_line) + 1
+			if budget["bytes_left"] < 0 or time.monotonic() > deadline:
+				budget["exceeded"] = True
+				return
+			line = raw_line[:LOG_SEARCH_MAX_LINE_CHARS * UTF8_MAX_CHAR_BYTES].decode("utf-8", errors="replace")
+			batch.append(line.rstrip("\r")[:LOG_SEARCH_MAX_LINE_CHARS])
+			if len(batch) >= LOG_SEARCH_BATCH_LINES:
+				timed_out = yield from self._match_batch(batch, worker, deadline, budget)
+				if timed_out:
+					return
+				batch = []
+		if batch:
+			yield from self._match_batch(batch, worker, deadline, budget)
+
+	@staticmethod
+	def _match_batch(batch, worker, deadline, budget):
+		try:
+			matched = worker.match(batch, deadline)
+		except TimeoutError:
+			budget["exceeded"] = True
+			return True
+		for index, line in enumerate(batch):
+			yield line, index in matched
+		return False
+
+	def _search(self, container, worker, since, max_matches, context, deadline, max_bytes):
+		budget = {"bytes_left": max_bytes, "exceeded": False}
+		lines = LOG_SEARCH_INITIAL_LINES
+		while True:
+			logs_kwargs = {"stream": True, "follow": False, "tail": lines}
+			if since:
+				logs_kwargs["since"] = since
+			stream = container.logs(**logs_kwargs)
+			blocks = deque()
+			matches = 0
+			before = deque(maxlen=context)
+			after = 0
+			last_line = None
+			line_number = 0
+			try:
+				for line, is_match in self._matched_lines(stream, worker, deadline, budget):
+					line_number += 1
+					if is_match:
+						# Join the previous block when the context windows touch
+						if blocks and last_line is not None and line_number - last_line <= len(before) + 1:
+							block = blocks[-1]
+						else:
+							block = []
+							blocks.append(block)
+						block.extend((False, context_line) for context_line in before)
+						block.append((True, line))
+						before.clear()
+						matches += 1
+						after = context
+						last_line = line_number
+						if matches > max_matches:
+							matches -= self._drop_oldest_match(blocks, context)
+					elif after:
+						blocks[-1].append((False, line))
+						after -= 1
+						last_line = line_number
+					else:
+						before.append(line)
+			finally:
+				if budget["exceeded"] and hasattr(stream, "close"):
+					stream.close()
+			budget_exceeded = budget["exceeded"]
+			bytes_read = max_bytes - budget["bytes_left"]
+			# Fewer lines than requested means the whole log was searched
+			if budget_exceeded or matches >= max_matches or line_number < lines:
+				debug(f"Searched {bytes_read} bytes ({line_number} lines) of logs from {container.name}: {matches} matches")
+				return list(blocks), bytes_read, budget_exceeded
+			lines *= LOG_SEARCH_GROWTH
+
+	def follow(self, key, container, on_update, on_finish, max_chars,
+			tail=LOG_FOLLOW_TAIL_LINES, interval=LOG_FOLLOW_INTERVAL, timeout=LOG_FOLLOW_TIMEOUT):
+		"""
+		Follows a container's logs in the background.
+
+		One thread reads the Docker stream into a rolling window of lines,
+		another calls on_update with the window at most every interval
+		seconds (only if it changed). Everything stops after timeout
+		seconds, when stop_follow(key) is called or when the stream ends.
+
+		Args:
+			key: Identifier of the follow (e.g. chat and message ids)
+			container: Docker SDK container object
+			on_update: Called with the newest max_chars characters of the logs
+			on_finish: Called with the last text once the follow has stopped
+			max_chars: Size of the rolling window in characters
+			tail: Lines shown when the follow starts
+			interval: Minimum seconds between two calls to on_update
+			timeout: Seconds after which the follow stops by itself
+
+		Returns:
+			bool: False if that key is already followed or max_follows are running
+		"""
+		stop = threading.Event()
+		follow_state = {"stop": stop, "streams": [], "finish": True}
+		with self._follows_lock:
+			if key in self._follows or len(self._follows) >= self.max_follows:
+				return False
+			self._follows[key] = follow_state
+
+		window = deque(maxlen=tail)
+		window_lock = threading.Lock()
+		changed = threading.Event()
+
+		def current_text():
+			with window_lock:
+				return decode_utf8_tail(b"\n".join(window), max_chars)
+
+		def read():
+			try:
+				stream = container.logs(stream=True, follow=True, tail=tail)
+				follow_state["streams"].append(stream)
+				if stop.is_set():
+					stream.close()
+					return
+				for line in self._iter_lines(stream):
+					with window_lock:
+						window.append(line)
+					changed.set()
+					if stop.is_set():
+						break
+			except Exception as e:
+				# Closing the stream from stop_follow ends up here too
+				if not stop.is_set():
+					error(f"Error following the logs of {container.name}: [{e}]")
+			finally:
+				stop.set()
+
+		def refresh():
+			deadline = time.monotonic() + timeout
+			try:
+				while not stop.wait(interval):
+					if time.monotonic() >= deadline:
+						break
+					if changed.is_set():
+						changed.clear()
+						on_update(current_text())
+			except Exception as e:
+				error(f"Error refreshing the logs of {container.name}: [{e}]")
+			finally:
+				self._stop(follow_state)
+				with self._follows_lock:
+					self._follows.pop(key, None)
+				reader.join(timeout=5)
+				debug(f"Stopped following the logs of {container.name}")
+				if follow_state["finish"]:
+					on_finish(current_text())
+
+		reader = threading.Thread(target=read, name=f"log-follow-read-{container.name}", daemon=True)
+		reader.start()
+		threading.Thread(target=refresh, name=f"log-follow-{container.name}", daemon=True).start()
+		debug(f"Following the logs of {container.name} for {timeout}s")
+		return True
+
+	@staticmethod
+	def _stop(follow_state):
+		follow_state["stop"].set()
+		for stream in follow_state["streams"]:
+			try:
+				# Unblocks the reader thread even if the container logs nothing
+				stream.close()
+			except Exception:
+				pass
+
+	def stop_follow(self, key, finish=True):
+		"""
+		Stops a follow started with follow().
+
+		Args:
+			key: Identifier given to follow()
+			finish: False to skip on_finish (e.g. the message was deleted)
+
+		Returns:
+			bool: False if that key was not being followed
+		"""
+		with self._follows_lock:
+			follow_state = self._follows.get(key)
+		if follow_state is None:
+			return False
+		follow_state["finish"] = finish
+		self._stop(follow_state)
+		return True
@@ -1,101 +1,345 @@
 """
 Message queue system with rate limiting to avoid saturating Telegram.
 Implements:
-- Message queue with configurable delays
-- Retries with exponential backoff
-- Rate limiting error handling
+- Token buckets matching Telegram's limits: one global bucket for the bot
+  plus one bucket per chat (private chats and groups have different limits)
+- Several workers draining different chats in parallel, while messages to
+  the same chat keep their order
+- Rate limiting error handling honouring the retry_after sent by Telegram
+- Coalescing of superseded edits: a newer edit of a message replaces the
+  pending one, and deleting a message cancels its pending edits
 """
 
+import heapq
+import itertools
 import queue
+import re
 import time
-from threading import Thread, Lock
+from collections import deque
+from threading import Thread, Condition
 
 from logger import debug, error, warning
 
 
+class TokenBucket:
+	"""Classic token bucket. Not thread-safe: callers hold the queue lock."""
+
+	def __init__(self, rate, capacity):
+		"""
+		Args:
+			rate: Tokens added per second
+			capacity: Maximum tokens (burst size)
+		"""
+		self.rate = rate
+		self.capacity = capacity
+		self.tokens = capacity
+		self.updated = time.monotonic()
+
+	def _refill(self, now):
+		self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+		self.updated = now
+
+	def time_until_available(self, now, tokens=1):
+		"""Seconds until `tokens` can be consumed (0 if they already can)"""
+		self._refill(now)
+		if self.tokens >= tokens:
+			return 0
+		return (tokens - self.tokens) / self.rate
+
+	def consume(self, now, tokens=1):
+		self._refill(now)
+		self.tokens -= tokens
+
+
+def get_retry_after(exception):
+	"""Returns the retry_after (seconds) carried by a Telegram 429 error, or None"""
+	result_json = getattr(exception, 'result_json', None)
+	if isinstance(result_json, dict):
+		retry_after = (result_json.get('parameters') or {}).get('retry_after')
+		if retry_after is not None:
+			return float(retry_after)
+	match = re.search(r"retry after (\d+)", str(exception), re.IGNORECASE)
+	if match:
+		return float(match.group(1))
+	return None
+
+
+def is_rate_limit_error(exception):
+	if getattr(exception, 'error_code', None) == 429:
+		return True
+	error_msg = str(exception)
+	return "Too Many Requests" in error_msg or "429" in error_msg
+
+
 class MessageQueue:
-	def __init__(self, delay_between_messages=0.5, max_retries=3):
-		self.queue = queue.Queue()
-		self.delay_between_messages = delay_between_messages
+	def __init__(self, max_retries=3, workers=4, global_rate=30,
+			private_chat_rate=1.0, private_chat_burst=3,
+			group_chat_rate=20 / 60, group_chat_burst=5):
+		"""
+		Args:
+			max_retries: Attempts per message before giving up
+			workers: Number of worker threads (different chats are sent in parallel)
+			global_rate: Messages per second for the whole bot
+			private_chat_rate / private_chat_burst: Limit per private chat (positive chat ids)
+			group_chat_rate / group_chat_burst: Limit per group or channel (negative chat ids)
+		"""
 		self.max_retries = max_retries
-		self.lock = Lock()
+		self.global_bucket = TokenBucket(global_rate, max(1, global_rate))
+		self.private_chat_rate = private_chat_rate
+		self.private_chat_burst = private_chat_burst
+		self.group_chat_rate = group_chat_rate
+		self.group_chat_burst = group_chat_burst
+		self.cond = Condition()
 		self.running = True
-		self.worker_thread = Thread(target=self._process_queue, daemon=True)
-		self.worker_thread.start()
-		debug("Message queue started")
+		self._chats = {}  # chat -> deque of pending messages
+		self._chat_buckets = {}  # chat -> TokenBucket
+		self._ready = []  # heap of (ready_at, seq, chat) for chats waiting for a worker
+		self._scheduled = set()  # chats in _ready or being processed by a worker
+		self._seq = itertools.count()
+		self.worker_threads = []
+		for i in range(max(1, workers)):
+			thread = Thread(target=self._process_queue, name=f"message-queue-{i}", daemon=True)
+			thread.start()
+			self.worker_threads.append(thread)
+		debug(f"Message queue started with {len(self.worker_threads)} workers")
+
+	def _chat_bucket(self, chat):
+		bucket = self._chat_buckets.get(chat)
+		if bucket is None:
+			try:
+				is_private = int(chat) > 0
+			except (TypeError, ValueError):
+				is_private = False
+			if is_private:
+				bucket = TokenBucket(self.private_chat_rate, self.private_chat_burst)
+			else:
+				bucket = TokenBucket(self.group_chat_rate, self.group_chat_burst)
+			self._chat_buckets[chat] = bucket
+		return bucket
+
+	def _schedule(self, chat, ready_at):
+		"""Puts a chat back in the ready heap. Caller holds self.cond."""
+		heapq.heappush(self._ready, (ready_at, next(self._seq), chat))
+		self._scheduled.add(chat)
+		self.cond.notify()
+
+	def _next_message(self):
+		"""
+		Blocks until a chat is due and both buckets allow sending to it.
+		Returns (chat, message_data) or None on shutdown. While a worker owns
+		a chat it is not in the heap, so messages to one chat never overlap.
+		"""
+		with self.cond:
+			while self.running:
+				if not self._ready:
+					self.cond.wait(timeout=1)
+					continue
+				ready_at, _, chat = self._ready[0]
+				now = time.monotonic()
+				if ready_at > now:
+					self.cond.wait(timeout=ready_at - now)
+					continue
+				heapq.heappop(self._ready)
+				pending = self._chats.get(chat)
+				if not pending:
+					self._scheduled.discard(chat)
+					self._chats.pop(chat, None)
+					continue
+				message_data = pending[0]
+				chat_bucket = self._chat_bucket(chat) if message_data['rate_limited'] else None
+				wait = self.global_bucket.time_until_available(now)
+				if chat_bucket:
+					wait = max(wait, chat_bucket.time_until_available(now))
+				if wait > 0:
+					heapq.heappush(self._ready, (now + wait, next(self._seq), chat))
+					continue
+				self.global_bucket.consume(now)
+				if chat_bucket:
+					chat_bucket.consume(now)
+				pending.popleft()
+				return chat, message_data
+		return None
+
+	def _release(self, chat, retry_message=None, delay=0):
+		"""Hands the chat back after a worker is done with its head message"""
+		with self.cond:
+			pending = self._chats.setdefault(chat, deque())
+			if retry_message is not None and not retry_message['cancelled'] and not self._is_superseded(pending, retry_message):
+				pending.appendleft(retry_message)
+			if pending:
+				self._schedule(chat, time.monotonic() + delay)
+			else:
+				del self._chats[chat]
+				self._scheduled.discard(chat)
 
 	def _process_queue(self):
 		"""Continuously processes the message queue"""
 		while self.running:
 			try:
-				# Get the next message from the queue (timeout to allow shutdown)
-				message_data = self.queue.get(timeout=1)
-				if message_data is None:  # Stop signal
+				next_message = self._next_message()
+				if next_message is None:  # Stop signal
 					break
-
-				self._execute_message(message_data)
-				time.sleep(self.delay_between_messages)
-			except queue.Empty:
-				continue
+				chat, message_data = next_message
+				retry_delay = None
+				try:
+					retry_delay = self._execute_message(message_data)
+				finally:
+					if retry_delay is None:
+						self._release(chat)
+					else:
+						self._release(chat, retry_message=message_data, delay=retry_delay)
 			except Exception as e:
 				error(f"Error processing message queue: {str(e)}")
 
 	def _execute_message(self, message_data):
-		"""Executes a message with retries and exponential backoff"""
+		"""
+		Executes a message once.
+
+		Returns:
+			None when the message is finished (sent or given up), or the delay
+			in seconds before it has to be retried. The chat is rescheduled
+			instead of sleeping so the worker can serve other chats meanwhile.
+		"""
 		func = message_data['func']
 		args = message_data['args']
 		kwargs = message_data['kwargs']
 		result_queue = message_data.get('result_queue')
+		message_data['attempt'] += 1
+		attempt = message_data['attempt']
 
 		try:
-			for attempt in range(self.max_retries):
-				try:
-					result = func(*args, **kwargs)
-					if result_queue:
-						result_queue.put(result)
-					return result
-				except Exception as e:
-					error_msg = str(e)
-					# Detect Telegram rate limiting
-					if "Too Many Requests" in error_msg or "429" in error_msg:
-						if attempt < self.max_retries - 1:
-							wait_time = (2 ** attempt) * 2  # Exponential backoff: 2, 4, 8 seconds
-							warning(f"Rate limit detected. Waiting {wait_time}s before retrying...")
-							time.sleep(wait_time)
-							continue
-					elif attempt < self.max_retries - 1:
-						wait_time = 1 * (attempt + 1)
-						debug(f"Error sending message (attempt {attempt + 1}/{self.max_retries}). Retrying in {wait_time}s...")
-						time.sleep(wait_time)
-						continue
-
-					error(f"Final error sending message after {self.max_retries} attempts: {str(e)}")
-					if result_queue:
-						result_queue.put(None)
-					break
+			result = func(*args, **kwargs)
+			if result_queue:
+				result_queue.put(result)
+			return None
 		except Exception as e:
-			error(f"Error processing message queue: {str(e)}")
+			if attempt < self.max_retries:
+				# Detect Telegram rate limiting
+				if is_rate_limit_error(e):
+					wait_time = get_retry_after(e)
+					if wait_time is None:
+						wait_time = (2 ** (attempt - 1)) * 2  # No retry_after: exponential backoff 2, 4, 8 seconds
+					warning(f"Rate limit detected. Waiting {wait_time}s before retrying...")
+					return wait_time
+				wait_time = 1 * attempt
+				debug(f"Error sending message (attempt {attempt}/{self.max_retries}). Retrying in {wait_time}s...")
+				return wait_time
+
+			error(f"Final error sending message after {self.max_retries} attempts: {str(e)}")
 			if result_queue:
 				result_queue.put(None)
+			return None
+
+	def _is_superseded(self, pending, message_data):
+		"""True if an edit being retried has a newer edit or a delete of the same message queued"""
+		operation = message_data['operation']
+		if message_data['result_queue'] or not operation or not operation.startswith("edit"):
+			return False
+		for other in pending:
+			if other['target_message'] == message_data['target_message'] and other['operation'] in (operation, "delete"):
+				return True
+		return False
+
+	def _drop_pending(self, pending, target_message, operation=None):
+		"""
+		Removes pending calls on target_message (only those of `operation` if
+		given). Caller holds self.cond. Calls with a waiter are only dropped
+		when cancelling (a delete), and their waiter gets None.
+		"""
+		dropped = 0
+		for message_data in list(pending):
+			if message_data['target_message'] != target_message or not message_data['operation']:
+				continue
+			if operation is not None:
+				if message_data['operation'] != operation or message_data['result_queue']:
+					continue
+			elif not message_data['operation'].startswith("edit"):
+				continue
+			pending.remove(message_data)
+			if message_data['result_queue']:
+				message_data['result_queue'].put(None)
+			dropped += 1
+		return dropped
+
+	def add_message(self, func, *args, wait_for_result=False, chat_key=None, rate_limited=True,
+			target_message=None, operation=None, result_timeout=60, **kwargs):
+		"""
+		Adds a message to the queue. If wait_for_result=True, waits for the result.
 
-	def add_message(self, func, *args, wait_for_result=False, **kwargs):
-		"""Adds a message to the queue. If wait_for_result=True, waits for the result"""
+		Args:
+			chat_key: Chat the call goes to; messages to the same chat are sent in order
+				and share that chat's rate limit
+			rate_limited: False for calls that don't count against the per-chat limit (deletes)
+			target_message: message_id the call acts on, used with `operation`
+			operation: "edit_*" operations replace a pending call with the same operation
+				on the same message; "delete" cancels every pending edit of the message
+			result_timeout: Seconds to wait for the result when wait_for_result=True,
+				on top of the time the messages queued before it need at the chat's
+				rate. If it still times out, the message is dropped if not sent yet
+				so it is never posted without the caller knowing.
+		"""
 		result_queue = queue.Queue() if wait_for_result else None
-		self.queue.put({
+		message_data = {
 			'func': func,
 			'args': args,
 			'kwargs': kwargs,
-			'result_queue': result_queue
-		})
+			'result_queue': result_queue,
+			'rate_limited': rate_limited,
+			'target_message': target_message,
+			'operation': operation,
+			'attempt': 0,
+			'cancelled': False,
+		}
+		chat = str(chat_key)
+		with self.cond:
+			pending = self._chats.setdefault(chat, deque())
+			if target_message is not None and operation:
+				if operation == "delete":
+					dropped = self._drop_pending(pending, target_message)
+				else:
+					dropped = self._drop_pending(pending, target_message, operation)
+				if dropped:
+					debug(f"Message queue: {dropped} pending edit(s) of message {target_message} superseded by {operation}")
+			pending.append(message_data)
+			if wait_for_result:
+				result_timeout += self._queue_delay(chat, len(pending) - 1, rate_limited)
+			if chat not in self._scheduled:
+				self._schedule(chat, time.monotonic())
 		if wait_for_result:
 			try:
-				return result_queue.get(timeout=60)  # Wait up to 60 seconds
+				return result_queue.get(timeout=result_timeout)
 			except queue.Empty:
-				error("Error processing message queue: Timeout waiting for message result")
+				with self.cond:
+					dropped = self._remove_pending(chat, message_data)
+					# A message being sent right now is not retried if it fails
+					message_data['cancelled'] = True
+				if dropped:
+					error(f"Error processing message queue: Timeout waiting for message result after {result_timeout:.0f}s, message dropped")
+				else:
+					error(f"Error processing message queue: Timeout waiting for message result after {result_timeout:.0f}s")
 				return None
 		return None
 
+	def _queue_delay(self, chat, ahead, rate_limited):
+		"""Seconds the `ahead` messages queued before a new one need at the chat's rate. Caller holds self.cond."""
+		rate = self.global_bucket.rate
+		if rate_limited:
+			rate = min(rate, self._chat_bucket(chat).rate)
+		return ahead / rate
+
+	def _remove_pending(self, chat, message_data):
+		"""Removes a message that is still queued. Returns False if a worker already took it. Caller holds self.cond."""
+		pending = self._chats.get(chat)
+		if not pending:
+			return False
+		for index, queued in enumerate(pending):
+			if queued is message_data:
+				del pending[index]
+				return True
+		return False
+
 	def shutdown(self):
 		"""Stops the message queue"""
-		self.running = False
-		self.queue.put(None)
+		with self.cond:
+			self.running = False
+			self.cond.notify_all()
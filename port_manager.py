@@ -6,22 +6,122 @@ Port Manager Module
 Handles all port-related operations for Docker Controller Bot
 """
 
+import os
 import socket
 import random
 from typing import Tuple, List, Dict, Set, Optional
 
+from logger import warning
+
+# Socket tables read from procfs: (file, protocol)
+PROC_NET_TABLES = (("tcp", "tcp"), ("tcp6", "tcp"), ("udp", "udp"), ("udp6", "udp"))
+# TCP sockets only hold their port for others while listening; bound UDP
+# sockets always do
+TCP_LISTEN_STATE = "0A"
+
+
+def parse_proc_net(lines, protocol: str) -> List[Tuple[int, str]]:
+    """
+    Parse a /proc/net/{tcp,tcp6,udp,udp6} table
+
+    Args:
+        lines: Lines of the file, header included
+        protocol: "tcp" or "udp"
+
+    Returns:
+        List of (local port, socket inode) of the sockets holding a port
+    """
+    sockets = []
+    for line in lines[1:]:
+        fields = line.split()
+        if len(fields) < 10:
+            continue
+        if protocol == "tcp" and fields[3] != TCP_LISTEN_STATE:
+            continue
+        try:
+            port = int(fields[1].rsplit(":", 1)[1], 16)
+        except (IndexError, ValueError):
+            continue
+        if port:
+            sockets.append((port, fields[9]))
+    return sockets
+
+
+class PortBitmap:
+    """One bit per port (8 KiB for the whole 0-65535 range), set when the port is used"""
+
+    def __init__(self, ports=()):
+        self.bits = bytearray(8192)
+        for port in ports:
+            self.add(port)
+
+    def add(self, port: int):
+        if 0 <= port <= 65535:
+            self.bits[port >> 3] |= 1 << (port & 7)
+
+    def __contains__(self, port: int) -> bool:
+        return bool(self.bits[port >> 3] >> (port & 7) & 1)
+
+    def iter_free(self, min_port: int, max_port: int, start: Optional[int] = None):
+        """
+        Yield the free ports of [min_port, max_port], from start up to
+        max_port and then wrapping around from min_port. Fully used bytes
+        (eight ports) are skipped at once.
+        """
+        if start is None or not min_port <= start <= max_port:
+            start = min_port
+        bits = self.bits
+        for low, high in ((start, max_port), (min_port, start - 1)):
+            port = low
+            while port <= high:
+                if port & 7 == 0 and bits[port >> 3] == 0xFF:
+                    port += 8
+                    continue
+                if not bits[port >> 3] >> (port & 7) & 1:
+                    yield port
+                port += 1
+
+
+class PortIndex:
+    """Host ports in use, each mapped to the container holding it (None if unknown)"""
+
+    def __init__(self):
+        self.owners: Dict[int, Optional[str]] = {}
+        # Running host-network containers whose sockets could not be read
+        # (no host procfs mounted): check_port_availability execs into them
+        self.unscanned = []
+
+    def add(self, port: int, owner: Optional[str] = None):
+        # A known owner is kept over an unknown one
+        if owner or port not in self.owners:
+            self.owners[port] = owner
+
+    def __contains__(self, port: int) -> bool:
+        return port in self.owners
+
+    def __len__(self) -> int:
+        return len(self.owners)
+
+    def owner(self, port: int) -> Optional[str]:
+        return self.owners.get(port)
+
 
 class PortManager:
     """Manages port operations for Docker containers"""
     
-    def __init__(self, docker_manager):
+    def __init__(self, docker_manager, host_proc: Optional[str] = None):
         """
         Initialize PortManager
         
         Args:
             docker_manager: Instance of DockerManager to interact with containers
+            host_proc: Where the host's /proc is mounted (e.g. "/host/proc").
+                Without it the bot's own /proc/net is read, which only shows
+                the host sockets when the bot runs with network_mode: host.
         """
         self.docker_manager = docker_manager
+        self.host_proc = host_proc
+        self._warned_no_host_proc = False
     
     def _is_port_available(self, port: int) -> bool:
         """
@@ -97,110 +197,217 @@ class PortManager:
             ports = self._get_bridge_network_ports(container)
             return (ports, False)
 
-    def check_port_availability(self, port_number: int) -> Tuple[bool, str, Optional[str]]:
+    def _host_net_dir(self) -> Optional[str]:
+        """Directory with the socket tables of the host network, or None if the host procfs is not mounted"""
+        if self.host_proc and os.path.exists(os.path.join(self.host_proc, "1", "net", "tcp")):
+            # /proc/net follows the reader's namespace, the host's is the one of its PID 1
+            return os.path.join(self.host_proc, "1", "net")
+        return None
+
+    def _exec_port_check(self, container, port_number: int) -> bool:
+        """Asks ss (or netstat) inside a host-network container whether a port is in use"""
+        for tool in ("ss", "netstat"):
+            try:
+                result = container.exec_run(f"sh -c '{tool} -tuln | grep \":{port_number} \"'", demux=False)
+                if result.exit_code == 0 and result.output:
+                    return True
+            except Exception:
+                return False
+        return False
+
+    def _read_listening_sockets(self, net_dir: str) -> List[Tuple[int, str]]:
+        """Returns (port, inode) of every listening TCP and bound UDP socket, IPv4 and IPv6"""
+        sockets = []
+        for table, protocol in PROC_NET_TABLES:
+            try:
+                with open(os.path.join(net_dir, table)) as f:
+                    sockets.extend(parse_proc_net(f.readlines(), protocol))
+            except OSError:
+                continue
+        return sockets
+
+    def _process_tree(self, proc_root: str, pid: int) -> List[int]:
+        """A process and its descendants, found through /proc/<pid>/task/<tid>/children"""
+        pids = []
+        pending = [pid]
+        while pending:
+            current = pending.pop()
+            pids.append(current)
+            task_dir = os.path.join(proc_root, str(current), "task")
+            try:
+                tasks = os.listdir(task_dir)
+            except OSError:
+                continue
+            for task in tasks:
+                try:
+                    with open(os.path.join(task_dir, task, "children")) as f:
+                        pending.extend(int(child) for child in f.read().split())
+                except (OSError, ValueError):
+                    continue
+        return pids
+
+    def _socket_owners(self, proc_root: str, containers, inodes: Set[str]) -> Dict[str, str]:
         """
-        Check if a specific port is available
+        Maps socket inodes to the host-network container whose processes hold them
+
+        Best effort: needs the host PID namespace visible under proc_root and
+        permission to read the processes' fd directories.
+        """
+        owners = {}
+        for container in containers:
+            if len(owners) == len(inodes):
+                break
+            pid = container.attrs.get('State', {}).get('Pid')
+            if not pid:
+                continue
+            for process in self._process_tree(proc_root, pid):
+                fd_dir = os.path.join(proc_root, str(process), "fd")
+                try:
+                    fds = os.listdir(fd_dir)
+                except OSError:
+                    continue
+                for fd in fds:
+                    try:
+                        target = os.readlink(os.path.join(fd_dir, fd))
+                    except OSError:
+                        continue
+                    if target.startswith("socket:["):
+                        inode = target[len("socket:["):-1]
+                        if inode in inodes:
+                            owners[inode] = container.name
+        return owners
+
+    def build_port_index(self, containers=None) -> PortIndex:
+        """
+        Scan once every host port in use
+
+        Combines the ports published by containers (PortBindings) with the
+        listening sockets of the host network read from the host procfs, so
+        host-network containers are covered without exec'ing into them.
+        Without the host procfs only the bot's own sockets are seen, and the
+        running host-network containers are left in PortIndex.unscanned.
 
         Args:
-            port_number: Port number to check
+            containers: Containers to consider (default: all)
 
         Returns:
-            Tuple of (is_available, message_key, container_name)
-            - is_available: True if port is available
-            - message_key: Translation key for the message
-            - container_name: Name of container using the port (if any)
+            PortIndex mapping each used port to its container (None when the
+            port is held by the host or by a process that can't be attributed)
         """
-        containers = self.docker_manager.list_containers()
-
+        if containers is None:
+            containers = self.docker_manager.list_containers()
+        index = PortIndex()
+        host_network = []
         for container in containers:
             try:
                 network_mode = container.attrs.get('HostConfig', {}).get('NetworkMode', '')
-
                 if network_mode == 'host':
-                    # For host network containers, check ports by executing commands inside
                     if container.status in ['running', 'restarting']:
-                        try:
-                            # Try ss first
-                            result = container.exec_run(f"sh -c 'ss -tuln | grep \":{port_number} \"'", demux=False)
-                            if result.exit_code == 0 and result.output:
-                                return (False, "ports_used_by_container", container.name)
-
-                            # If ss failed, try netstat
-                            result = container.exec_run(f"sh -c 'netstat -tuln | grep \":{port_number} \"'", demux=False)
-                            if result.exit_code == 0 and result.output:
-                                return (False, "ports_used_by_container", container.name)
-                        except Exception:
-                            pass
+                        host_network.append(container)
                     continue
-
-                # For bridge/default network, check PortBindings
-                port_bindings = container.attrs.get('HostConfig', {}).get('PortBindings', {})
-                if port_bindings:
-                    for container_port, host_bindings in port_bindings.items():
-                        if host_bindings:
-                            for host_binding in host_bindings:
-                                host_port = host_binding.get('HostPort', '')
-                                if host_port and int(host_port) == port_number:
-                                    return (False, "ports_used_by_container", container.name)
+                for port_with_proto in self._get_bridge_network_ports(container):
+                    try:
+                        index.add(int(port_with_proto.split('/')[0]), container.name)
+                    except ValueError:
+                        continue
             except Exception:
                 continue
 
+        net_dir = self._host_net_dir()
+        owners = {}
+        if net_dir:
+            sockets = self._read_listening_sockets(net_dir)
+            if host_network and sockets:
+                owners = self._socket_owners(self.host_proc, host_network, {inode for _, inode in sockets})
+        else:
+            # The bot's own namespace: right when the bot itself uses the host
+            # network, and its PIDs are not the host PIDs in State.Pid
+            sockets = self._read_listening_sockets("/proc/net")
+            if host_network:
+                index.unscanned = host_network
+                if not self._warned_no_host_proc:
+                    self._warned_no_host_proc = True
+                    warning(f"Host procfs not found at {self.host_proc}, ports of host-network containers are checked by exec'ing ss/netstat in them. Mount /proc:{self.host_proc}:ro to avoid it")
+        for port, inode in sockets:
+            index.add(port, owners.get(inode))
+        return index
+
+    def check_port_availability(self, port_number: int) -> Tuple[bool, str, Optional[str]]:
+        """
+        Check if a specific port is available
+
+        Args:
+            port_number: Port number to check
+
+        Returns:
+            Tuple of (is_available, message_key, container_name)
+            - is_available: True if port is available
+            - message_key: Translation key for the message
+            - container_name: Name of container using the port (if any)
+        """
+        index = self.build_port_index()
+        if port_number in index:
+            owner = index.owner(port_number)
+            if owner:
+                return (False, "ports_used_by_container", owner)
+            return (False, "ports_used_by_system", None)
+        for container in index.unscanned:
+            if self._exec_port_check(container, port_number):
+                return (False, "ports_used_by_container", container.name)
+
         # Check if port is available at system level
         if self._is_port_available(port_number):
             return (True, "ports_available", None)
         else:
             return (False, "ports_used_by_system", None)
 
-    def get_random_available_port(self, min_port: int = 5000, max_port: int = 60000, max_attempts: int = 100) -> Optional[int]:
+    def allocate_ports(self, count: int = 1, min_port: int = 5000, max_port: int = 60000,
+                       randomize: bool = True, max_attempts: int = 100) -> List[int]:
         """
-        Generate a random available port
+        Find several free ports at once
+
+        The used ports (container PortBindings and host sockets, see
+        build_port_index) are loaded into a bitmap, so only ports that look
+        free are tried, each with a single bind check.
 
         Args:
+            count: Number of ports wanted
             min_port: Minimum port number (default: 5000)
             max_port: Maximum port number (default: 60000)
-            max_attempts: Maximum number of attempts (default: 100)
+            randomize: Start at a random port of the range instead of min_port
+            max_attempts: Maximum bind checks of ports that look free but turn
+                out to be busy (default: 100)
 
         Returns:
-            Available port number or None if no port found
+            List of `count` distinct ports, or an empty list if there are not
+            enough free ports in the range
         """
-        # Get all ports used by containers
-        containers = self.docker_manager.list_containers()
-        used_ports = set()
-
-        for container in containers:
-            try:
-                # Skip containers with host network (can't reliably detect all ports)
-                network_mode = container.attrs.get('HostConfig', {}).get('NetworkMode', '')
-                if network_mode == 'host':
-                    continue
-
-                # Get port bindings
-                port_bindings = container.attrs.get('HostConfig', {}).get('PortBindings', {})
-                if port_bindings:
-                    for container_port, host_bindings in port_bindings.items():
-                        if host_bindings:
-                            for host_binding in host_bindings:
-                                host_port = host_binding.get('HostPort', '')
-                                if host_port:
-                                    try:
-                                        used_ports.add(int(host_port))
-                                    except ValueError:
-                                        pass
-            except Exception:
-                continue
-
-        # Try to find an available port
-        for _ in range(max_attempts):
-            port = random.randint(min_port, max_port)
-
-            # Skip if port is used by a container
-            if port in used_ports:
-                continue
-
-            # Check if port is available at system level
+        bitmap = PortBitmap(self.build_port_index().owners)
+        start = random.randint(min_port, max_port) if randomize else min_port
+        ports = []
+        failed = 0
+        for port in bitmap.iter_free(min_port, max_port, start):
             if self._is_port_available(port):
-                return port
+                ports.append(port)
+                if len(ports) == count:
+                    return ports
+            else:
+                failed += 1
+                if failed >= max_attempts:
+                    break
+        return []
 
-        # If no port found after max_attempts, return None
-        return None
+    def get_random_available_port(self, min_port: int = 5000, max_port: int = 60000, max_attempts: int = 100) -> Optional[int]:
+        """
+        Generate a random available port
+
+        Args:
+            min_port: Minimum port number (default: 5000)
+            max_port: Maximum port number (default: 60000)
+            max_attempts: Maximum number of busy ports tried (default: 100)
 
+        Returns:
+            Available port number or None if no port found
+        """
+        ports = self.allocate_ports(1, min_port, max_port, randomize=True, max_attempts=max_attempts)
+        return ports[0] if ports else None
@@ -0,0 +1,212 @@
+"""
+Registry Manager Module
+Queries container registries (Registry HTTP API V2) for manifest digests so
+image updates can be detected without pulling the whole image.
+"""
+
+import hashlib
+
+import docker.auth
+import docker.utils
+
+from http_client import HttpClient
+from logger import debug
+
+# Media types accepted when asking for a manifest. Multi-arch images answer
+# with the index/list digest, which is what Docker stores in RepoDigests.
+MANIFEST_ACCEPT = ", ".join([
+	"application/vnd.oci.image.index.v1+json",
+	"application/vnd.docker.distribution.manifest.list.v2+json",
+	"application/vnd.oci.image.manifest.v1+json",
+	"application/vnd.docker.distribution.manifest.v2+json",
+])
+
+# Registry host as written in image references -> API endpoint
+DEFAULT_ENDPOINTS = {
+	"docker.io": "https://registry-1.docker.io",
+	"index.docker.io": "https://registry-1.docker.io",
+}
+
+
+def _parse_www_authenticate(header):
+	"""Parse a 'Bearer realm="...",service="...",scope="..."' challenge into a dict."""
+	if not header or not header.lower().startswith("bearer "):
+		return None
+	params = {}
+	for part in header[len("bearer "):].split(","):
+		if "=" not in part:
+			continue
+		key, value = part.split("=", 1)
+		params[key.strip().lower()] = value.strip().strip('"')
+	return params if params.get("realm") else None
+
+
+class RegistryManager:
+	"""Resolves remote manifest digests for image references"""
+
+	def __init__(self, endpoints=None, timeout=10, http=None):
+		"""
+		Initialize RegistryManager
+
+		Args:
+			endpoints: Optional {registry_host: base_url} overrides, e.g.
+				{"docker.io": "http://127.0.0.1:5000"} to point the manager
+				at a local stand-in registry.
+			timeout: Timeout in seconds for every HTTP request
+			http: Shared HttpClient (a private one is created if omitted)
+		"""
+		self.endpoints = dict(DEFAULT_ENDPOINTS)
+		if endpoints:
+			self.endpoints.update(endpoints)
+		self.timeout = timeout
+		self.http = http or HttpClient()
+		# registry -> last auth challenge, so the token can be requested
+		# up front instead of after a 401 on every lookup
+		self._challenges = {}
+
+	@staticmethod
+	def parse_image_reference(image_with_tag):
+		"""
+		Split an image reference into its registry parts.
+
+		Args:
+			image_with_tag: Reference as stored in Config.Image (e.g. "nginx",
+				"ghcr.io/owner/repo:v1", "repo@sha256:...")
+
+		Returns:
+			Tuple of (registry, repository, reference). `reference` is a tag
+			or a "sha256:..." digest. Docker Hub official images get the
+			"library/" prefix the V2 API expects.
+		"""
+		if "@" in image_with_tag:
+			repo_name, reference = image_with_tag.split("@", 1)
+			repo_name = docker.utils.parse_repository_tag(repo_name)[0]
+		else:
+			repo_name, reference = docker.utils.parse_repository_tag(image_with_tag)
+		registry, repository = docker.auth.resolve_repository_name(repo_name)
+		if registry in ("docker.io", "index.docker.io") and "/" not in repository:
+			repository = f"library/{repository}"
+		return registry, repository, reference or "latest"
+
+	def _base_url(self, registry):
+		if registry in self.endpoints:
+			return self.endpoints[registry].rstrip("/")
+		return f"https://{registry}"
+
+	def _get_credentials(self, registry):
+		"""Returns (username, password) from the mounted docker config.json, if any"""
+		try:
+			auth = docker.auth.load_config().resolve_authconfig(registry)
+		except Exception:
+			auth = None
+		if auth and auth.get("Username") and auth.get("Password"):
+			return (auth["Username"], auth["Password"])
+		return None
+
+	def _get_token(self, registry, repository, challenge, invalidate=False):
+		"""Fetch a bearer token answering a WWW-Authenticate challenge (cached until it expires)"""
+		scope = f"repository:{repository}:pull"
+		auth = self._get_credentials(registry)
+		if invalidate:
+			self.http.invalidate_token(challenge["realm"], challenge.get("service"), scope, auth)
+		return self.http.get_token(challenge["realm"], challenge.get("service"), scope, auth)
+
+	def _request_manifest(self, method, registry, repository, reference, token=None):
+		headers = {"Accept": MANIFEST_ACCEPT}
+		if token:
+			headers["Authorization"] = f"Bearer {token}"
+		url = f"{self._base_url(registry)}/v2/{repository}/manifests/{reference}"
+		return self.http.request(method, url, headers=headers, timeout=self.timeout)
+
+	def get_remote_digest(self, image_with_tag):
+		"""
+		Returns the manifest digest the registry currently serves for a reference.
+
+		Uses a HEAD request (does not count against Docker Hub pull limits)
+		and falls back to GET for registries that omit Docker-Content-Digest.
+
+		Args:
+			image_with_tag: Image reference (e.g. "nginx:latest")
+
+		Returns:
+			Digest string ("sha256:...") or None if it could not be resolved
+		"""
+		registry, repository, reference = self.parse_image_reference(image_with_tag)
+		if reference.startswith("sha256:"):
+			# Pinned by digest: the reference can never move
+			return reference
+
+		try:
+			token = None
+			challenge = self._challenges.get(registry)
+			if challenge:
+				token = self._get_token(registry, repository, challenge)
+			response = self._request_manifest("HEAD", registry, repository, reference, token)
+			if response.status_code == 401:
+				challenge = _parse_www_authenticate(response.headers.get("WWW-Authenticate"))
+				if not challenge:
+					debug(f"Registry {registry} requires an unsupported auth scheme for {repository}")
+					return None
+				self._challenges[registry] = challenge
+				# A cached token the registry rejected is fetched again
+				token = self._get_token(registry, repository, challenge, invalidate=token is not None)
+				response = self._request_manifest("HEAD", registry, repository, reference, token)
+
+			digest = response.headers.get("Docker-Content-Digest") if response.status_code == 200 else None
+			if not digest and response.status_code in (200, 405):
+				response = self._request_manifest("GET", registry, repository, reference, token)
+				if response.status_code == 200:
+					digest = response.headers.get("Docker-Content-Digest")
+					if not digest:
+						digest = f"sha256:{hashlib.sha256(response.content).hexdigest()}"
+
+			if not digest:
+				debug(f"Registry {registry} returned {response.status_code} for {repository}:{reference}")
+			return digest
+		except Exception as e:
+			debug(f"Could not get manifest digest for {image_with_tag}: {e}")
+			return None
+
+	def get_local_digests(self, image, image_with_tag):
+		"""
+		Returns the digests recorded in the local image's RepoDigests for the
+		same repository as `image_with_tag`.
+
+		Args:
+			image: Docker SDK image object
+			image_with_tag: Image reference used by the container
+
+		Returns:
+			set of "sha256:..." digests (empty if the image was built locally
+			or the repository does not match)
+		"""
+		registry, repository, _ = self.parse_image_reference(image_with_tag)
+		digests = set()
+		for repo_digest in (image.attrs.get("RepoDigests") or []):
+			if "@" not in repo_digest:
+				continue
+			repo_name, digest = repo_digest.split("@", 1)
+			if self.parse_image_reference(repo_name)[:2] == (registry, repository):
+				digests.add(digest)
+		return digests
+
+	def check_update(self, image, image_with_tag):
+		"""
+		Compares the local image against the registry without pulling it.
+
+		Args:
+			image: Docker SDK image object the container runs
+			image_with_tag: Image reference used by the container
+
+		Returns:
+			Tuple (has_update, remote_digest). has_update is None when the
+			comparison is not possible (no RepoDigests, registry unreachable...)
+			so the caller can fall back to a full pull.
+		"""
+		local_digests = self.get_local_digests(image, image_with_tag)
+		if not local_digests:
+			return None, None
+		remote_digest = self.get_remote_digest(image_with_tag)
+		if not remote_digest:
+			return None, None
+		return remote_digest not in local_digests, remote_digest
@@ -21,6 +21,7 @@ class ScheduleManager:
         self._cache = None  # Cache for schedules
         self._cache_dirty = False  # Flag to track if cache needs refresh
         self._next_id = 1  # Track next available ID
+        self._change_listeners = []  # Callbacks invoked after every write
         self._ensure_file_exists()
         self._load_cache()
 
@@ -62,6 +63,18 @@ class ScheduleManager:
             self._cache_dirty = False
         except Exception as e:
             print(f"Error writing schedules: {e}")
+        self._notify_change()
+
+    def add_change_listener(self, callback):
+        """Register a callback called (without arguments) whenever schedules are added, edited or removed"""
+        self._change_listeners.append(callback)
+
+    def _notify_change(self):
+        for callback in self._change_listeners:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error notifying schedule change: {e}")
     
     def add_schedule(self, name: str, cron: str, action: str, container: str = None,
                      minutes: int = None, show_output: bool = False, command: str = None,
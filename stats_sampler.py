@@ -0,0 +1,305 @@
+"""
+Stats Sampler Module
+Polls the stats of the running containers in the background and keeps the
+last hour of CPU, memory, network and block I/O samples per container, so
+/info can answer without waiting for the daemon.
+"""
+
+import math
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+
+import docker
+
+from logger import debug, error
+
+STATS_HISTORY_SECONDS = 3600
+STATS_SAMPLER_WORKERS = 8
+# On-demand collection (/top): threads and overall deadline in seconds
+STATS_COLLECT_WORKERS = 16
+STATS_COLLECT_TIMEOUT = 10
+
+# Order of the values stored per sample
+STATS_FIELDS = ("cpu", "mem_used", "mem_limit", "net_rx", "net_tx", "blk_read", "blk_write")
+
+
+def memory_usage(memory_stats):
+	"""Returns (used bytes, limit bytes) from the memory_stats of a stats response"""
+	stats = memory_stats.get("stats", {})
+	used = stats.get("active_anon", 0) + stats.get("active_file", 0) + stats.get("inactive_anon", 0) + stats.get("inactive_file", 0)
+	return used, memory_stats.get("limit", 0)
+
+
+def cpu_percent(cpu_stats, precpu_stats, cpu_count=None):
+	"""
+	CPU usage between two samples as a percentage of one CPU, or None if it
+	can't be computed. cpu_count is used when the response carries neither
+	online_cpus nor percpu_usage (cgroup v2 one-shot stats).
+	"""
+	try:
+		cpu_delta = cpu_stats["cpu_usage"].get("total_usage", 0) - precpu_stats["cpu_usage"].get("total_usage", 0)
+		system_cpu_delta = cpu_stats["system_cpu_usage"] - precpu_stats["system_cpu_usage"]
+		online_cpus = cpu_stats.get("online_cpus") or len(cpu_stats["cpu_usage"].get("percpu_usage") or []) or cpu_count or 1
+	except (KeyError, TypeError):
+		return None
+	if system_cpu_delta <= 0 or cpu_delta < 0:
+		return None
+	return (cpu_delta / system_cpu_delta) * online_cpus * 100
+
+
+def io_counters(stats):
+	"""Returns cumulative (net rx, net tx, block read, block write) bytes of a stats response"""
+	net_rx = net_tx = 0
+	for network in (stats.get("networks") or {}).values():
+		net_rx += network.get("rx_bytes", 0)
+		net_tx += network.get("tx_bytes", 0)
+	blk_read = blk_write = 0
+	for entry in (stats.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []:
+		op = entry.get("op", "").lower()
+		if op == "read":
+			blk_read += entry.get("value", 0)
+		elif op == "write":
+			blk_write += entry.get("value", 0)
+	return net_rx, net_tx, blk_read, blk_write
+
+
+class StatsHistory:
+	"""Fixed-size ring buffer of samples stored in flat arrays of doubles"""
+
+	def __init__(self, capacity):
+		self.capacity = capacity
+		self.times = array("d", [0.0]) * capacity
+		self.values = array("d", [0.0]) * (capacity * len(STATS_FIELDS))
+		self.count = 0
+		self.next = 0
+
+	def append(self, timestamp, values):
+		self.times[self.next] = timestamp
+		offset = self.next * len(STATS_FIELDS)
+		self.values[offset:offset + len(STATS_FIELDS)] = array("d", values)
+		self.next = (self.next + 1) % self.capacity
+		self.count = min(self.count + 1, self.capacity)
+
+	def latest(self):
+		"""Returns (timestamp, {field: value}) of the newest sample, or None"""
+		if not self.count:
+			return None
+		index = (self.next - 1) % self.capacity
+		offset = index * len(STATS_FIELDS)
+		return self.times[index], dict(zip(STATS_FIELDS, self.values[offset:offset + len(STATS_FIELDS)]))
+
+	def summary(self, field, since):
+		"""Returns (min, avg, max) of a field over the samples taken after since, or None"""
+		column = STATS_FIELDS.index(field)
+		values = [
+			self.values[index * len(STATS_FIELDS) + column]
+			for index in range(self.capacity)
+			if index < self.count and self.times[index] >= since
+		]
+		values = [value for value in values if not math.isnan(value)]
+		if not values:
+			return None
+		return min(values), sum(values) / len(values), max(values)
+
+
+class StatsSampler:
+	"""Samples the running containers in parallel every interval seconds"""
+
+	def __init__(self, client, inventory, interval, history_seconds=STATS_HISTORY_SECONDS, workers=STATS_SAMPLER_WORKERS, daemon_info=None):
+		"""
+		Initialize StatsSampler
+
+		Args:
+			client: Docker client
+			inventory: ContainerInventory used to find the running containers
+			interval: Seconds between samples
+			history_seconds: How long samples are kept
+			workers: Containers sampled in parallel
+			daemon_info: Optional DaemonInfo, its CPU count and total memory
+				fill in what a stats response leaves out
+		"""
+		self.client = client
+		self.inventory = inventory
+		self.interval = interval
+		self.history_seconds = history_seconds
+		self.workers = workers
+		self.daemon_info = daemon_info
+		self._capacity = max(1, int(history_seconds // interval))
+		self._histories = {}  # container id -> StatsHistory
+		self._last_cpu = {}  # container id -> cpu_stats of the previous sample
+		self._one_shot = True
+		self._listeners = []
+		self._lock = threading.Lock()
+		self._stop = threading.Event()
+
+	def start(self):
+		thread = threading.Thread(target=self._run, name="stats-sampler", daemon=True)
+		thread.start()
+		debug(f"Stats sampler started, sampling every {self.interval}s")
+
+	def stop(self):
+		self._stop.set()
+
+	def add_listener(self, callback):
+		"""Registers callback(container, sample, timestamp), called after every background sample"""
+		self._listeners.append(callback)
+
+	def _run(self):
+		with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="stats-sampler") as executor:
+			while not self._stop.is_set():
+				started = time.monotonic()
+				try:
+					self._sample_all(executor)
+				except Exception as e:
+					error(f"Error sampling container stats: [{e}]")
+				self._stop.wait(max(0, self.interval - (time.monotonic() - started)))
+
+	def _sample_all(self, executor):
+		running = [container for container in self.inventory.list() if container.status == "running"]
+		for future in [executor.submit(self._sample, container) for container in running]:
+			future.result()
+		running_ids = {container.id for container in running}
+		with self._lock:
+			for container_id in list(self._histories):
+				if container_id not in running_ids:
+					del self._histories[container_id]
+					self._last_cpu.pop(container_id, None)
+
+	def _sample(self, container):
+		try:
+			if self._one_shot:
+				# one_shot returns at once; CPU is computed against our previous sample
+				stats = container.stats(stream=False, one_shot=True)
+			else:
+				stats = container.stats(stream=False)
+		except docker.errors.InvalidVersion:
+			debug("The Docker API does not support one-shot stats, sampling will be slower")
+			self._one_shot = False
+			return
+		except Exception as e:
+			debug(f"Stats of container {container.name} not available: [{e}]")
+			return
+		timestamp = time.time()
+		sample = self.record(container.id, stats, timestamp=timestamp)
+		for listener in self._listeners:
+			try:
+				listener(container, sample, timestamp)
+			except Exception as e:
+				error(f"Error in stats listener for container {container.name}: [{e}]")
+
+	def collect(self, containers, max_age, timeout=STATS_COLLECT_TIMEOUT, workers=STATS_COLLECT_WORKERS):
+		"""
+		Makes sure every container has a sample not older than max_age.
+
+		Containers without one are sampled in parallel with the regular
+		two-sample stats call, and those fresh samples are returned whatever
+		max_age is (0 means "always sample again"). Whatever has not
+		answered when timeout expires is left behind, the call never takes
+		much longer than that.
+
+		Args:
+			containers: Running containers
+			max_age: Seconds a sample stays valid
+			timeout: Overall deadline in seconds
+			workers: Containers sampled in parallel
+
+		Returns:
+			dict {container id: (latest, summaries)} for the containers that
+			have a sample (see get())
+		"""
+		samples = {}
+		missing = []
+		for container in containers:
+			sample = self.get(container.id, max_age=max_age)
+			if sample is None:
+				missing.append(container)
+			else:
+				samples[container.id] = sample
+		if missing:
+			def sample(container):
+				self.record(container.id, container.stats(stream=False))
+
+			executor = ThreadPoolExecutor(max_workers=min(workers, len(missing)), thread_name_prefix="stats-collect")
+			futures = {executor.submit(sample, container): container for container in missing}
+			sampled = []
+			try:
+				for future in as_completed(futures, timeout=timeout):
+					container = futures[future]
+					try:
+						future.result()
+						sampled.append(container)
+					except Exception as e:
+						debug(f"Stats of container {container.name} not available: [{e}]")
+			except FuturesTimeoutError:
+				debug(f"Stats collection deadline of {timeout}s reached")
+			finally:
+				# Requests already sent finish in the background, the rest are dropped
+				executor.shutdown(wait=False, cancel_futures=True)
+			for container in sampled:
+				# Just recorded by this call, so its age does not matter
+				sample = self.get(container.id)
+				if sample is not None:
+					samples[container.id] = sample
+		return samples
+
+	def sampled_ids(self):
+		"""Ids of the containers that currently have samples"""
+		with self._lock:
+			return set(self._histories)
+
+	def record(self, container_id, stats, timestamp=None):
+		"""
+		Stores a stats response.
+
+		Args:
+			container_id: Full container id
+			stats: Decoded response of the Docker stats endpoint
+			timestamp: Sample time (defaults to now)
+
+		Returns:
+			dict {field: value} of the stored sample
+		"""
+		cpu_stats = stats.get("cpu_stats") or {}
+		with self._lock:
+			precpu_stats = stats.get("precpu_stats") or {}
+			if not precpu_stats.get("system_cpu_usage"):
+				precpu_stats = self._last_cpu.get(container_id) or {}
+			self._last_cpu[container_id] = cpu_stats
+		cpu = cpu_percent(cpu_stats, precpu_stats, self.daemon_info.get("cpu_count") if self.daemon_info else None)
+		mem_used, mem_limit = memory_usage(stats.get("memory_stats") or {})
+		if not mem_limit and self.daemon_info:
+			# No limit reported: the container can use the whole host memory
+			mem_limit = self.daemon_info.get("memory_total", 0)
+		values = (math.nan if cpu is None else cpu, mem_used, mem_limit, *io_counters(stats))
+		with self._lock:
+			history = self._histories.get(container_id)
+			if history is None:
+				history = self._histories[container_id] = StatsHistory(self._capacity)
+			history.append(timestamp or time.time(), values)
+		return dict(zip(STATS_FIELDS, values))
+
+	def get(self, container_id, max_age=None):
+		"""
+		Returns the newest sample of a container and its recent range.
+
+		Args:
+			container_id: Full container id
+			max_age: Optional age in seconds above which the sample is ignored
+
+		Returns:
+			tuple (latest, summaries) where latest is a {field: value} dict and
+			summaries maps "cpu" and "mem_used" to (min, avg, max) or None.
+			None if the container has no recent sample.
+		"""
+		with self._lock:
+			history = self._histories.get(container_id)
+			if history is None:
+				return None
+			latest = history.latest()
+			if latest is None or (max_age is not None and time.time() - latest[0] > max_age):
+				return None
+			since = time.time() - self.history_seconds
+			summaries = {field: history.summary(field, since) for field in ("cpu", "mem_used")}
+		return latest[1], summaries
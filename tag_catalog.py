@@ -0,0 +1,251 @@
+"""
+Tag Catalog Module
+Lists the tags of an image repository for /changetag. Pages are followed
+only as far as needed, results are cached per repository and revalidated
+with ETags, and tags are ordered by semantic version (newest first).
+"""
+
+import re
+import time
+from urllib.parse import urljoin
+
+from logger import debug, error
+
+# Seconds a cached tag list is used without asking the registry again
+TAG_CACHE_TTL = 3600
+# Seconds a stale tag list is kept around for revalidation with If-None-Match
+TAG_CACHE_KEEP = 7 * 24 * 3600
+TAG_CACHE_PREFIX = "tags|"
+# Tags returned to the caller (one button each)
+TAG_LIST_LIMIT = 50
+# Docker Hub lists the most recently pushed tags first, so once this many
+# tags matching the host architecture were found the next pages are skipped
+TAG_FETCH_TARGET = 200
+TAG_MAX_PAGES = 10
+DOCKER_HUB_PAGE_SIZE = 100
+GHCR_PAGE_SIZE = 1000
+# A leading number this long is a date or build stamp ("20231005"), not a major version
+DATE_TAG_DIGITS = 8
+
+_VERSION_RE = re.compile(r"^[vV]?(\d+(?:\.\d+)*)(?:[-_.+]?(.*))?$")
+_PRERELEASE_RE = re.compile(r"^(alpha|beta|rc|pre|preview|dev|snapshot|nightly|a|b)([.\-_]?\d+)*$", re.IGNORECASE)
+
+
+def _prerelease_key(prerelease):
+	"""SemVer precedence of pre-release identifiers: numeric ones sort before alphanumeric ones"""
+	key = []
+	for identifier in re.split(r"[.\-_]|(?<=\D)(?=\d)", prerelease):
+		if identifier.isdigit():
+			key.append((0, int(identifier), ""))
+		elif identifier:
+			key.append((1, 0, identifier.lower()))
+	return tuple(key)
+
+
+def version_key(tag):
+	"""
+	Sort key of a tag, higher is newer.
+
+	"v1.10.0" > "v1.9.2" > "1.9.2-rc.1". Suffixes that are not pre-release
+	markers ("1.25-alpine", "5.15.2-ls101") are variants or builds of the
+	release and sort right after it, numbers in them compared as integers.
+	Date stamps ("20231005") sort below every version, and tags without a
+	number ("latest", "edge") below them.
+
+	>>> sort_tags(["5.15.2-ls99", "5.15.2-ls101", "5.15.2", "5.15.2-ls100"])
+	['5.15.2', '5.15.2-ls101', '5.15.2-ls100', '5.15.2-ls99']
+	>>> sort_tags(["20231005", "1.2.0", "latest", "20240101", "1.10.0-rc.1"])
+	['1.10.0-rc.1', '1.2.0', '20240101', '20231005', 'latest']
+	"""
+	match = _VERSION_RE.match(tag)
+	if not match:
+		return (0,)
+	numbers = tuple(int(part) for part in match.group(1).split("."))
+	suffix = match.group(2) or ""
+	rank = 1 if len(match.group(1).split(".")[0]) >= DATE_TAG_DIGITS else 2
+	if suffix and _PRERELEASE_RE.match(suffix):
+		return (rank, numbers, 0, _prerelease_key(suffix))
+	return (rank, numbers, 1, (0, _prerelease_key(suffix)) if suffix else (1, ()))
+
+
+def sort_tags(tags):
+	"""Versions newest first, then the other tags alphabetically"""
+	return sorted(sorted(tags), key=version_key, reverse=True)
+
+
+class TagCatalog:
+	"""Tag lists of Docker Hub, lscr.io and ghcr.io repositories"""
+
+	def __init__(self, http, cache, get_architecture, ttl=TAG_CACHE_TTL, limit=TAG_LIST_LIMIT):
+		"""
+		Initialize TagCatalog
+
+		Args:
+			http: Shared HttpClient
+			cache: CacheStore where the tag lists are kept
+			get_architecture: Callable returning the (cached) host architecture
+				as Docker Hub names it ("amd64", "arm64"...), or None
+			ttl: Seconds a tag list is served from the cache
+			limit: Tags returned by get_tags()
+		"""
+		self.http = http
+		self.cache = cache
+		self.get_architecture = get_architecture
+		self.ttl = ttl
+		self.limit = limit
+
+	@staticmethod
+	def _split_repository(repo_name):
+		"""Returns (registry, repository) for an image name without tag"""
+		if repo_name.startswith("ghcr.io/"):
+			return "ghcr.io", repo_name[len("ghcr.io/"):]
+		if repo_name.startswith("lscr.io/"):
+			# lscr.io images are mirrored on Docker Hub
+			repo_name = repo_name[len("lscr.io/"):]
+		if "/" not in repo_name:
+			# Official images need the 'library/' prefix in the API URL
+			repo_name = f"library/{repo_name}"
+		return "docker.io", repo_name
+
+	def get_tags(self, repo_name):
+		"""
+		Returns the tags of a repository, newest version first.
+
+		A list fetched less than ttl seconds ago is served without any
+		network call. Older lists are revalidated with If-None-Match.
+
+		Args:
+			repo_name: Image name without tag ("nginx", "ghcr.io/owner/repo")
+
+		Returns:
+			list of tag names (at most `limit`), empty if they can't be listed
+		"""
+		registry, repository = self._split_repository(repo_name)
+		architecture = None
+		if registry == "docker.io":
+			architecture = self.get_architecture()
+			if architecture is None:
+				error(f"Could not determine system architecture for {repo_name}")
+				return []
+		try:
+			entries = self._load(registry, repository)
+		except Exception as e:
+			error(f"Failed to get tags for {repo_name}: {str(e)}")
+			return ["latest"] if registry == "ghcr.io" else []
+
+		names = [name for name, architectures in entries if architectures is None or architecture in architectures]
+		if not names and entries:
+			debug(f"No tags found for architecture {architecture} in {repo_name}, returning all tags")
+			names = [name for name, _ in entries]
+		if not names and registry == "ghcr.io":
+			return ["latest"]
+		return sort_tags(names)[:self.limit]
+
+	def _load(self, registry, repository):
+		"""Returns [(tag, architectures or None)] from the cache or the registry"""
+		key = f"{TAG_CACHE_PREFIX}{registry}/{repository}"
+		cached = self.cache.get(key)
+		now = time.time()
+		if cached and now - cached["fetched_at"] < self.ttl:
+			debug(f"Tags of {registry}/{repository} served from cache")
+			return cached["tags"]
+
+		etag = cached.get("etag") if cached else None
+		if registry == "ghcr.io":
+			entries, new_etag = self._fetch_ghcr(repository, etag)
+		else:
+			entries, new_etag = self._fetch_docker_hub(repository, etag)
+		if entries is None:
+			debug(f"Tags of {registry}/{repository} not modified")
+			entries, new_etag = cached["tags"], etag
+		self.cache.set(key, {"tags": entries, "etag": new_etag, "fetched_at": now}, ttl=TAG_CACHE_KEEP)
+		return entries
+
+	def _pages(self, url, etag=None, **kwargs):
+		"""
+		Yields the response of each page, fetching the next one only when
+		asked for it. Only the first page is sent If-None-Match.
+		"""
+		headers = dict(kwargs.pop("headers", {}))
+		if etag:
+			headers["If-None-Match"] = etag
+		for _ in range(TAG_MAX_PAGES):
+			response = self.http.get(url, headers=headers, **kwargs)
+			headers.pop("If-None-Match", None)
+			yield response
+			if response.status_code != 200:
+				return
+			url = self._next_url(response)
+			if not url:
+				return
+
+	@staticmethod
+	def _next_url(response):
+		"""Next page from a Docker Hub body ("next") or a registry Link header"""
+		link = response.links.get("next", {}).get("url")
+		if link:
+			return urljoin(response.url, link)
+		try:
+			return response.json().get("next")
+		except ValueError:
+			return None
+
+	def _etag(self, first, last, pages):
+		# A list spread over several pages can change past the first one
+		# without the first page's ETag changing, so only single-page lists
+		# are revalidated
+		if pages != 1 or self._next_url(last):
+			return None
+		return first.headers.get("ETag")
+
+	def _fetch_docker_hub(self, repository, etag=None):
+		"""Returns ([(tag, architectures)], etag), or (None, etag) if not modified"""
+		url = f"https://hub.docker.com/v2/repositories/{repository}/tags?page_size={DOCKER_HUB_PAGE_SIZE}"
+		architecture = self.get_architecture()
+		entries = []
+		matching = 0
+		first = None
+		pages = 0
+		for response in self._pages(url, etag):
+			pages += 1
+			if first is None:
+				first = response
+				if response.status_code == 304:
+					return None, etag
+			if response.status_code == 404:
+				raise Exception(f'Repository not found: {repository}')
+			elif response.status_code != 200:
+				raise Exception(f'Error calling to {response.url}: {response.status_code}')
+			for tag in response.json().get('results', []):
+				architectures = tuple(image.get('architecture') for image in tag.get('images', []) if image.get('architecture'))
+				entries.append((tag['name'], architectures or None))
+				if not architectures or architecture in architectures:
+					matching += 1
+			if matching >= TAG_FETCH_TARGET:
+				break
+		debug(f"Fetched {len(entries)} tags of {repository} from Docker Hub in {pages} pages")
+		return entries, self._etag(first, response, pages)
+
+	def _fetch_ghcr(self, repository, etag=None):
+		"""Returns ([(tag, None)], etag), or (None, etag) if not modified"""
+		token = self.http.get_token("https://ghcr.io/token", service="ghcr.io", scope=f"repository:{repository}:pull")
+		if not token:
+			raise Exception(f"No token for ghcr.io/{repository}")
+		url = f"https://ghcr.io/v2/{repository}/tags/list?n={GHCR_PAGE_SIZE}"
+		headers = {"Authorization": f"Bearer {token}"}
+		entries = []
+		first = None
+		pages = 0
+		for response in self._pages(url, etag, headers=headers):
+			pages += 1
+			if first is None:
+				first = response
+				if response.status_code == 304:
+					return None, etag
+			if response.status_code == 401:
+				self.http.invalidate_token("https://ghcr.io/token", service="ghcr.io", scope=f"repository:{repository}:pull")
+			if response.status_code != 200:
+				raise Exception(f'Error calling to {response.url}: {response.status_code}')
+			entries.extend((tag, None) for tag in response.json().get('tags') or [])
+		debug(f"Fetched {len(entries)} tags of ghcr.io/{repository} in {pages} pages")
+		return entries, self._etag(first, response, pages)